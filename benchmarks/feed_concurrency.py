@@ -0,0 +1,66 @@
+"""Сравнение пропускной способности лент под WSGI и ASGI.
+
+Запустите оба сервера с одинаковым числом воркеров, например:
+
+    cd yatube
+    gunicorn yatube.wsgi -w 2 -b 127.0.0.1:8001
+    gunicorn yatube.asgi -w 2 -k uvicorn.workers.UvicornWorker \
+        -b 127.0.0.1:8002
+
+и затем:
+
+    python benchmarks/feed_concurrency.py \
+        http://127.0.0.1:8001 http://127.0.0.1:8002 --concurrency 32
+
+Для каждого сервера скрипт выполняет одинаковую серию запросов к
+index, group_list, profile и post_detail и печатает число запросов
+в секунду и перцентили задержки.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
+
+DEFAULT_PATHS = ('/', '/?page=2', '/posts/1/')
+
+
+def fetch(url):
+    started = time.perf_counter()
+    with urlopen(url) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def run(base_url, paths, requests, concurrency):
+    urls = [base_url.rstrip('/') + paths[i % len(paths)]
+            for i in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(fetch, urls))
+    elapsed = time.perf_counter() - started
+    return {
+        'rps': requests / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('servers', nargs='+')
+    parser.add_argument('--path', action='append', dest='paths')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+    for server in args.servers:
+        result = run(server, paths, args.requests, args.concurrency)
+        print(
+            f'{server}: {result["rps"]:.1f} req/s, '
+            f'p50 {result["p50"]:.1f} ms, p95 {result["p95"]:.1f} ms'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Память на страницу ленты: экземпляры моделей против posts.rows.
+
+Запуск из корня репозитория:
+
+    python benchmarks/feed_memory.py --posts 2000 --pages 100
+
+Каждый способ выборки измеряется в отдельном процессе: скрипт создает
+тестовую БД с длинными постами и рендерит страницы index.html. Для
+способа печатаются память объектов страницы и пик выделений при ее
+рендеринге (tracemalloc, в среднем на страницу), число выделенных
+блоков и пиковый RSS процесса.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+MODES = ('models', 'rows')
+
+
+def measure(mode, posts, pages, per_page):
+    import django
+    django.setup()
+    from django.db import connection
+    from django.template.loader import get_template
+    from django.test.utils import override_settings, setup_test_environment
+    from core.paginator import FeedPaginator
+    from posts.models import Group, Post, User
+    from posts.rows import feed_rows
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    group = Group.objects.create(title='Группа', slug='group')
+    authors = [
+        User.objects.create_user(username=f'bench_{i}', first_name='Имя')
+        for i in range(20)
+    ]
+    Post.objects.bulk_create(
+        Post(
+            text='Длинный текст поста. ' * 50,
+            text_html='<p>' + 'Длинный текст поста. ' * 50 + '</p>',
+            author=authors[i % len(authors)],
+            group=group if i % 2 else None,
+        )
+        for i in range(posts)
+    )
+    queryset = Post.objects.order_by('-pub_date')
+    if mode == 'models':
+        paginator = FeedPaginator(
+            queryset.select_related('author', 'group'), per_page)
+    else:
+        paginator = FeedPaginator(queryset, per_page, rows=feed_rows)
+    template = get_template('posts/index.html')
+    numbers = [number % paginator.num_pages + 1 for number in range(pages)]
+
+    dummy = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    with override_settings(CACHES={'default': dummy, 'sessions': dummy}):
+        for number in numbers:
+            template.render({'page_obj': paginator.page(number)})
+        rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        tracemalloc.start()
+        objects = peak = blocks = 0
+        for number in numbers:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            blocks_before = sys.getallocatedblocks()
+            page_obj = paginator.page(number)
+            page_obj.object_list = list(page_obj.object_list)
+            objects += tracemalloc.get_traced_memory()[0] - baseline
+            blocks += sys.getallocatedblocks() - blocks_before
+            template.render({'page_obj': page_obj})
+            peak += tracemalloc.get_traced_memory()[1] - baseline
+            del page_obj
+        tracemalloc.stop()
+    print(
+        f'{mode:>7}: объекты страницы {objects / pages / 1024:.1f} КиБ, '
+        f'{blocks / pages:.0f} блоков, '
+        f'пик рендеринга {peak / pages / 1024:.1f} КиБ, '
+        f'пиковый RSS {rss_kib / 1024:.1f} МиБ'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--per-page', type=int, default=10)
+    parser.add_argument('--mode', choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode:
+        measure(args.mode, args.posts, args.pages, args.per_page)
+        return
+    for mode in MODES:
+        subprocess.run(
+            [sys.executable, __file__, '--mode', mode,
+             '--posts', str(args.posts), '--pages', str(args.pages),
+             '--per-page', str(args.per_page)],
+            check=True,
+        )
+
+
+if __name__ == '__main__':
+    main()
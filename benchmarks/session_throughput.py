@@ -0,0 +1,68 @@
+"""Пропускная способность авторизованного index для разных SESSION_ENGINE.
+
+Запуск из корня репозитория:
+
+    python benchmarks/session_throughput.py --requests 500
+
+Скрипт создает тестовую БД, логинит пользователя и для каждого
+движка сессий печатает число запросов в секунду и число SQL-запросов
+на одну страницу.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--posts', type=int, default=100)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from django.core.cache import caches
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import (CaptureQueriesContext, override_settings,
+                                   setup_test_environment)
+    from posts.models import Post, User
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    user = User.objects.create_user(username='bench')
+    Post.objects.bulk_create(
+        Post(text=f'Пост {i}', author=user) for i in range(args.posts))
+
+    for engine in ENGINES:
+        with override_settings(SESSION_ENGINE=engine):
+            caches['sessions'].clear()
+            client = Client()
+            client.force_login(user)
+            client.get('/')
+            with CaptureQueriesContext(connection) as queries:
+                client.get('/')
+            query_count = len(queries)
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                client.get('/')
+            elapsed = time.perf_counter() - started
+        print(
+            f'{engine.rsplit(".", 1)[-1]:>15}: '
+            f'{args.requests / elapsed:.1f} req/s, '
+            f'{query_count} SQL-запросов на страницу'
+        )
+
+
+if __name__ == '__main__':
+    main()
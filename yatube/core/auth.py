@@ -0,0 +1,77 @@
+"""Кеширование пользователя, которого AuthenticationMiddleware
+загружает на каждый запрос.
+
+В кеше лежит снимок полей пользователя без хеша пароля и готовый
+session auth hash, поэтому проверка сессии после смены пароля
+продолжает работать. Снимок живет USER_CACHE_TIMEOUT секунд и
+сбрасывается при любом сохранении или удалении пользователя: смене
+пароля через PasswordChangeView, правке в админке, входе.
+
+Сброс виден другим воркерам только через общий кеш (Redis, Memcached).
+С локальным кешем процесса (locmem, dummy) бэкенд ничего не кеширует
+и работает как ModelBackend: иначе соседние воркеры принимали бы
+старые сессии после смены пароля или блокировки.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+
+from .cache import is_shared
+
+USER_CACHE_KEY = 'auth:user:{}'
+USER_CACHE_TIMEOUT = 5 * 60
+
+
+def _snapshot(user):
+    return {
+        'fields': {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname != 'password'
+        },
+        'session_hash': user.get_session_auth_hash(),
+    }
+
+
+def _restore(snapshot):
+    User = get_user_model()
+    fields = snapshot['fields']
+    # password остается отложенным полем: save() его не перезапишет.
+    user = User.from_db(
+        router.db_for_read(User), list(fields), list(fields.values()))
+    session_hash = snapshot['session_hash']
+
+    def get_session_auth_hash():
+        # После set_password() хеш считается заново от нового пароля.
+        if 'password' in user.__dict__:
+            return User.get_session_auth_hash(user)
+        return session_hash
+
+    user.get_session_auth_hash = get_session_auth_hash
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        if not is_shared():
+            return super().get_user(user_id)
+        key = USER_CACHE_KEY.format(user_id)
+        snapshot = cache.get(key)
+        if snapshot is not None:
+            return _restore(snapshot)
+        user = super().get_user(user_id)
+        if user is not None:
+            cache.set(key, _snapshot(user), USER_CACHE_TIMEOUT)
+        return user
+
+
+def invalidate_user(sender, instance, **kwargs):
+    cache.delete(USER_CACHE_KEY.format(instance.pk))
+
+
+def connect_signals():
+    User = get_user_model()
+    post_save.connect(invalidate_user, sender=User)
+    post_delete.connect(invalidate_user, sender=User)
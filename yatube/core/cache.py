@@ -0,0 +1,19 @@
+"""Свойства настроенных кешей."""
+from django.conf import settings
+
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared(alias='default', caches=None):
+    """Виден ли кеш alias всем процессам (Redis, Memcached, БД), а не
+    только текущему воркеру (locmem, dummy).
+
+    caches - словарь в формате CACHES; settings.py передает свой, пока
+    настройки еще не загружены.
+    """
+    if caches is None:
+        caches = settings.CACHES
+    return caches[alias]['BACKEND'] not in LOCAL_CACHES
@@ -0,0 +1,29 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+def _in_worker_thread(func):
+    def wrapper():
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+async def gather_queries(*funcs):
+    """Выполняет независимые блокирующие запросы к ORM одновременно.
+
+    Каждая функция запускается в отдельном потоке со своим соединением
+    с БД. При ASYNC_CONCURRENT_QUERIES = False запросы идут по очереди
+    в основном потоке: так они видят транзакцию TestCase.
+    """
+    if not settings.ASYNC_CONCURRENT_QUERIES:
+        return [await sync_to_async(func)() for func in funcs]
+    return await asyncio.gather(*(
+        sync_to_async(_in_worker_thread(func), thread_sensitive=False)()
+        for func in funcs
+    ))
@@ -0,0 +1,7 @@
+from django.conf import settings
+
+
+def realtime(request):
+    return {
+        'realtime_events': settings.REALTIME_EVENTS
+    }
@@ -0,0 +1,81 @@
+"""Профиль времени импорта при старте (python -X importtime).
+
+profile() запускает отдельный интерпретатор с -X importtime, выполняет
+в нем django.setup() - как любая команда manage.py, - а при urls=True
+еще и загрузку URLconf, как воркер на первом запросе. Отчет из stderr
+разбирается в строки (module, self_us, cumulative_us, depth).
+
+Модули, загруженные через importlib.import_module (настройки, модули
+приложений и их models.py), в отчет не попадают: -X importtime видит
+только оператор import. Их собственные импорты учитываются как модули
+верхнего уровня. Полный список загруженных модулей дает
+loaded_modules().
+"""
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+SETUP_SCRIPT = 'import django; django.setup()'
+URLS_SCRIPT = SETUP_SCRIPT + (
+    '; from django.urls import get_resolver; get_resolver().url_patterns')
+
+
+def parse(stderr):
+    rows = []
+    for line in stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append(
+                (module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def _run(script, *options):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'yatube.settings'))
+    return subprocess.run(
+        [sys.executable, *options, '-c', script],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def profile(urls=False):
+    script = URLS_SCRIPT if urls else SETUP_SCRIPT
+    return parse(_run(script, '-X', 'importtime').stderr)
+
+
+def loaded_modules(urls=False):
+    """Имена всех модулей в sys.modules после старта."""
+    script = URLS_SCRIPT if urls else SETUP_SCRIPT
+    output = _run(script + '; import sys; print(*sys.modules)').stdout
+    return set(output.split())
+
+
+def total_us(rows):
+    """Суммарное время: сумма cumulative модулей верхнего уровня."""
+    return sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+
+
+def report(rows, limit=30):
+    """Текстовый отчет: итог и самые дорогие модули по cumulative."""
+    lines = [
+        f'Модулей: {len(rows)}, всего: {total_us(rows) / 1000:.1f} мс',
+        f'{"cumulative, мс":>15} {"self, мс":>9}  модуль',
+    ]
+    for module, self_us, cumulative_us, depth in sorted(
+            rows, key=lambda row: row[2], reverse=True)[:limit]:
+        lines.append(
+            f'{cumulative_us / 1000:15.1f} {self_us / 1000:9.1f}  '
+            f'{"  " * depth}{module}'
+        )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core import importtime
+
+
+class Command(BaseCommand):
+    help = 'Показывает, какие модули дольше всего импортируются при старте.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--urls', action='store_true',
+            help='Учитывать загрузку URLconf, как на первом запросе воркера')
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument('--output', help='Записать отчет в файл')
+
+    def handle(self, *args, urls, limit, output, **options):
+        text = importtime.report(importtime.profile(urls), limit)
+        if output:
+            with open(output, 'w') as file:
+                file.write(text)
+        self.stdout.write(text)
@@ -0,0 +1,25 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.pubsub import serve_broker
+
+
+class Command(BaseCommand):
+    help = 'Запускает брокер событий для нескольких ASGI-воркеров.'
+
+    def add_arguments(self, parser):
+        options = settings.PUBSUB.get('OPTIONS', {})
+        parser.add_argument('--host', default=options.get('host', '127.0.0.1'))
+        parser.add_argument('--port', type=int,
+                            default=options.get('port', 8765))
+
+    def handle(self, *args, host, port, **options):
+        async def run():
+            server = await serve_broker(host, port)
+            self.stdout.write(f'Брокер событий слушает {host}:{port}')
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(run())
@@ -0,0 +1,112 @@
+"""Отдача MEDIA_ROOT с проверкой доступа, Range и условными запросами.
+
+Если настроен фронтенд-сервер, байты отдает он: представление только
+проверяет доступ и ставит X-Accel-Redirect (nginx, настройка
+MEDIA_ACCEL_REDIRECT_PREFIX) или X-Sendfile (Apache, lighttpd,
+MEDIA_SENDFILE_HEADER). Иначе файл целиком отдается FileResponse, и
+WSGI-сервер с wsgi.file_wrapper использует sendfile без копирования
+в воркер. Диапазоны (206) читаются из файла частями.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """Файловый объект, читающий только length байт с позиции start."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def has_access(request, path):
+    """Публичны только каталоги из MEDIA_PUBLIC_PREFIXES."""
+    return path.startswith(tuple(settings.MEDIA_PUBLIC_PREFIXES))
+
+
+def _parse_range(header, size):
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        return False
+    return start, end
+
+
+def serve_media(request, path):
+    path = posixpath.normpath(path).lstrip('/')
+    if path.startswith('..') or not has_access(request, path):
+        raise Http404
+    full_path = os.path.join(settings.MEDIA_ROOT, path)
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    etag = quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is not None:
+        return response
+
+    content_type = mimetypes.guess_type(full_path)[0]
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + path)
+    elif settings.MEDIA_SENDFILE_HEADER:
+        response = HttpResponse(content_type=content_type)
+        response[settings.MEDIA_SENDFILE_HEADER] = full_path
+    else:
+        byte_range = _parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        file = open(full_path, 'rb')
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = FileResponse(
+                RangeFile(file, start, length),
+                content_type=content_type,
+                status=206
+            )
+            response['Content-Length'] = str(length)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = f'public, max-age={settings.MEDIA_MAX_AGE}'
+    return response
@@ -0,0 +1,147 @@
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+
+def table_estimate(model, using='default'):
+    """Оценка числа строк таблицы без COUNT.
+
+    На PostgreSQL берется статистика планировщика (pg_class.reltuples),
+    на остальных базах - максимальный pk (поиск по индексу).
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return int(row[0])
+    return model._default_manager.using(using).aggregate(
+        estimate=Max('pk'))['estimate'] or 0
+
+
+class CountingStrategy:
+    """Как пагинатор ленты узнает число записей.
+
+    До exact_limit записей считается точно: COUNT по подзапросу с
+    LIMIT. Для больших выборок берется estimate() - поддерживаемый
+    счетчик или оценка планировщика, а без него точный COUNT. Результат
+    для больших выборок кешируется на timeout секунд под cache_key.
+    """
+
+    def __init__(self, exact_limit=1000, estimate=None, cache_key=None,
+                 timeout=60):
+        self.exact_limit = exact_limit
+        self.estimate = estimate
+        self.cache_key = cache_key
+        self.timeout = timeout
+
+    def count(self, queryset):
+        if self.cache_key is not None:
+            cached = cache.get(self.cache_key)
+            if cached is not None:
+                return cached
+        count = queryset[:self.exact_limit + 1].count()
+        if count <= self.exact_limit:
+            return count
+        if self.estimate is None:
+            return self.exact(queryset)
+        count = max(self.estimate() or 0, count)
+        self._store(count)
+        return count
+
+    def exact(self, queryset):
+        """Точный COUNT, который заменяет оценку в кеше."""
+        count = queryset.count()
+        self._store(count)
+        return count
+
+    def _store(self, count):
+        if self.cache_key is not None:
+            cache.set(self.cache_key, count, self.timeout)
+
+
+class ElidedPageRangeMixin:
+    """Номера страниц для шаблона без полного page_range.
+
+    Первые и последние on_ends страниц, on_each_side страниц вокруг
+    текущей и многоточия (ELLIPSIS) вместо пропусков: размер не
+    зависит от числа страниц.
+    """
+    on_each_side = 2
+    on_ends = 1
+
+    def elided_page_range(self, number):
+        return self.get_elided_page_range(
+            number, on_each_side=self.on_each_side, on_ends=self.on_ends)
+
+
+class FeedPaginator(ElidedPageRangeMixin, Paginator):
+    """Paginator лент, число записей которого дает CountingStrategy.
+
+    rows(queryset) - необязательное преобразование выборки страницы
+    (например, posts.rows.feed_rows). Считаются записи исходного
+    object_list, без соединений, которые нужны только строкам.
+
+    Оценка может превышать настоящее число записей: удаленные и
+    архивные посты остаются в max(pk) и в статистике PostgreSQL.
+    Пустая страница за концом ленты в get_page() заменяется последней
+    настоящей, а оценка - точным числом.
+    """
+
+    def __init__(self, object_list, per_page, strategy=None, rows=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.strategy = strategy or CountingStrategy()
+        self.rows = rows
+
+    @cached_property
+    def count(self):
+        return self.strategy.count(self.object_list)
+
+    def get_page(self, number):
+        page = super().get_page(number)
+        if page.number == 1 or page.object_list:
+            return page
+        self.__dict__['count'] = self.strategy.exact(self.object_list)
+        self.__dict__.pop('num_pages', None)
+        return self.page(self.num_pages)
+
+    def _get_page(self, object_list, *args, **kwargs):
+        if self.rows is not None:
+            object_list = self.rows(object_list)
+        return super()._get_page(object_list, *args, **kwargs)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который не считает большие таблицы целиком.
+
+    Число записей дает CountingStrategy с пределом exact_count_limit.
+    Выше предела для таблицы без фильтров берется table_estimate(), а
+    отфильтрованная выборка оценивается уже посчитанными строками
+    (exact_count_limit + 1).
+    """
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        strategy = CountingStrategy(
+            self.exact_count_limit, estimate=lambda: self._estimate(queryset))
+        return strategy.count(queryset)
+
+    @staticmethod
+    def _estimate(queryset):
+        # Фильтр менеджера по умолчанию (например, мягкое удаление) не
+        # считается фильтром выборки.
+        base_where = queryset.model._default_manager.all().query.where
+        if queryset.query.where and queryset.query.where != base_where:
+            return None
+        return table_estimate(queryset.model, queryset.db)
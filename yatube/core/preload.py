@@ -0,0 +1,51 @@
+"""Режим preload для pre-fork серверов (gunicorn --preload).
+
+preload() выполняется в мастер-процессе до fork: загружает URLconf
+(представления и админку), отложенные тяжелые модули (Markdown, bleach,
+Pillow, движок sorl-thumbnail) и компилирует шаблоны в кеш загрузчика.
+Затем закрывает соединения с БД, чтобы воркеры не делили сокеты, и
+замораживает сборщик мусора: объекты мастера не трогаются сборками в
+воркерах, и их страницы остаются общими (copy-on-write).
+"""
+import gc
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver
+
+
+def _template_names():
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith('.html'):
+                    yield os.path.relpath(
+                        os.path.join(root, name), directory
+                    ).replace(os.sep, '/')
+
+
+def preload():
+    """Прогревает процесс перед fork. Возвращает затраченные секунды."""
+    started = time.monotonic()
+    get_resolver().url_patterns
+
+    from PIL import Image
+    from sorl.thumbnail import default
+
+    from posts.markup import render
+
+    Image.init()
+    for lazy in (default.backend, default.engine, default.kvstore):
+        lazy.__class__
+    render('*preload*', resolve_usernames=lambda names: set())
+
+    engine = engines['django']
+    for name in _template_names():
+        engine.get_template(name)
+
+    connections.close_all()
+    gc.freeze()
+    return time.monotonic() - started
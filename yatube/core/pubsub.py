@@ -0,0 +1,269 @@
+"""Публикация и подписка на события для потоковых обновлений (SSE).
+
+Брокер выбирается настройкой PUBSUB:
+
+* InProcessBroker - подписчики в том же процессе; для разработки и
+  одного ASGI-воркера;
+* SocketBroker - отдельный процесс `manage.py pubsub_broker`, к
+  которому по TCP подключаются все воркеры: одно соединение на
+  процесс для подписок и по одному на поток для публикаций.
+
+publish() синхронный и потокобезопасный, его вызывают представления.
+subscribe() вызывается в event loop и возвращает Subscription, у
+которой `await get()` ждет следующее сообщение.
+"""
+import asyncio
+import json
+import socket
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+QUEUE_SIZE = 100
+BUFFER_LIMIT = 1024 * 1024
+
+
+class InProcessBroker:
+    def __init__(self, **options):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers[channel])
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(
+                subscription.put_nowait, message)
+
+    async def subscribe(self, *channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].discard(subscription)
+
+
+class Subscription:
+    """Очередь сообщений одного подписчика. Когда она заполнена, новые
+    сообщения отбрасываются: медленный клиент не копит память."""
+
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.error = None
+
+    def put_nowait(self, message):
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+    def fail(self, error):
+        """Будит get(), чтобы тот выбросил error."""
+        self.error = error
+        self.put_nowait(None)
+
+    async def get(self):
+        if self.error is None:
+            message = await self.queue.get()
+            if self.error is None:
+                return message
+        raise self.error
+
+    async def close(self):
+        self.broker._unsubscribe(self)
+
+
+class SocketBroker:
+    """Клиент брокера pubsub_broker.
+
+    Протокол построчный: `SUB <канал>`, `UNSUB <канал>`, `PUB <канал>
+    <json>`; брокер пересылает подписчикам `MSG <канал> <json>`.
+
+    Все подписки процесса делят одно соединение с брокером: SUB
+    отправляется для первого подписчика канала, UNSUB - после ухода
+    последнего, а пришедшие сообщения раскладываются по очередям
+    подписок. Если соединение оборвалось, get() всех подписок
+    выбрасывает ConnectionError, и следующая подписка подключится
+    заново. Публикации идут по блокирующему соединению своего потока.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, timeout=5, **options):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._local = threading.local()
+        self._loop = None
+        self._connecting = None
+        self._writer = None
+        self._reading = None
+        self._subscribers = defaultdict(set)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = socket.create_connection(
+                (self.host, self.port), self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def publish(self, channel, message):
+        line = f'PUB {channel} {json.dumps(message)}\n'.encode()
+        for attempt in range(2):
+            try:
+                self._connection().sendall(line)
+                return
+            except OSError:
+                self._local.connection = None
+                if attempt:
+                    raise
+
+    def close(self):
+        """Закрывает соединение публикации текущего потока."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    async def _connect(self):
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            self._connecting = None
+            raise
+        self._writer = writer
+        self._reading = asyncio.ensure_future(self._read(reader, writer))
+        return writer
+
+    async def _subscription_writer(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Новый event loop (например, в тестах): соединение и
+            # подписки прежнего ему не принадлежат.
+            self._loop = loop
+            self._connecting = None
+            self._subscribers = defaultdict(set)
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._connect())
+        return await asyncio.shield(self._connecting)
+
+    async def _read(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                _, channel, payload = line.decode().rstrip('\n').split(' ', 2)
+                message = json.loads(payload)
+                for subscription in list(self._subscribers.get(channel, ())):
+                    subscription.put_nowait(message)
+        except OSError:
+            pass
+        finally:
+            self._disconnect(writer)
+
+    def _disconnect(self, writer):
+        writer.close()
+        if self._writer is not writer:
+            return
+        self._connecting = self._writer = None
+        subscriptions = {
+            subscription
+            for channel_subscribers in self._subscribers.values()
+            for subscription in channel_subscribers
+        }
+        self._subscribers = defaultdict(set)
+        for subscription in subscriptions:
+            subscription.fail(
+                ConnectionError('pubsub broker closed the connection'))
+
+    async def subscribe(self, *channels):
+        writer = await self._subscription_writer()
+        if writer is not self._writer:
+            raise ConnectionError('pubsub broker closed the connection')
+        subscription = Subscription(self, channels)
+        new = [
+            channel for channel in channels
+            if not self._subscribers[channel]
+        ]
+        for channel in channels:
+            self._subscribers[channel].add(subscription)
+        if new:
+            writer.write(''.join(f'SUB {channel}\n' for channel in new)
+                         .encode())
+            await writer.drain()
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        gone = []
+        for channel in subscription.channels:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[channel]
+                gone.append(channel)
+        if gone and self._writer is not None:
+            self._writer.write(
+                ''.join(f'UNSUB {channel}\n' for channel in gone).encode())
+
+
+def _forward(subscribers, rest):
+    line = f'MSG {rest}\n'.encode()
+    for subscriber in list(subscribers):
+        if subscriber.transport.get_write_buffer_size() < BUFFER_LIMIT:
+            subscriber.write(line)
+
+
+async def serve_broker(host, port):
+    """Сервер SocketBroker: пересылает PUB всем подписчикам канала.
+
+    Подписчику, который не успевает читать (в буфере отправки больше
+    BUFFER_LIMIT байт), новые сообщения не отправляются.
+    """
+    subscribers = defaultdict(set)
+
+    async def handle(reader, writer):
+        channels = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, rest = line.decode().rstrip('\n').partition(' ')
+                if command == 'SUB':
+                    channels.add(rest)
+                    subscribers[rest].add(writer)
+                elif command == 'UNSUB':
+                    channels.discard(rest)
+                    subscribers[rest].discard(writer)
+                elif command == 'PUB':
+                    _forward(subscribers[rest.partition(' ')[0]], rest)
+        except OSError:
+            pass
+        finally:
+            for channel in channels:
+                subscribers[channel].discard(writer)
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.PUBSUB['BACKEND'])(
+            **settings.PUBSUB.get('OPTIONS', {}))
+    return _broker
@@ -0,0 +1,135 @@
+"""Ограничение частоты запросов скользящим окном в общем кеше.
+
+Для каждой пары (группа, пользователь или IP) хранятся счетчики
+текущего и предыдущего окна. Оценка числа запросов за последние
+window секунд - счетчик текущего окна плюс доля предыдущего,
+пропорциональная еще не истекшей его части. Проверка стоит одного
+incr и одного get к кешу.
+"""
+import logging
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .views import too_many_requests
+
+logger = logging.getLogger(__name__)
+
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Счетчики пропущенных и отклоненных запросов процесса:
+# METRICS[(group, 'allowed' | 'blocked')].
+METRICS = Counter()
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60), '100/5m' -> (100, 300)."""
+    limit, period = rate.split('/')
+    multiplier = int(period[:-1] or 1)
+    return int(limit), multiplier * UNITS[period[-1]]
+
+
+def client_key(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def _counters(group, key, window, now):
+    current = int(now // window)
+    prefix = f'rl:{group}:{key}:'
+    return f'{prefix}{current}', f'{prefix}{current - 1}'
+
+
+def reserve(group, key, rate, now=None):
+    """Занимает место в счетчике текущего окна.
+
+    Возвращает 0 или сколько секунд подождать; при отказе место сразу
+    возвращается. Место берется атомарным incr до выполнения
+    представления, поэтому параллельные запросы не проходят проверку
+    все разом.
+    """
+    limit, window = parse_rate(rate)
+    now = time.time() if now is None else now
+    current_key, previous_key = _counters(group, key, window, now)
+    cache = caches[settings.RATELIMIT_CACHE]
+    if cache.add(current_key, 1, 2 * window):
+        count = 1
+    else:
+        try:
+            count = cache.incr(current_key)
+        except ValueError:
+            cache.set(current_key, 1, 2 * window)
+            count = 1
+    elapsed = now % window
+    # Оценка до этого запроса: count включает его самого.
+    estimate = (
+        count - 1 + cache.get(previous_key, 0) * (1 - elapsed / window))
+    if estimate >= limit:
+        _decr(cache, current_key)
+        METRICS[group, 'blocked'] += 1
+        logger.info('rate limit %s exceeded by %s', group, key)
+        return max(int(window - elapsed), 1)
+    METRICS[group, 'allowed'] += 1
+    return 0
+
+
+def release(group, key, rate, now):
+    """Возвращает место, занятое reserve() с тем же now."""
+    _, window = parse_rate(rate)
+    current_key, _ = _counters(group, key, window, now)
+    _decr(caches[settings.RATELIMIT_CACHE], current_key)
+
+
+def _decr(cache, key):
+    try:
+        cache.decr(key)
+    except ValueError:
+        # Счетчик истек.
+        pass
+
+
+def hit(group, key, rate, now=None):
+    """Учитывает запрос; возвращает 0 или сколько секунд подождать."""
+    return reserve(group, key, rate, now)
+
+
+def _succeeded(response):
+    """Успешная запись отвечает редиректом; форма с ошибками -
+    страницей 200, такие запросы в лимит не идут."""
+    return 300 <= response.status_code < 400
+
+
+def ratelimit(group, rate, methods=('POST',)):
+    """Декоратор представления: не больше rate запросов methods от
+    одного пользователя (анонима - по IP) в группе group.
+
+    Место в лимите занимается до вызова представления и возвращается,
+    если запись не состоялась (ответ - не редирект): отправка
+    невалидной формы попытку не тратит.
+    Лимит группы переопределяется в settings.RATELIMITS.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not (settings.RATELIMIT_ENABLE and request.method in methods):
+                return view_func(request, *args, **kwargs)
+            key = client_key(request)
+            group_rate = settings.RATELIMITS.get(group, rate)
+            now = time.time()
+            retry_after = reserve(group, key, group_rate, now)
+            if retry_after:
+                return too_many_requests(request, retry_after)
+            try:
+                response = view_func(request, *args, **kwargs)
+            except Exception:
+                release(group, key, group_rate, now)
+                raise
+            if not _succeeded(response):
+                release(group, key, group_rate, now)
+            return response
+        return wrapper
+    return decorator
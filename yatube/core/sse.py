@@ -0,0 +1,102 @@
+"""ASGI-приложение для потоков server-sent events.
+
+Стоит перед Django в yatube/asgi.py и обслуживает только свои
+маршруты. Каждое соединение - корутина, ожидающая сообщение брокера
+или отключение клиента, поэтому простаивающий поток не занимает ни
+поток, ни воркер. Раз в HEARTBEAT секунд отправляется комментарий,
+чтобы прокси не закрывали соединение. Если брокер недоступен, поток
+не открывается: клиент получает 503 и переподключается позже.
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from .pubsub import get_broker
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = 15
+
+
+class EventStreamApplication:
+    """routes - список (regex, handler). handler(match, query) возвращает
+    (каналы, filter(message) -> (event, data) или None)."""
+
+    def __init__(self, application, routes):
+        self.application = application
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            for pattern, handler in self.routes:
+                match = pattern.match(scope['path'])
+                if match:
+                    query = parse_qs(scope.get('query_string', b'').decode())
+                    channels, event_filter = handler(match, query)
+                    await self.stream(receive, send, channels, event_filter)
+                    return
+        await self.application(scope, receive, send)
+
+    async def stream(self, receive, send, channels, event_filter):
+        try:
+            subscription = await get_broker().subscribe(*channels)
+        except (OSError, asyncio.TimeoutError):
+            logger.warning('pubsub broker unavailable, stream refused')
+            await send({
+                'type': 'http.response.start',
+                'status': 503,
+                'headers': [(b'retry-after', str(HEARTBEAT).encode())],
+            })
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+        message = asyncio.ensure_future(subscription.get())
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            await _send_body(send, b': connected\n\n')
+            while True:
+                done, _ = await asyncio.wait(
+                    {disconnect, message},
+                    timeout=HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnect in done:
+                    return
+                if message not in done:
+                    await _send_body(send, b': ping\n\n')
+                    continue
+                event = event_filter(message.result())
+                message = asyncio.ensure_future(subscription.get())
+                if event is not None:
+                    name, data = event
+                    await _send_body(
+                        send,
+                        f'event: {name}\ndata: {json.dumps(data)}\n\n'.encode()
+                    )
+        finally:
+            for task in (disconnect, message):
+                task.cancel()
+            await subscription.close()
+            await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _send_body(send, body):
+    await send({
+        'type': 'http.response.body',
+        'body': body,
+        'more_body': True,
+    })
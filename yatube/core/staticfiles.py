@@ -0,0 +1,155 @@
+"""Статика: хешированные имена, сжатые копии и отдача из WSGI.
+
+CompressedManifestStaticFilesStorage при collectstatic кладет рядом
+с каждым текстовым файлом копии .gz и, если установлен brotli, .br.
+StaticFilesApplication отдает STATIC_ROOT перед Django-приложением:
+выбирает сжатую копию по Accept-Encoding, отвечает 304 на условные
+запросы, а файлы с хешем в имени помечает как immutable на год.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.html', '.json',
+                           '.map', '.xml', '.ico')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+DEFAULT_MAX_AGE = 60
+CHUNK_SIZE = 64 * 1024
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage с предварительным сжатием.
+
+    До первого collectstatic манифеста нет, и файлы отдаются под
+    исходными именами, как у StaticFilesStorage.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for hashed_name in set(self.hashed_files.values()):
+                self._compress(hashed_name)
+
+    def _compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as original:
+            content = original.read()
+        variants = [('.gz', gzip.compress(content, 9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+class StaticFilesApplication:
+    """WSGI-обертка, отдающая STATIC_URL из STATIC_ROOT."""
+
+    encodings = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = os.path.abspath(root or settings.STATIC_ROOT)
+        self.prefix = prefix or settings.STATIC_URL
+        self.immutable = self._load_hashed_names()
+
+    def _load_hashed_names(self):
+        storage = CompressedManifestStaticFilesStorage(location=self.root)
+        return set(storage.load_manifest().values())
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if environ['REQUEST_METHOD'] in ('GET', 'HEAD') and path.startswith(
+                self.prefix):
+            response = self.serve(environ, path[len(self.prefix):])
+            if response is not None:
+                status, headers, body = response
+                start_response(status, headers)
+                return body
+        return self.application(environ, start_response)
+
+    def _resolve(self, name):
+        name = posixpath.normpath(unquote(name)).lstrip('/')
+        if name.startswith('..'):
+            return None
+        path = os.path.join(self.root, name)
+        return path if os.path.isfile(path) else None
+
+    def serve(self, environ, name):
+        path = self._resolve(name)
+        if path is None:
+            return None
+        content_type = mimetypes.guess_type(path)[0]
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        accept = environ.get('HTTP_ACCEPT_ENCODING', '')
+        for encoding, suffix in self.encodings:
+            if encoding in accept and os.path.isfile(path + suffix):
+                path += suffix
+                headers.append(('Content-Encoding', encoding))
+                break
+        stat = os.stat(path)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        max_age = (IMMUTABLE_MAX_AGE if name.lstrip('/') in self.immutable
+                   else DEFAULT_MAX_AGE)
+        cache_control = f'public, max-age={max_age}'
+        if max_age == IMMUTABLE_MAX_AGE:
+            cache_control += ', immutable'
+        headers += [
+            ('Cache-Control', cache_control),
+            ('ETag', etag),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+        ]
+        if self._not_modified(environ, etag, stat.st_mtime):
+            return '304 Not Modified', headers, []
+        headers.append(('Content-Length', str(stat.st_size)))
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return '200 OK', headers, []
+        file_wrapper = environ.get('wsgi.file_wrapper', _file_iterator)
+        return '200 OK', headers, file_wrapper(open(path, 'rb'), CHUNK_SIZE)
+
+    @staticmethod
+    def _not_modified(environ, etag, mtime):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in if_none_match or if_none_match.strip() == '*'
+        if_modified_since = environ.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+
+def _file_iterator(file, chunk_size):
+    with file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
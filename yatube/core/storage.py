@@ -0,0 +1,295 @@
+"""Хранилище медиа в S3-совместимом объектном хранилище.
+
+ObjectStorage работает с клиентом, повторяющим нужную часть API
+boto3 S3: put_object, get_object, head_object, delete_object,
+list_objects_v2, multipart upload и generate_presigned_url. В бою это
+boto3 (необязательная зависимость), в разработке и тестах -
+InMemoryS3Client, работающий внутри процесса.
+
+Метаданные объектов (размер, время изменения, существование) хранятся
+в кеше, поэтому {% thumbnail %} и проверки exists() не делают HEAD на
+каждую картинку. Большие файлы загружаются частями параллельно.
+"""
+import io
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from hashlib import md5, sha256
+from hmac import new as hmac_new
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils.deconstruct import deconstructible
+
+NOT_FOUND_CODES = ('404', 'NoSuchKey', 'NotFound')
+META_TIMEOUT = 24 * 60 * 60
+
+
+class ClientError(Exception):
+    """Ошибка в формате botocore.exceptions.ClientError."""
+
+    def __init__(self, code, operation):
+        super().__init__(f'{operation}: {code}')
+        self.response = {'Error': {'Code': code}}
+
+
+def _error_code(error):
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+class InMemoryS3Client:
+    """Локальная замена S3 внутри процесса для разработки и тестов."""
+
+    def __init__(self, secret=''):
+        self.secret = secret
+        self.objects = {}
+        self.uploads = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _record(self, operation):
+        with self._lock:
+            self.calls.append(operation)
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self._record('put_object')
+        data = Body if isinstance(Body, bytes) else Body.read()
+        with self._lock:
+            self.objects[Bucket, Key] = (
+                data, ContentType, datetime.now(timezone.utc))
+        return {'ETag': f'"{md5(data).hexdigest()}"'}
+
+    def _get(self, Bucket, Key, operation):
+        try:
+            return self.objects[Bucket, Key]
+        except KeyError:
+            raise ClientError('404', operation)
+
+    def get_object(self, Bucket, Key):
+        self._record('get_object')
+        data, content_type, modified = self._get(Bucket, Key, 'GetObject')
+        return {
+            'Body': io.BytesIO(data),
+            'ContentLength': len(data),
+            'ContentType': content_type,
+            'LastModified': modified,
+        }
+
+    def head_object(self, Bucket, Key):
+        self._record('head_object')
+        data, content_type, modified = self._get(Bucket, Key, 'HeadObject')
+        return {
+            'ContentLength': len(data),
+            'ContentType': content_type,
+            'LastModified': modified,
+        }
+
+    def delete_object(self, Bucket, Key):
+        self._record('delete_object')
+        with self._lock:
+            self.objects.pop((Bucket, Key), None)
+
+    def list_objects_v2(self, Bucket, Prefix='', Delimiter=''):
+        self._record('list_objects_v2')
+        contents, prefixes = [], set()
+        for bucket, key in sorted(self.objects):
+            if bucket != Bucket or not key.startswith(Prefix):
+                continue
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                prefixes.add(Prefix + rest.split(Delimiter)[0] + Delimiter)
+            else:
+                contents.append({'Key': key})
+        return {
+            'Contents': contents,
+            'CommonPrefixes': [{'Prefix': prefix}
+                               for prefix in sorted(prefixes)],
+        }
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None):
+        self._record('create_multipart_upload')
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self.uploads[upload_id] = {}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._record('upload_part')
+        with self._lock:
+            self.uploads[UploadId][PartNumber] = Body
+        return {'ETag': f'"{md5(Body).hexdigest()}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId,
+                                  MultipartUpload):
+        self._record('complete_multipart_upload')
+        with self._lock:
+            parts = self.uploads.pop(UploadId)
+        data = b''.join(
+            parts[part['PartNumber']] for part in MultipartUpload['Parts'])
+        with self._lock:
+            self.objects[Bucket, Key] = (
+                data, None, datetime.now(timezone.utc))
+        return {}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._record('abort_multipart_upload')
+        with self._lock:
+            self.uploads.pop(UploadId, None)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        expires = int(datetime.now(timezone.utc).timestamp()) + ExpiresIn
+        path = f'/{Params["Bucket"]}/{quote(Params["Key"])}'
+        signature = hmac_new(
+            self.secret.encode(), f'{path}:{expires}'.encode(), sha256
+        ).hexdigest()
+        query = urlencode({'Expires': expires, 'Signature': signature})
+        return f'{path}?{query}'
+
+
+_memory_clients = {}
+
+
+def get_client(options):
+    """Клиент S3 по настройкам OBJECT_STORAGE."""
+    if options.get('CLIENT') == 'memory':
+        return _memory_clients.setdefault(
+            options['BUCKET'], InMemoryS3Client(settings.SECRET_KEY))
+    import boto3
+    return boto3.client(
+        's3',
+        endpoint_url=options.get('ENDPOINT_URL'),
+        aws_access_key_id=options.get('ACCESS_KEY'),
+        aws_secret_access_key=options.get('SECRET_KEY'),
+        region_name=options.get('REGION'),
+    )
+
+
+@deconstructible
+class ObjectStorage(Storage):
+    """Django Storage поверх S3-совместимого хранилища."""
+
+    def __init__(self, options=None, client=None):
+        self.options = {**settings.OBJECT_STORAGE, **(options or {})}
+        self.bucket = self.options['BUCKET']
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_client(self.options)
+        return self._client
+
+    def _meta_key(self, name):
+        return f'objstore:{self.bucket}:{md5(name.encode()).hexdigest()}'
+
+    def _set_meta(self, name, size, modified):
+        cache.set(self._meta_key(name),
+                  {'size': size, 'modified': modified}, META_TIMEOUT)
+
+    def _meta(self, name):
+        meta = cache.get(self._meta_key(name))
+        if meta is None:
+            try:
+                head = self.client.head_object(Bucket=self.bucket, Key=name)
+            except Exception as error:
+                if _error_code(error) not in NOT_FOUND_CODES:
+                    raise
+                meta = False
+            else:
+                meta = {
+                    'size': head['ContentLength'],
+                    'modified': head['LastModified'],
+                }
+            cache.set(self._meta_key(name), meta, META_TIMEOUT)
+        return meta
+
+    def _open(self, name, mode='rb'):
+        response = self.client.get_object(Bucket=self.bucket, Key=name)
+        return ContentFile(response['Body'].read(), name=name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        part_size = self.options['MULTIPART_CHUNK_SIZE']
+        content_type = getattr(content, 'content_type', None)
+        if content.size > self.options['MULTIPART_THRESHOLD']:
+            self._multipart_upload(name, content, part_size, content_type)
+        else:
+            kwargs = {'ContentType': content_type} if content_type else {}
+            self.client.put_object(
+                Bucket=self.bucket, Key=name, Body=content.read(), **kwargs)
+        self._set_meta(name, content.size, datetime.now(timezone.utc))
+        return name
+
+    def _multipart_upload(self, name, content, part_size, content_type):
+        kwargs = {'ContentType': content_type} if content_type else {}
+        upload_id = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=name, **kwargs)['UploadId']
+
+        def upload(number, body):
+            response = self.client.upload_part(
+                Bucket=self.bucket, Key=name, UploadId=upload_id,
+                PartNumber=number, Body=body)
+            return {'PartNumber': number, 'ETag': response['ETag']}
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.options['MULTIPART_CONCURRENCY']
+            ) as pool:
+                futures = [
+                    pool.submit(upload, number, chunk)
+                    for number, chunk in enumerate(
+                        iter(lambda: content.read(part_size), b''), 1)
+                ]
+                parts = [future.result() for future in futures]
+        except Exception:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=name, UploadId=upload_id)
+            raise
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=name, UploadId=upload_id,
+            MultipartUpload={'Parts': parts})
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+        cache.set(self._meta_key(name), False, META_TIMEOUT)
+
+    def exists(self, name):
+        return bool(self._meta(name))
+
+    def size(self, name):
+        meta = self._meta(name)
+        if not meta:
+            raise FileNotFoundError(name)
+        return meta['size']
+
+    def get_modified_time(self, name):
+        meta = self._meta(name)
+        if not meta:
+            raise FileNotFoundError(name)
+        return meta['modified']
+
+    def listdir(self, path):
+        prefix = path.rstrip('/') + '/' if path else ''
+        response = self.client.list_objects_v2(
+            Bucket=self.bucket, Prefix=prefix, Delimiter='/')
+        directories = [item['Prefix'][len(prefix):].rstrip('/')
+                       for item in response.get('CommonPrefixes', [])]
+        files = [item['Key'][len(prefix):]
+                 for item in response.get('Contents', [])]
+        return directories, files
+
+    def url(self, name):
+        if self.options.get('CDN_URL'):
+            return self.options['CDN_URL'].rstrip('/') + '/' + quote(name)
+        if self.options.get('SIGNED_URLS'):
+            return self.client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self.bucket, 'Key': name},
+                ExpiresIn=self.options['SIGNED_URL_EXPIRES'],
+            )
+        endpoint = (self.options.get('ENDPOINT_URL') or '').rstrip('/')
+        return f'{endpoint}/{self.bucket}/{quote(name)}'
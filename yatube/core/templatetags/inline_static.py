@@ -0,0 +1,26 @@
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def _read(path):
+    absolute_path = finders.find(path)
+    if absolute_path is None:
+        return ''
+    with open(absolute_path, encoding='utf-8') as file:
+        return file.read()
+
+
+@register.simple_tag
+def inline_static(path):
+    """Содержимое статического файла, прочитанное один раз на процесс.
+
+    Используется для критического CSS, который нужен до загрузки
+    основной таблицы стилей.
+    """
+    return mark_safe(_read(path))
@@ -0,0 +1,21 @@
+from django import template
+
+from core.paginator import ElidedPageRangeMixin
+
+register = template.Library()
+
+
+@register.simple_tag
+def elided_page_range(page_obj):
+    """Номера страниц вокруг page_obj с многоточиями.
+
+    Пагинатор без ElidedPageRangeMixin получает те же размеры окна.
+    """
+    paginator = page_obj.paginator
+    if isinstance(paginator, ElidedPageRangeMixin):
+        return list(paginator.elided_page_range(page_obj.number))
+    return list(paginator.get_elided_page_range(
+        page_obj.number,
+        on_each_side=ElidedPageRangeMixin.on_each_side,
+        on_ends=ElidedPageRangeMixin.on_ends,
+    ))
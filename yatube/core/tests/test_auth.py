@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import User
+from .. import auth
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(auth, 'is_shared', return_value=True)
+        self.shared = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            username='user', password='old-password-123')
+        self.client = Client()
+        self.client.login(username='user', password='old-password-123')
+
+    def _auth_user_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query for query in queries
+                if 'FROM "auth_user"' in query['sql']]
+
+    def test_user_is_loaded_from_cache(self):
+        """Повторный запрос не загружает пользователя из БД."""
+        url = reverse('posts:post_create')
+        self.assertEqual(len(self._auth_user_queries(url)), 1)
+        self.assertEqual(self._auth_user_queries(url), [])
+
+    def test_password_change_invalidates_cache(self):
+        """После смены пароля старый снимок не используется."""
+        self.client.get(reverse('posts:post_create'))
+        response = self.client.post(reverse('users:password_change_form'), {
+            'old_password': 'old-password-123',
+            'new_password1': 'new-password-456',
+            'new_password2': 'new-password-456',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(self._auth_user_queries(
+            reverse('posts:post_create'))), 1)
+
+    def test_session_hash_is_verified(self):
+        """Сессия с устаревшим хешем пароля разлогинивается."""
+        self.client.get(reverse('posts:post_create'))
+        self.user.set_password('changed-elsewhere-789')
+        self.user.save()
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_password_hash_is_not_cached(self):
+        """В снимке нет хеша пароля, и сохранение снимка его не
+        затирает."""
+        self.client.get(reverse('posts:post_create'))
+        snapshot = cache.get(auth.USER_CACHE_KEY.format(self.user.pk))
+        self.assertNotIn('password', snapshot['fields'])
+        user = auth.CachedModelBackend().get_user(self.user.pk)
+        user.first_name = 'Имя'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('old-password-123'))
+
+    def test_local_cache_is_not_used(self):
+        """С кешем одного процесса пользователь читается из БД."""
+        self.shared.return_value = False
+        url = reverse('posts:post_create')
+        self.assertEqual(len(self._auth_user_queries(url)), 1)
+        self.assertEqual(len(self._auth_user_queries(url)), 1)
@@ -0,0 +1,57 @@
+import gc
+import os
+import sys
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import importtime, preload
+
+# Модули, которые должны загружаться при первом использовании,
+# а не при django.setup().
+DEFERRED = (
+    'PIL', 'bleach', 'markdown', 'posts.admin', 'posts.markup',
+    'posts.views',
+)
+
+
+class ImportTimeTests(SimpleTestCase):
+    def test_parse(self):
+        rows = importtime.parse(
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       10 |         10 |   posts.markup\n'
+            'import time:        5 |         15 | posts.models\n'
+        )
+        self.assertEqual(rows, [
+            ('posts.markup', 10, 10, 1),
+            ('posts.models', 5, 15, 0),
+        ])
+        self.assertEqual(importtime.total_us(rows), 15)
+
+    def test_setup_defers_heavy_imports(self):
+        """Профиль старта сохраняется в YATUBE_IMPORT_PROFILE, если
+        переменная задана (артефакт CI)."""
+        rows = importtime.profile()
+        artifact = os.environ.get('YATUBE_IMPORT_PROFILE')
+        if artifact:
+            with open(artifact, 'w') as file:
+                file.write(importtime.report(rows))
+        self.assertIn('posts.signals', {row[0] for row in rows})
+        modules = importtime.loaded_modules()
+        self.assertIn('posts.models', modules)
+        for module in DEFERRED:
+            with self.subTest(module=module):
+                self.assertNotIn(module, modules)
+
+
+class PreloadTests(SimpleTestCase):
+    def test_preload_imports_deferred_modules(self):
+        with mock.patch('core.preload.connections') as connections:
+            try:
+                preload.preload()
+                self.assertGreater(gc.get_freeze_count(), 0)
+            finally:
+                gc.unfreeze()
+        connections.close_all.assert_called_once()
+        self.assertIn('posts.markup', sys.modules)
+        self.assertIn('PIL.Image', sys.modules)
@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import feed_cache
+from posts.models import Group, GroupStats, Post, User
+from ..paginator import CountingStrategy, FeedPaginator, table_estimate
+from ..templatetags.pagination import elided_page_range
+
+
+class CountingStrategyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        for index in range(5):
+            Post.objects.create(text=f'Пост {index}', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_exact_below_limit(self):
+        strategy = CountingStrategy(exact_limit=10, estimate=lambda: 1000)
+        self.assertEqual(strategy.count(Post.objects.all()), 5)
+
+    def test_estimate_above_limit(self):
+        strategy = CountingStrategy(
+            exact_limit=3, estimate=lambda: 1000, cache_key='count')
+        self.assertEqual(strategy.count(Post.objects.all()), 1000)
+        with self.assertNumQueries(0):
+            self.assertEqual(strategy.count(Post.objects.all()), 1000)
+
+    def test_estimate_is_not_below_counted_rows(self):
+        strategy = CountingStrategy(exact_limit=3, estimate=lambda: 1)
+        self.assertEqual(strategy.count(Post.objects.all()), 4)
+
+    def test_exact_count_without_estimate(self):
+        strategy = CountingStrategy(exact_limit=3)
+        paginator = FeedPaginator(Post.objects.all(), 2, strategy)
+        self.assertEqual(paginator.count, 5)
+        self.assertEqual(paginator.num_pages, 3)
+
+    def test_overestimate_sends_to_last_page(self):
+        """Удаленные посты выше exact_limit: страницы за концом ленты
+        ведут на последнюю настоящую."""
+        for index in range(10):
+            Post.objects.create(text=f'Еще {index}', author=self.author)
+        oldest = Post.objects.order_by('pk').values_list('pk', flat=True)
+        Post.objects.filter(pk__in=list(oldest[:6])).soft_delete()
+        strategy = CountingStrategy(
+            exact_limit=3, estimate=lambda: table_estimate(Post),
+            cache_key='count')
+        paginator = FeedPaginator(Post.objects.order_by('pk'), 2, strategy)
+        self.assertGreater(paginator.count, 9)
+        page_obj = paginator.get_page(paginator.num_pages)
+        self.assertEqual(paginator.count, 9)
+        self.assertEqual(page_obj.number, 5)
+        self.assertEqual(len(page_obj.object_list), 1)
+        self.assertEqual(cache.get('count'), 9)
+
+    def test_group_feed_uses_group_stats(self):
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.update(group=group)
+        GroupStats.objects.update_or_create(
+            group=group, defaults={'post_count': 500})
+        strategy = feed_cache.group_counting('group')
+        strategy.exact_limit = 3
+        self.assertEqual(strategy.count(group.posts.all()), 500)
+
+    def test_feeds_use_feed_paginator(self):
+        response = self.client.get(reverse('posts:index'))
+        paginator = response.context['page_obj'].paginator
+        self.assertIsInstance(paginator, FeedPaginator)
+        self.assertEqual(paginator.count, 5)
+
+
+class ElidedPageRangeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        for index in range(3):
+            Post.objects.create(text=f'Пост {index}', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, total, number):
+        strategy = CountingStrategy(exact_limit=1, estimate=lambda: total)
+        paginator = FeedPaginator(Post.objects.all(), 1, strategy)
+        return render_to_string(
+            'posts/includes/paginator.html',
+            {'page_obj': paginator.page(number)}
+        )
+
+    def test_window_around_current_page(self):
+        html = self.render(100, 50)
+        for number in (1, 48, 49, 50, 51, 52, 100):
+            self.assertIn(f'>{number}<', html)
+        self.assertNotIn('>47<', html)
+        self.assertEqual(html.count(str(Paginator.ELLIPSIS)), 2)
+
+    def test_size_does_not_depend_on_page_count(self):
+        sizes = {
+            self.render(total, 500).count('<li')
+            for total in (1000, 10 ** 4, 10 ** 6)
+        }
+        self.assertEqual(len(sizes), 1)
+
+    def test_plain_paginator(self):
+        page_obj = Paginator(range(1000), 10).page(50)
+        self.assertEqual(len(elided_page_range(page_obj)), 9)
+
+    def test_feeds_render_elided_range(self):
+        for index in range(130):
+            Post.objects.create(text=f'Еще {index}', author=self.author)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.author.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, {'page': 7})
+                self.assertContains(response, str(Paginator.ELLIPSIS))
@@ -0,0 +1,208 @@
+import asyncio
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from posts.events import ROUTES, publish_comment
+from posts.models import Comment, Post
+from ..pubsub import InProcessBroker, SocketBroker, serve_broker
+from ..sse import EventStreamApplication
+
+User = get_user_model()
+
+
+async def _next(subscription):
+    return await asyncio.wait_for(subscription.get(), timeout=2)
+
+
+class InProcessBrokerTests(SimpleTestCase):
+    def test_publish_reaches_subscribers_of_channel(self):
+        broker = InProcessBroker()
+
+        async def scenario():
+            subscription = await broker.subscribe('posts')
+            other = await broker.subscribe('post:1')
+            broker.publish('posts', {'post_id': 1})
+            self.assertEqual(await _next(subscription), {'post_id': 1})
+            self.assertTrue(other.queue.empty())
+            await subscription.close()
+            await other.close()
+
+        asyncio.run(scenario())
+        self.assertFalse(broker._subscribers['posts'])
+
+
+class SocketBrokerTests(SimpleTestCase):
+    def test_publish_through_broker_process(self):
+        async def scenario():
+            server = await serve_broker('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            broker = SocketBroker(port=port)
+            subscription = await broker.subscribe('posts')
+            # Подписка регистрируется на сервере асинхронно.
+            await asyncio.sleep(0.1)
+            broker.publish('posts', {'post_id': 7})
+            message = await _next(subscription)
+            await subscription.close()
+            broker.close()
+            broker._writer.close()
+            # Даем серверу обработать отключение подписчика.
+            await asyncio.sleep(0.05)
+            server.close()
+            await server.wait_closed()
+            return message
+
+        self.assertEqual(asyncio.run(scenario()), {'post_id': 7})
+
+    def test_subscriptions_share_one_connection(self):
+        async def scenario():
+            server = await serve_broker('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            broker = SocketBroker(port=port)
+            with mock.patch(
+                    'asyncio.open_connection',
+                    wraps=asyncio.open_connection) as open_connection:
+                posts = await broker.subscribe('posts')
+                comments = await broker.subscribe('post:1')
+                other = await broker.subscribe('posts')
+            await other.close()
+            await asyncio.sleep(0.1)
+            broker.publish('post:1', {'comment_id': 3})
+            broker.publish('posts', {'post_id': 7})
+            messages = [await _next(comments), await _next(posts)]
+            self.assertTrue(other.queue.empty())
+            await posts.close()
+            await comments.close()
+            self.assertEqual(dict(broker._subscribers), {})
+            broker.close()
+            broker._writer.close()
+            await asyncio.sleep(0.05)
+            server.close()
+            await server.wait_closed()
+            return open_connection.call_count, messages
+
+        self.assertEqual(
+            asyncio.run(scenario()),
+            (1, [{'comment_id': 3}, {'post_id': 7}])
+        )
+
+    def test_lost_connection_fails_subscriptions(self):
+        async def scenario():
+            server = await serve_broker('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            broker = SocketBroker(port=port)
+            subscription = await broker.subscribe('posts')
+            broker._writer.transport.abort()
+            with self.assertRaises(ConnectionError):
+                await _next(subscription)
+            # Даем серверу обработать разрыв.
+            await asyncio.sleep(0.05)
+            server.close()
+            await server.wait_closed()
+
+        asyncio.run(scenario())
+
+    def test_publish_connection_has_timeout(self):
+        broker = SocketBroker(port=1, timeout=2)
+        with mock.patch('socket.create_connection') as create_connection:
+            broker.publish('posts', {'post_id': 1})
+        create_connection.assert_called_once_with(('127.0.0.1', 1), 2)
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.broker = InProcessBroker()
+        patcher = mock.patch('core.pubsub._broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.user, text='Текст')
+
+    def stream(self, path, query=b'', publish=None):
+        """Открывает поток, вызывает publish и возвращает тело ответа."""
+        async def fallback(scope, receive, send):
+            raise AssertionError('request passed to Django')
+
+        app = EventStreamApplication(fallback, ROUTES)
+        sent = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        async def scenario():
+            scope = {
+                'type': 'http', 'method': 'GET',
+                'path': path, 'query_string': query,
+            }
+            task = asyncio.ensure_future(app(scope, receive, send))
+            while len(sent) < 2:
+                await asyncio.sleep(0.01)
+            publish()
+            await asyncio.sleep(0.05)
+            disconnected.set()
+            await asyncio.wait_for(task, timeout=2)
+
+        asyncio.run(scenario())
+        self.assertEqual(sent[0]['status'], 200)
+        return b''.join(message.get('body', b'') for message in sent[1:])
+
+    def test_feed_stream_filters_by_author(self):
+        other = User.objects.create_user(username='other')
+
+        def publish():
+            self.broker.publish('posts', {'post_id': 1, 'author_id': other.pk})
+            self.broker.publish('posts', {'post_id': 2, 'author_id': 5})
+
+        body = self.stream(
+            '/events/feed/', f'authors={other.pk}'.encode(), publish)
+        self.assertIn(b'"post_id": 1', body)
+        self.assertNotIn(b'"post_id": 2', body)
+
+    def test_comment_stream(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Привет')
+        body = self.stream(
+            f'/events/posts/{self.post.pk}/',
+            publish=lambda: publish_comment(comment)
+        )
+        self.assertIn(b'event: comment', body)
+        self.assertIn(b'"author": "author"', body)
+
+    def test_unavailable_broker_refuses_stream(self):
+        async def fallback(scope, receive, send):
+            raise AssertionError('request passed to Django')
+
+        async def receive():
+            return {'type': 'http.disconnect'}
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http', 'method': 'GET',
+            'path': '/events/feed/', 'query_string': b'',
+        }
+        app = EventStreamApplication(fallback, ROUTES)
+        with mock.patch.object(
+                self.broker, 'subscribe', side_effect=ConnectionError), \
+                self.assertLogs('core.sse', 'WARNING'):
+            asyncio.run(app(scope, receive, send))
+        self.assertEqual(sent[0]['status'], 503)
+        self.assertEqual(sent[-1], {'type': 'http.response.body', 'body': b''})
+
+    def test_add_comment_publishes_event(self):
+        self.client.force_login(self.user)
+        with mock.patch.object(self.broker, 'publish') as publish:
+            self.client.post(
+                f'/posts/{self.post.pk}/comment/', {'text': 'Привет'})
+        channel, message = publish.call_args[0]
+        self.assertEqual(channel, f'post:{self.post.pk}')
+        self.assertEqual(message['author'], 'author')
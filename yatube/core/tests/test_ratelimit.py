@@ -0,0 +1,96 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseRedirect
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from ..ratelimit import METRICS, hit, parse_rate, ratelimit
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('100/5m'), (100, 300))
+        self.assertEqual(parse_rate('5/h'), (5, 3600))
+
+    def test_sliding_window(self):
+        """Лимит учитывает остаток предыдущего окна."""
+        for _ in range(3):
+            self.assertEqual(hit('test', 'k', '3/m', now=60), 0)
+        self.assertGreater(hit('test', 'k', '3/m', now=61), 0)
+        # Через полокна от предыдущего окна учитывается половина.
+        self.assertEqual(hit('test', 'k', '3/m', now=150), 0)
+        self.assertEqual(hit('test', 'k', '3/m', now=150), 0)
+        self.assertGreater(hit('test', 'k', '3/m', now=150), 0)
+        self.assertEqual(hit('test', 'k', '3/m', now=180), 0)
+
+    @override_settings(RATELIMITS={'post_create': '2/m'})
+    def test_post_create_returns_429(self):
+        """Превышение лимита на создание поста дает 429."""
+        user = User.objects.create_user(username='bot')
+        client = Client()
+        client.force_login(user)
+        url = reverse('posts:post_create')
+        blocked = METRICS['post_create', 'blocked']
+        for _ in range(2):
+            client.post(url, {'text': 'спам'})
+        with self.assertLogs('core.ratelimit', 'INFO'):
+            response = client.post(url, {'text': 'спам'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.has_header('Retry-After'))
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(METRICS['post_create', 'blocked'], blocked + 1)
+        self.assertEqual(client.get(url).status_code, 200)
+
+    @override_settings(RATELIMITS={'post_create': '2/m'})
+    def test_invalid_submissions_are_not_counted(self):
+        """Форма с ошибками не тратит попытки."""
+        user = User.objects.create_user(username='author')
+        client = Client()
+        client.force_login(user)
+        url = reverse('posts:post_create')
+        for _ in range(3):
+            self.assertEqual(client.post(url, {'text': ''}).status_code, 200)
+        for _ in range(2):
+            self.assertEqual(
+                client.post(url, {'text': 'Пост'}).status_code, 302)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_parallel_requests_cannot_all_pass(self):
+        """Место занимается до выполнения представления: запрос,
+        пришедший, пока первый еще пишет, уже упирается в лимит."""
+        responses = []
+
+        @ratelimit('race', '1/m')
+        def view(request):
+            if not responses:
+                responses.append(view(request))
+            return HttpResponseRedirect('/')
+
+        request = RequestFactory().post('/')
+        request.user = AnonymousUser()
+        self.assertEqual(view(request).status_code, 302)
+        self.assertEqual(responses[0].status_code, 429)
+
+    def test_failed_request_returns_slot(self):
+        @ratelimit('race', '1/m')
+        def view(request):
+            return HttpResponse()
+
+        request = RequestFactory().post('/')
+        request.user = AnonymousUser()
+        for _ in range(3):
+            self.assertEqual(view(request).status_code, 200)
+
+    def test_check_is_cheap(self):
+        """Проверка лимита занимает меньше миллисекунды."""
+        started = time.perf_counter()
+        for i in range(1000):
+            hit('bench', f'ip:{i % 50}', '1000/m')
+        self.assertLess((time.perf_counter() - started) / 1000, 0.001)
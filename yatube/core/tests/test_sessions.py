@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import User
+from ..cache import is_shared
+
+CACHED_DB = 'django.contrib.sessions.backends.cached_db'
+# Два воркера со своими кешами в одном процессе: locmem с разными
+# LOCATION не делят данные.
+WORKERS = {
+    'default': settings.CACHES['default'],
+    'sessions': settings.CACHES['sessions'],
+    'worker_a': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'worker_a',
+    },
+    'worker_b': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'worker_b',
+    },
+}
+
+
+class SessionEngineTests(TestCase):
+    @override_settings(SESSION_ENGINE=CACHED_DB)
+    def test_authenticated_request_skips_session_table(self):
+        """С общим кешем сессия авторизованного пользователя читается
+        из кеша."""
+        client = Client()
+        client.force_login(User.objects.create_user(username='user'))
+        client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(queries)
+        self.assertFalse(any(
+            'django_session' in query['sql'] for query in queries))
+
+    def test_local_cache_keeps_sessions_in_db(self):
+        self.assertFalse(is_shared('sessions'))
+        self.assertEqual(
+            settings.SESSION_ENGINE, 'django.contrib.sessions.backends.db')
+        self.assertTrue(is_shared('sessions', {'sessions': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        }}))
+
+    @override_settings(CACHES=WORKERS)
+    def test_logout_is_seen_by_other_workers(self):
+        """Выход через один воркер действует и на другом."""
+        user = User.objects.create_user(username='user')
+        client = Client()
+        client.force_login(user)
+        index = reverse('posts:index')
+        for alias in ('worker_a', 'worker_b'):
+            with override_settings(SESSION_CACHE_ALIAS=alias):
+                response = client.get(index)
+                self.assertEqual(response.context['user'], user)
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+        with override_settings(SESSION_CACHE_ALIAS='worker_a'):
+            client.post(reverse('users:logout'))
+        client.cookies[settings.SESSION_COOKIE_NAME] = cookie
+        with override_settings(SESSION_CACHE_ALIAS='worker_b'):
+            response = client.get(index)
+        self.assertFalse(response.context['user'].is_authenticated)
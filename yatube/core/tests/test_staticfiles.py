@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from ..staticfiles import (IMMUTABLE_MAX_AGE,
+                           CompressedManifestStaticFilesStorage,
+                           StaticFilesApplication)
+
+CSS = 'body { color: red; }\n' * 200
+
+
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'w') as file:
+            file.write(CSS)
+        with override_settings(
+            STATICFILES_DIRS=[cls.source], STATIC_ROOT=cls.root
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = CompressedManifestStaticFilesStorage(
+            location=cls.root).load_manifest()['css/site.css']
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def _get(self, path, **environ):
+        def fallback(environ, start_response):
+            start_response('404 Not Found', [])
+            return [b'django']
+
+        application = StaticFilesApplication(
+            fallback, root=self.root, prefix='/static/')
+        result = {}
+
+        def start_response(status, headers):
+            result['status'] = status
+            result['headers'] = dict(headers)
+
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **environ}
+        body = b''.join(application(environ, start_response))
+        return result['status'], result['headers'], body
+
+    def test_collectstatic_writes_hashed_and_compressed_copies(self):
+        """collectstatic создает файл с хешем и его сжатую копию."""
+        self.assertNotEqual(self.hashed, 'css/site.css')
+        self.assertTrue(
+            os.path.exists(os.path.join(self.root, self.hashed + '.gz')))
+
+    def test_hashed_file_is_immutable_and_compressed(self):
+        status, headers, body = self._get(
+            '/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertIn(f'max-age={IMMUTABLE_MAX_AGE}', headers['Cache-Control'])
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertLess(len(body), len(CSS))
+
+    def test_conditional_request(self):
+        _, headers, _ = self._get('/static/' + self.hashed)
+        status, _, body = self._get(
+            '/static/' + self.hashed, HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_unhashed_and_missing_files(self):
+        """Файлы без хеша кешируются ненадолго, остальное идет в Django."""
+        status, headers, _ = self._get('/static/css/site.css')
+        self.assertEqual(status, '200 OK')
+        self.assertNotIn('immutable', headers['Cache-Control'])
+        self.assertEqual(self._get('/static/../etc/passwd')[2], b'django')
+        self.assertEqual(self._get('/posts/1/')[2], b'django')
+
+    def test_critical_css_is_inlined(self):
+        response = Client().get('/about/author/')
+        self.assertContains(response, '<style>*,::after,::before')
@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from ..storage import InMemoryS3Client, ObjectStorage
+
+
+class ObjectStorageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = InMemoryS3Client(secret='secret')
+        self.storage = ObjectStorage(
+            options={
+                'BUCKET': 'test',
+                'CDN_URL': None,
+                'SIGNED_URLS': False,
+                'ENDPOINT_URL': 'http://s3.local',
+                'MULTIPART_THRESHOLD': 10,
+                'MULTIPART_CHUNK_SIZE': 4,
+            },
+            client=self.client
+        )
+
+    def test_save_and_open(self):
+        name = self.storage.save('posts/small.txt', ContentFile(b'hello'))
+        self.assertEqual(name, 'posts/small.txt')
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'hello')
+        self.assertEqual(self.client.calls.count('put_object'), 1)
+
+    def test_multipart_upload(self):
+        """Большой файл загружается частями и собирается по порядку."""
+        data = bytes(range(30))
+        name = self.storage.save('posts/big.bin', ContentFile(data))
+        self.assertEqual(self.client.calls.count('upload_part'), 8)
+        self.assertIn('complete_multipart_upload', self.client.calls)
+        self.assertEqual(self.storage.open(name).read(), data)
+
+    def test_metadata_is_cached(self):
+        """exists/size после сохранения не делают HEAD."""
+        name = self.storage.save('posts/a.txt', ContentFile(b'abc'))
+        self.client.calls.clear()
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.size(name), 3)
+        self.assertFalse(self.storage.exists('posts/missing.txt'))
+        self.assertFalse(self.storage.exists('posts/missing.txt'))
+        self.assertEqual(self.client.calls, ['head_object'])
+
+    def test_delete_and_listdir(self):
+        self.storage.save('posts/a.txt', ContentFile(b'a'))
+        self.storage.save('posts/cache/b.txt', ContentFile(b'b'))
+        self.assertEqual(
+            self.storage.listdir('posts'), (['cache'], ['a.txt']))
+        self.storage.delete('posts/a.txt')
+        self.assertFalse(self.storage.exists('posts/a.txt'))
+        self.assertEqual(self.storage.listdir('posts'), (['cache'], []))
+
+    def test_urls(self):
+        self.assertEqual(
+            self.storage.url('posts/a b.gif'),
+            'http://s3.local/test/posts/a%20b.gif'
+        )
+        self.storage.options['SIGNED_URLS'] = True
+        self.assertRegex(
+            self.storage.url('posts/a.gif'),
+            r'^/test/posts/a\.gif\?Expires=\d+&Signature=[0-9a-f]{64}$'
+        )
+        self.storage.options['CDN_URL'] = 'https://cdn.example.com/'
+        self.assertEqual(
+            self.storage.url('posts/a.gif'),
+            'https://cdn.example.com/posts/a.gif'
+        )
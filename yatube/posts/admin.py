@@ -1,17 +1,167 @@
-from django.contrib import admin
+import re
 
-from .models import Group, Post, Comment, Follow
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 
+from core.paginator import EstimatedCountPaginator
 
-class PostAdmin(admin.ModelAdmin):
+from . import moderation, revisions
+from .models import Group, Post, PostRevision, Comment, Follow, User
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Базовый класс для списков на миллионы строк.
+
+    Не выполняет полный COUNT без фильтров и считает выборку
+    с ограничением через EstimatedCountPaginator.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        help_text='Для переноса постов; пусто - убрать из группы'
+    )
+
+
+class CommentActionForm(ActionForm):
+    pattern = forms.CharField(
+        required=False,
+        label='Регулярное выражение',
+        help_text='Для чистки комментариев'
+    )
+
+
+def _action_data(modeladmin, request):
+    """cleaned_data формы действия (action_form) или None, если поля
+    не прошли проверку: об ошибках сообщается пользователю.
+
+    Django проверяет эту форму перед вызовом действия, но в само
+    действие передает только выборку."""
+    form = modeladmin.action_form(request.POST, auto_id=None)
+    form.fields['action'].choices = modeladmin.get_action_choices(request)
+    if form.is_valid():
+        return form.cleaned_data
+    for errors in form.errors.values():
+        for error in errors:
+            modeladmin.message_user(request, error, messages.ERROR)
+    return None
+
+
+@admin.action(description='Удалить все посты и комментарии авторов')
+def delete_authors_content(modeladmin, request, queryset):
+    total = 0
+    for user in User.objects.filter(
+            pk__in=queryset.values('author').distinct()):
+        total += moderation.delete_user_content(user)
+    modeladmin.message_user(request, f'Удалено записей: {total}')
+
+
+@admin.action(description='Перенести посты в выбранную группу')
+def move_to_group(modeladmin, request, queryset):
+    data = _action_data(modeladmin, request)
+    if data is None:
+        return
+    total = moderation.move_posts(queryset, data['group'])
+    modeladmin.message_user(request, f'Перенесено постов: {total}')
+
+
+@admin.action(
+    description='Удалить выбранные комментарии по регулярному выражению')
+def purge_matching_comments(modeladmin, request, queryset):
+    data = _action_data(modeladmin, request)
+    if data is None:
+        return
+    if not data['pattern']:
+        modeladmin.message_user(
+            request, 'Укажите регулярное выражение', messages.ERROR)
+        return
+    try:
+        re.compile(data['pattern'])
+    except re.error as error:
+        modeladmin.message_user(
+            request, f'Неверное регулярное выражение: {error}',
+            messages.ERROR)
+        return
+    total = moderation.purge_comments(data['pattern'], queryset)
+    modeladmin.message_user(request, f'Удалено комментариев: {total}')
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+class PostRevisionInline(admin.TabularInline):
+    """Версии поста с восстановленным текстом (posts.revisions)."""
+    model = PostRevision
+    fields = ('number', 'created', 'editor', 'is_snapshot', 'text')
+    readonly_fields = fields
+    ordering = ('-number',)
+    extra = 0
+    can_delete = False
+    show_change_link = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('editor', 'post')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Текст версии')
+    def text(self, revision):
+        # Экземпляр создается на запрос: все версии поста
+        # восстанавливаются один раз, а не заново для каждой строки.
+        if getattr(self, '_texts_post_id', None) != revision.post_id:
+            self._texts = revisions.texts(revision.post)
+            self._texts_post_id = revision.post_id
+        return self._texts[revision.number]
+
+
+class PostAdmin(ScalableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
-    list_editable = ("group",)
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
+    date_hierarchy = 'pub_date'
+    empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = (delete_authors_content, move_to_group)
+    inlines = (PostRevisionInline,)
+
+    def save_model(self, request, obj, form, change):
+        if change and 'text' in form.changed_data:
+            revisions.record(
+                obj, form.initial['text'], obj.text, request.user)
+        super().save_model(request, obj, form, change)
+
+
+class CommentAdmin(ScalableAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    search_fields = ('text',)
+    raw_id_fields = ('author', 'post', 'parent')
+    date_hierarchy = 'created'
     empty_value_display = '-пусто-'
+    action_form = CommentActionForm
+    actions = (delete_authors_content, purge_matching_comments)
+
+
+class FollowAdmin(ScalableAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    raw_id_fields = ('user', 'author')
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,79 @@
+"""Перенос старых постов в архивные таблицы.
+
+archive_posts() переносит посты старше заданной даты вместе с
+комментариями в ArchivedPost/ArchivedComment и удаляет их из горячих
+таблиц пачками (posts.bulk), как массовая модерация. История правок
+(PostRevision) остается на месте: pk архивного поста тот же. Ленты читают
+только горячие таблицы; профиль и страница поста обращаются к архиву
+по запросу.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from . import group_stats, trends
+from .bulk import CHUNK_SIZE, delete_pks, run
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Post, PostRevision
+)
+
+
+def months_ago(months, now=None):
+    now = now or timezone.now()
+    year, month = divmod(now.month - 1 - months, 12)
+    return now.replace(
+        year=now.year + year, month=month + 1, day=min(now.day, 28))
+
+
+def _archive_chunk(pks):
+    posts = Post.all_objects.filter(pk__in=pks)
+    ArchivedPost.objects.bulk_create([
+        ArchivedPost(
+            id=post.pk,
+            text=post.text,
+            text_html=post.text_html,
+            pub_date=post.pub_date,
+            author_id=post.author_id,
+            group_id=post.group_id,
+            image=post.image.name,
+            deleted_at=post.deleted_at,
+        )
+        for post in posts
+    ])
+    comments = Comment.all_objects.filter(post_id__in=pks).order_by('pk')
+    ArchivedComment.objects.bulk_create([
+        ArchivedComment(
+            id=comment.pk,
+            post_id=comment.post_id,
+            author_id=comment.author_id,
+            parent_id=comment.parent_id,
+            text=comment.text,
+            text_html=comment.text_html,
+            created=comment.created,
+            path=comment.path,
+            depth=comment.depth,
+            deleted_at=comment.deleted_at,
+        )
+        for comment in comments.iterator()
+    ])
+    delete_pks(Post, pks, keep=(PostRevision,))
+
+
+def archive_posts(before=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Архивирует посты, опубликованные раньше before.
+
+    По умолчанию - старше ARCHIVE_AFTER_MONTHS месяцев. Возвращает
+    число перенесенных постов.
+    """
+    if before is None:
+        before = months_ago(settings.ARCHIVE_AFTER_MONTHS)
+    queryset = Post.all_objects.filter(pub_date__lt=before)
+    groups = set(
+        queryset.filter(group__isnull=False).order_by()
+        .values_list('group_id', flat=True).distinct()
+    )
+    total = run(queryset, _archive_chunk, chunk_size, progress)
+    if groups:
+        group_stats.recompute(groups)
+    if total:
+        trends.invalidate()
+    return total
@@ -0,0 +1,133 @@
+"""Асинхронные варианты ленточных представлений для ASGI.
+
+Независимые запросы каждой страницы выполняются одновременно через
+core.concurrency.gather_queries, поэтому медленный запрос не держит
+воркер. URL-адреса и шаблоны совпадают с posts.views.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import render
+
+from core.concurrency import gather_queries
+from core.paginator import FeedPaginator
+
+from . import feed_cache, views
+from .feed_cache import feed_version
+from .follow_graph import FollowGraph
+from .forms import CommentForm
+from .models import Comment, Group, Post, User
+from .rows import feed_rows
+from .views import NUMBER_OF_POSTS, SELECT_LIMIT
+
+
+async def _load_user(request):
+    """Загружает ленивый request.user в синхронном потоке."""
+    await sync_to_async(lambda: request.user.is_authenticated)()
+
+
+def _page_number(request):
+    try:
+        return max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        return 1
+
+
+def _first(queryset):
+    obj = queryset.first()
+    if obj is None:
+        raise Http404(
+            f'No {queryset.model._meta.object_name} matches the given query.'
+        )
+    return obj
+
+
+async def _paginate(request, queryset, per_page, strategy, *queries):
+    """Считает записи и выбирает строки страницы одновременно.
+
+    Смещение берется из запрошенного номера страницы. Если страница
+    оказалась за пределами ленты, ее подбирает Paginator.get_page,
+    как в синхронных представлениях. Дополнительные запросы из
+    queries выполняются вместе с выборкой страницы.
+    """
+    paginator = FeedPaginator(queryset, per_page, strategy, feed_rows)
+    number = _page_number(request)
+    bottom = (number - 1) * per_page
+    count, rows, *extra = await gather_queries(
+        lambda: paginator.count,
+        lambda: list(feed_rows(queryset[bottom:bottom + per_page])),
+        *queries
+    )
+    if rows or number == 1:
+        page_obj = paginator.page(number)
+        page_obj.object_list = rows
+    else:
+        page_obj = await sync_to_async(paginator.get_page)(number)
+    return page_obj, extra
+
+
+async def index(request):
+    posts = Post.objects.all()
+    page_obj, (version,) = await _paginate(
+        request, posts, NUMBER_OF_POSTS, feed_cache.index_counting(),
+        feed_version
+    )
+    return await sync_to_async(render)(request, 'posts/index.html', {
+        'page_obj': page_obj,
+        'feed_version': version,
+    })
+
+
+async def group_list(request, slug):
+    posts = Post.objects.filter(group__slug=slug)
+    page_obj, (group,) = await _paginate(
+        request, posts, NUMBER_OF_POSTS, feed_cache.group_counting(slug),
+        lambda: _first(Group.objects.filter(slug=slug))
+    )
+    return await sync_to_async(render)(request, 'posts/group_list.html', {
+        'group': group,
+        'page_obj': page_obj,
+    })
+
+
+async def profile(request, username):
+    if 'archive' in request.GET:
+        # Архив читается редко, отдельная ветка не нужна.
+        return await sync_to_async(views.profile)(request, username)
+    await _load_user(request)
+    posts = Post.objects.filter(author__username=username)
+    page_obj, (author, following_ids) = await _paginate(
+        request, posts, SELECT_LIMIT, feed_cache.profile_counting(username),
+        lambda: _first(User.objects.filter(username=username)),
+        lambda: FollowGraph.for_request(request).following_ids
+    )
+    has_archive = not page_obj.has_next() and await sync_to_async(
+        author.archived_posts.exists)()
+    return await sync_to_async(render)(request, 'posts/profile.html', {
+        'author': author,
+        'page_obj': page_obj,
+        'following': author.pk in following_ids,
+        'has_archive': has_archive,
+    })
+
+
+async def post_detail(request, post_id):
+    try:
+        post, post_count, comments = await gather_queries(
+            lambda: _first(
+                Post.objects.filter(id=post_id).select_related(
+                    'author', 'group')
+            ),
+            lambda: Post.objects.filter(author__posts__id=post_id).count(),
+            lambda: list(
+                Comment.objects.thread(post_id).select_related('author')
+            )
+        )
+    except Http404:
+        return await sync_to_async(views.archived_post_detail)(
+            request, post_id)
+    return await sync_to_async(render)(request, 'posts/post_detail.html', {
+        'post': post,
+        'post_count': post_count,
+        'form': CommentForm(request.POST or None),
+        'comments': comments
+    })
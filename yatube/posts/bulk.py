@@ -0,0 +1,70 @@
+"""Пакетная обработка больших выборок по pk.
+
+Общая часть массовой модерации (posts.moderation) и архивации
+(posts.archive): выборка обходится пачками по возрастанию pk, каждая
+пачка обрабатывается в своей транзакции. delete_pks() удаляет строки
+мимо Collector: зависимые строки удаляются (или обнуляются при
+SET_NULL) одним запросом на связь и пачку, сигналы моделей не
+отправляются.
+"""
+from django.db import models, transaction
+
+from .feed_cache import bump_feed_version
+
+CHUNK_SIZE = 1000
+
+
+def pk_chunks(queryset, chunk_size=CHUNK_SIZE):
+    """Списки pk выборки по chunk_size, keyset по pk."""
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(
+            pk__gt=last_pk)
+        pks = list(chunk[:chunk_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def delete_pks(model, pks, keep=()):
+    """Удаляет строки model с pks вместе с зависимыми строками.
+
+    Строки моделей из keep не трогаются; их ключ на model должен быть
+    без ограничения в БД (db_constraint=False).
+    """
+    for relation in model._meta.related_objects:
+        if not relation.one_to_many and not relation.one_to_one:
+            continue
+        if relation.related_model in keep:
+            continue
+        related = relation.related_model._base_manager.filter(
+            **{f'{relation.field.name}__in': pks})
+        on_delete = relation.field.remote_field.on_delete
+        if on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        elif on_delete is models.CASCADE:
+            related_pks = list(related.values_list('pk', flat=True))
+            if related_pks:
+                delete_pks(relation.related_model, related_pks)
+    queryset = model._base_manager.filter(pk__in=pks)
+    queryset._raw_delete(queryset.db)
+
+
+def run(queryset, operation, chunk_size=CHUNK_SIZE, progress=None):
+    """Вызывает operation(pks) для каждой пачки выборки в транзакции.
+
+    progress(done) получает число обработанных строк после пачки. Если
+    что-то обработано, кеши лент сбрасываются. Возвращает число строк.
+    """
+    done = 0
+    for pks in pk_chunks(queryset, chunk_size):
+        with transaction.atomic():
+            operation(pks)
+        done += len(pks)
+        if progress is not None:
+            progress(done)
+    if done:
+        bump_feed_version()
+    return done
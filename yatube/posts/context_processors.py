@@ -0,0 +1,13 @@
+from functools import partial
+
+from .notifications import unread_count
+
+
+def notifications(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    # Шаблон вызывает функцию только там, где выводит счетчик.
+    return {
+        'unread_notifications': partial(unread_count, user)
+    }
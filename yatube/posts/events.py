@@ -0,0 +1,59 @@
+"""События лент для core.sse: новые посты и комментарии."""
+import logging
+import re
+
+from core.pubsub import get_broker
+
+logger = logging.getLogger(__name__)
+
+POSTS_CHANNEL = 'posts'
+COMMENTS_CHANNEL = 'post:{}'
+
+
+def _publish(channel, message):
+    """Недоступный брокер не должен ломать создание поста."""
+    try:
+        get_broker().publish(channel, message)
+    except OSError:
+        logger.warning('pubsub broker unavailable, %s not published', channel)
+
+
+def publish_post(post):
+    _publish(POSTS_CHANNEL, {
+        'post_id': post.pk,
+        'author_id': post.author_id,
+    })
+
+
+def publish_comment(comment):
+    _publish(COMMENTS_CHANNEL.format(comment.post_id), {
+        'comment_id': comment.pk,
+        'author': comment.author.username,
+    })
+
+
+def feed_stream(match, query):
+    """Новые посты; ?authors=1,2 - только посты этих авторов."""
+    authors = {
+        int(author_id)
+        for value in query.get('authors', [])
+        for author_id in value.split(',') if author_id.isdigit()
+    }
+
+    def event_filter(message):
+        if authors and message['author_id'] not in authors:
+            return None
+        return 'post', message
+
+    return [POSTS_CHANNEL], event_filter
+
+
+def comments_stream(match, query):
+    channel = COMMENTS_CHANNEL.format(match['post_id'])
+    return [channel], lambda message: ('comment', message)
+
+
+ROUTES = [
+    (re.compile(r'^/events/feed/$'), feed_stream),
+    (re.compile(r'^/events/posts/(?P<post_id>\d+)/$'), comments_stream),
+]
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+
+from core.paginator import CountingStrategy, table_estimate
+
+from .models import GroupStats, Post
+
+FEED_VERSION_KEY = 'posts:feed_version'
+
+
+def feed_version():
+    """Номер поколения кеша лент, входит в ключ фрагмента index."""
+    return cache.get_or_set(FEED_VERSION_KEY, 1, None)
+
+
+def bump_feed_version():
+    """Делает устаревшими все закешированные фрагменты лент."""
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.set(FEED_VERSION_KEY, 2, None)
+
+
+FEED_COUNT_KEY = 'posts:feed_count:{}'
+
+
+def index_counting():
+    """Главная лента: оценка по всей таблице постов."""
+    return CountingStrategy(
+        estimate=lambda: table_estimate(Post),
+        cache_key=FEED_COUNT_KEY.format('index'),
+    )
+
+
+def group_counting(slug):
+    """Лента группы: счетчик из GroupStats."""
+    return CountingStrategy(
+        estimate=lambda: GroupStats.objects.filter(
+            group__slug=slug).values_list('post_count', flat=True).first(),
+        cache_key=FEED_COUNT_KEY.format(f'group:{slug}'),
+    )
+
+
+def profile_counting(username):
+    return CountingStrategy(
+        cache_key=FEED_COUNT_KEY.format(f'profile:{username}'))
+
+
+def follow_counting(user_id):
+    return CountingStrategy(
+        cache_key=FEED_COUNT_KEY.format(f'follow:{user_id}'))
@@ -0,0 +1,89 @@
+"""Граф подписок с пакетной проверкой и рекомендациями.
+
+Множество id авторов, на которых подписан пользователь, читается
+одним запросом и кешируется; сохранение и удаление Follow (в
+представлениях, в админке, каскадом) сбрасывают его через signals.
+Рекомендации "на кого подписаться" - авторы, на которых подписаны
+те, на кого подписан пользователь. Их заранее считает команда
+compute_follow_suggestions, а при промахе кеша они вычисляются по
+запросу.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils.functional import cached_property
+
+from .models import Follow
+
+FOLLOWING_KEY = 'follow:ids:{}'
+SUGGESTIONS_KEY = 'follow:suggestions:{}'
+FOLLOWING_TIMEOUT = 60 * 60
+SUGGESTIONS_TIMEOUT = 24 * 60 * 60
+SUGGESTIONS_LIMIT = 10
+
+
+def compute_suggestions(user_id, limit=SUGGESTIONS_LIMIT):
+    """Друзья друзей, упорядоченные по числу общих подписок."""
+    following = Follow.objects.filter(user_id=user_id).values('author_id')
+    return list(
+        Follow.objects.filter(user_id__in=following)
+        .exclude(author_id__in=following)
+        .exclude(author_id=user_id)
+        .values('author_id')
+        .annotate(mutual=Count('id'))
+        .order_by('-mutual', 'author_id')
+        .values_list('author_id', flat=True)[:limit]
+    )
+
+
+class FollowGraph:
+    def __init__(self, user):
+        self.user = user
+
+    @classmethod
+    def for_request(cls, request):
+        """Один экземпляр на запрос."""
+        if not hasattr(request, '_follow_graph'):
+            request._follow_graph = cls(request.user)
+        return request._follow_graph
+
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete_many([
+            FOLLOWING_KEY.format(user_id),
+            SUGGESTIONS_KEY.format(user_id),
+        ])
+
+    @cached_property
+    def following_ids(self):
+        if not self.user.is_authenticated:
+            return frozenset()
+        key = FOLLOWING_KEY.format(self.user.pk)
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(
+                Follow.objects.filter(user=self.user)
+                .values_list('author_id', flat=True)
+            )
+            cache.set(key, ids, FOLLOWING_TIMEOUT)
+        return ids
+
+    def is_following(self, author_id):
+        return author_id in self.following_ids
+
+    def is_following_many(self, author_ids):
+        """{author_id: подписан ли пользователь} без запросов на автора."""
+        return {
+            author_id: author_id in self.following_ids
+            for author_id in author_ids
+        }
+
+    def suggestions(self, limit=SUGGESTIONS_LIMIT):
+        """id рекомендуемых авторов."""
+        if not self.user.is_authenticated:
+            return []
+        key = SUGGESTIONS_KEY.format(self.user.pk)
+        ids = cache.get(key)
+        if ids is None:
+            ids = compute_suggestions(self.user.pk)
+            cache.set(key, ids, SUGGESTIONS_TIMEOUT)
+        return ids[:limit]
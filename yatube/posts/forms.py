@@ -18,3 +18,17 @@ class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class ReplyForm(CommentForm):
+    """Комментарий с необязательным parent - ответ в ветке."""
+
+    class Meta(CommentForm.Meta):
+        fields = ('text', 'parent')
+        widgets = {'parent': forms.HiddenInput}
+
+    def __init__(self, *args, post=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if post is not None:
+            # Отвечать можно только на комментарии того же поста.
+            self.fields['parent'].queryset = post.comments.all()
@@ -0,0 +1,111 @@
+"""Счетчики групп для каталога /groups/.
+
+GroupStats хранит число постов, время последней активности (дату
+самого нового поста) и id самых активных авторов группы,
+GroupAuthorStats - число постов автора в группе. Сигналы из
+posts.signals обновляют их при создании, переносе в другую группу и
+удалении поста; массовая модерация и периодическая команда
+recompute_group_stats пересчитывают их целиком. Имена авторов
+подставляет attach_top_authors() при выводе, поэтому переименование
+пользователя не требует пересчета.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Subquery
+
+from .models import Group, GroupAuthorStats, GroupStats, Post, User
+
+TOP_AUTHORS = 3
+
+
+def _refresh_top_authors(group_id):
+    top_authors = list(
+        GroupAuthorStats.objects.filter(group_id=group_id, post_count__gt=0)
+        .order_by('-post_count', 'author_id')
+        .values_list('author_id', flat=True)[:TOP_AUTHORS]
+    )
+    GroupStats.objects.filter(group_id=group_id).update(
+        top_authors=top_authors)
+
+
+def record(group_id, author_id, delta, when=None):
+    """Учитывает delta постов author_id в группе group_id.
+
+    when - дата публикации поста. Новый пост сдвигает последнюю
+    активность вперед; если ушел самый новый пост группы, она
+    пересчитывается по оставшимся.
+    """
+    if group_id is None:
+        return
+    with transaction.atomic():
+        stats = GroupStats.objects.filter(group_id=group_id)
+        author_stats = GroupAuthorStats.objects.filter(
+            group_id=group_id, author_id=author_id)
+        if delta > 0:
+            GroupStats.objects.get_or_create(group_id=group_id)
+            GroupAuthorStats.objects.get_or_create(
+                group_id=group_id, author_id=author_id)
+        else:
+            stats = stats.filter(post_count__gte=-delta)
+            author_stats = author_stats.filter(post_count__gte=-delta)
+        stats.update(post_count=F('post_count') + delta)
+        author_stats.update(post_count=F('post_count') + delta)
+        if when is not None and delta > 0:
+            GroupStats.objects.filter(
+                Q(last_activity__isnull=True) | Q(last_activity__lt=when),
+                group_id=group_id
+            ).update(last_activity=when)
+        elif when is not None:
+            GroupStats.objects.filter(
+                group_id=group_id, last_activity__lte=when
+            ).update(last_activity=Subquery(
+                Post.objects.filter(group_id=group_id).order_by()
+                .values('group_id').annotate(last=Max('pub_date'))
+                .values('last')
+            ))
+        _refresh_top_authors(group_id)
+
+
+def attach_top_authors(groups):
+    """Подставляет group.top_authors - имена самых активных авторов из
+    GroupStats - всем группам одним запросом."""
+    groups = list(groups)
+    ids = {
+        author_id
+        for group in groups if hasattr(group, 'stats')
+        for author_id in group.stats.top_authors
+    }
+    usernames = dict(
+        User.objects.filter(pk__in=ids).values_list('pk', 'username')
+    ) if ids else {}
+    for group in groups:
+        top = group.stats.top_authors if hasattr(group, 'stats') else []
+        group.top_authors = [
+            usernames[author_id] for author_id in top
+            if author_id in usernames
+        ]
+    return groups
+
+
+def recompute(group_ids=None):
+    """Пересчитывает статистику групп по таблице постов."""
+    groups = Group.objects.all()
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+    total = 0
+    for group_id in groups.values_list('pk', flat=True).iterator():
+        posts = Post.objects.filter(group_id=group_id)
+        per_author = posts.order_by().values('author_id').annotate(
+            post_count=Count('pk'))
+        with transaction.atomic():
+            GroupAuthorStats.objects.filter(group_id=group_id).delete()
+            GroupAuthorStats.objects.bulk_create(
+                GroupAuthorStats(group_id=group_id, **row)
+                for row in per_author
+            )
+            summary = posts.aggregate(
+                post_count=Count('pk'), last_activity=Max('pub_date'))
+            GroupStats.objects.update_or_create(
+                group_id=group_id, defaults=summary)
+            _refresh_top_authors(group_id)
+        total += 1
+    return total
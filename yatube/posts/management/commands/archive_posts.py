@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import archive, moderation
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями в архивные таблицы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=settings.ARCHIVE_AFTER_MONTHS)
+        parser.add_argument(
+            '--chunk-size', type=int, default=moderation.CHUNK_SIZE)
+
+    def handle(self, *args, months, chunk_size, **options):
+        total = archive.archive_posts(
+            archive.months_ago(months),
+            chunk_size=chunk_size,
+            progress=lambda done: self.stdout.write(f'обработано {done}')
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'В архив перенесено постов: {total}'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import notifications
+
+
+class Command(BaseCommand):
+    help = 'Удаляет старые прочитанные уведомления и склеивает старые.'
+
+    def handle(self, *args, **options):
+        deleted, merged = notifications.compact()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено прочитанных: {deleted}, склеено: {merged}'))
@@ -0,0 +1,27 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from posts.follow_graph import (SUGGESTIONS_KEY, SUGGESTIONS_TIMEOUT,
+                                compute_suggestions)
+from posts.models import Follow
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рекомендации "на кого подписаться". '
+            'Запускается периодически, например из cron.')
+
+    def handle(self, *args, **options):
+        user_ids = (
+            Follow.objects.values_list('user_id', flat=True)
+            .distinct().order_by('user_id').iterator()
+        )
+        total = 0
+        for user_id in user_ids:
+            cache.set(
+                SUGGESTIONS_KEY.format(user_id),
+                compute_suggestions(user_id),
+                SUGGESTIONS_TIMEOUT
+            )
+            total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендации пересчитаны для {total} пользователей'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Обновляет карты сайта: только части с измененными постами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Перезаписать все части, например после переименований.'
+        )
+
+    def handle(self, *args, force, **options):
+        started = time.monotonic()
+        written, removed = sitemaps.generate(force=force)
+        for name in written:
+            self.stdout.write(f'записана {sitemaps.filename(name)}')
+        for name in removed:
+            self.stdout.write(f'удалена {sitemaps.filename(name)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Карты сайта: записано {len(written)}, удалено {len(removed)}, '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import moderation
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = 'Массовая модерация: удаление контента, перенос постов, чистка.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=moderation.CHUNK_SIZE)
+        actions = parser.add_subparsers(dest='action', required=True)
+        delete_user = actions.add_parser(
+            'delete-user', help='Удалить посты и комментарии пользователя')
+        delete_user.add_argument('username')
+        move = actions.add_parser(
+            'move-posts', help='Перенести посты из одной группы в другую')
+        move.add_argument('source', help='slug исходной группы')
+        move.add_argument(
+            'target', nargs='?', help='slug новой группы (без - убрать)')
+        purge = actions.add_parser(
+            'purge-comments', help='Удалить комментарии по регулярке')
+        purge.add_argument('pattern')
+
+    def _group(self, slug):
+        try:
+            return Group.objects.get(slug=slug)
+        except Group.DoesNotExist:
+            raise CommandError(f'Группа {slug} не найдена')
+
+    def _progress(self, done):
+        self.stdout.write(f'обработано {done}')
+
+    def handle(self, *args, action, chunk_size, **options):
+        kwargs = {'chunk_size': chunk_size, 'progress': self._progress}
+        if action == 'delete-user':
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["username"]} не найден')
+            total = moderation.delete_user_content(user, **kwargs)
+        elif action == 'move-posts':
+            source = self._group(options['source'])
+            target = options['target'] and self._group(options['target'])
+            total = moderation.move_posts(
+                Post.objects.filter(group=source), target or None, **kwargs)
+        else:
+            total = moderation.purge_comments(options['pattern'], **kwargs)
+        self.stdout.write(self.style.SUCCESS(f'Готово: {total}'))
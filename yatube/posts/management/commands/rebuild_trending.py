@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import trends
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг "в тренде" по постам и комментариям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+
+    def handle(self, *args, days, **options):
+        total = trends.rebuild(days)
+        self.stdout.write(self.style.SUCCESS(
+            f'В рейтинге {total} постов'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику групп для каталога /groups/.'
+
+    def handle(self, *args, **options):
+        total = group_stats.recompute()
+        self.stdout.write(self.style.SUCCESS(
+            f'Статистика пересчитана для {total} групп'))
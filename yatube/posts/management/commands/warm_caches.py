@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import warmup
+
+
+class Command(BaseCommand):
+    help = 'Прогревает кеши страниц и миниатюр после деплоя.'
+
+    def add_arguments(self, parser):
+        options = settings.WARMUP
+        parser.add_argument('--pages', type=int, default=options['PAGES'])
+        parser.add_argument('--groups', type=int, default=options['GROUPS'])
+        parser.add_argument('--posts', type=int, default=options['POSTS'])
+        parser.add_argument(
+            '--concurrency', type=int, default=options['CONCURRENCY'])
+
+    def handle(self, *args, pages, groups, posts, concurrency, **options):
+        started = time.monotonic()
+        warmed = warmup.warm(pages, groups, posts, concurrency)
+        for url, status, seconds in warmed:
+            self.stdout.write(f'{status} {seconds * 1000:.0f} мс {url}')
+        failed = sum(1 for _, status, _ in warmed if status >= 400)
+        message = (
+            f'Прогрето страниц: {len(warmed)}, с ошибкой: {failed}, '
+            f'за {time.monotonic() - started:.1f} с'
+        )
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        self.stdout.write(style(message))
@@ -0,0 +1,90 @@
+"""Markdown для постов и комментариев.
+
+HTML строится один раз при сохранении (Post.save, Comment.save) и
+хранится в text_html, шаблоны выводят его без разбора. Результат
+очищается bleach: остаются только теги из ALLOWED_TAGS, а ссылки
+получают rel="nofollow". Голые URL превращаются в ссылки, @username
+существующего пользователя - в ссылку на его профиль.
+"""
+import re
+import xml.etree.ElementTree as etree
+
+import bleach
+import markdown
+from bleach.linkifier import DEFAULT_CALLBACKS
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from markdown.inlinepatterns import InlineProcessor
+from markdown.util import AtomicString
+
+ALLOWED_TAGS = {
+    'a', 'blockquote', 'br', 'code', 'em', 'hr', 'li', 'ol', 'p', 'pre',
+    'strong', 'ul',
+}
+ALLOWED_ATTRIBUTES = {'a': ['href', 'title', 'rel']}
+ALLOWED_PROTOCOLS = {'http', 'https', 'mailto'}
+
+MENTION_PATTERN = r'(?<![\w@/])@([\w.+-]*\w)'
+MENTION_RE = re.compile(MENTION_PATTERN)
+# Начало URL в том же слове, что и @: https://medium.com/@bob - часть
+# ссылки, а не упоминание.
+URL_BEFORE_RE = re.compile(r'(?:[a-z][a-z0-9+.-]*://|www\.)\S*$', re.I)
+
+
+def existing_usernames(candidates):
+    return set(
+        get_user_model().objects.filter(username__in=candidates)
+        .values_list('username', flat=True)
+    )
+
+
+class MentionProcessor(InlineProcessor):
+    def __init__(self, usernames):
+        super().__init__(MENTION_PATTERN)
+        self.usernames = usernames
+
+    def handleMatch(self, match, data):
+        username = match.group(1)
+        if (username not in self.usernames
+                or URL_BEFORE_RE.search(data, 0, match.start(0))):
+            return None, None, None
+        link = etree.Element('a')
+        link.set('href', reverse('posts:profile', args=[username]))
+        link.text = AtomicString(f'@{username}')
+        return link, match.start(0), match.end(0)
+
+
+class MentionExtension(markdown.Extension):
+    def __init__(self, usernames):
+        super().__init__()
+        self.usernames = usernames
+
+    def extendMarkdown(self, md):
+        md.inlinePatterns.register(
+            MentionProcessor(self.usernames), 'mention', 175)
+
+
+def render(text, resolve_usernames=existing_usernames):
+    """Markdown -> очищенный HTML.
+
+    resolve_usernames(candidates) возвращает те из упомянутых имен,
+    которые принадлежат пользователям; миграции передают свою функцию
+    на исторической модели.
+    """
+    candidates = set(MENTION_RE.findall(text))
+    usernames = resolve_usernames(candidates) if candidates else set()
+    html = markdown.markdown(text, extensions=[
+        'nl2br',
+        'sane_lists',
+        'fenced_code',
+        MentionExtension(usernames),
+    ])
+    html = bleach.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=ALLOWED_PROTOCOLS,
+        strip=True,
+    )
+    return bleach.linkify(
+        html, callbacks=DEFAULT_CALLBACKS, skip_tags={'pre', 'code'})
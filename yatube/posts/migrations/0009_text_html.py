@@ -0,0 +1,110 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:44
+
+import re
+import xml.etree.ElementTree as etree
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# Копия posts.markup на момент миграции: модуль приложения может
+# измениться, а его reverse() загружает URLconf со всеми представлениями.
+# Адрес профиля зафиксирован строкой.
+ALLOWED_TAGS = {
+    'a', 'blockquote', 'br', 'code', 'em', 'hr', 'li', 'ol', 'p', 'pre',
+    'strong', 'ul',
+}
+ALLOWED_ATTRIBUTES = {'a': ['href', 'title', 'rel']}
+ALLOWED_PROTOCOLS = {'http', 'https', 'mailto'}
+MENTION_PATTERN = r'(?<![\w@/])@([\w.+-]*\w)'
+URL_BEFORE_PATTERN = r'(?:[a-z][a-z0-9+.-]*://|www\.)\S*$'
+PROFILE_URL = '/profile/{}/'
+
+
+def render(text, resolve_usernames):
+    import bleach
+    import markdown
+    from bleach.linkifier import DEFAULT_CALLBACKS
+    from markdown.inlinepatterns import InlineProcessor
+    from markdown.util import AtomicString
+
+    candidates = set(re.findall(MENTION_PATTERN, text))
+    usernames = resolve_usernames(candidates) if candidates else set()
+
+    class MentionProcessor(InlineProcessor):
+        def handleMatch(self, match, data):
+            username = match.group(1)
+            url_before = re.compile(URL_BEFORE_PATTERN, re.I).search(
+                data, 0, match.start(0))
+            if username not in usernames or url_before:
+                return None, None, None
+            link = etree.Element('a')
+            link.set('href', PROFILE_URL.format(username))
+            link.text = AtomicString(f'@{username}')
+            return link, match.start(0), match.end(0)
+
+    class MentionExtension(markdown.Extension):
+        def extendMarkdown(self, md):
+            md.inlinePatterns.register(
+                MentionProcessor(MENTION_PATTERN), 'mention', 175)
+
+    html = markdown.markdown(text, extensions=[
+        'nl2br',
+        'sane_lists',
+        'fenced_code',
+        MentionExtension(),
+    ])
+    html = bleach.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=ALLOWED_PROTOCOLS,
+        strip=True,
+    )
+    return bleach.linkify(
+        html, callbacks=DEFAULT_CALLBACKS, skip_tags={'pre', 'code'})
+
+
+def backfill_text_html(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    def resolve_usernames(candidates):
+        return set(User.objects.filter(username__in=candidates)
+                   .values_list('username', flat=True))
+
+    for model_name in ('Post', 'Comment'):
+        model = apps.get_model('posts', model_name)
+        rows = model.objects.order_by('pk').only('pk', 'text')
+        last_pk = 0
+        while True:
+            batch = list(rows.filter(pk__gt=last_pk)[:BATCH_SIZE])
+            if not batch:
+                break
+            for row in batch:
+                row.text_html = render(row.text, resolve_usernames)
+            model.objects.bulk_update(batch, ['text_html'])
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.RunPython(
+            backfill_text_html, migrations.RunPython.noop, elidable=True),
+    ]
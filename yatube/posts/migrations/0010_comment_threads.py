@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+PATH_STEP = 10
+
+
+def backfill_paths(apps, schema_editor):
+    """Существующие комментарии становятся корнями веток."""
+    Comment = apps.get_model('posts', 'Comment')
+    comments = Comment.objects.order_by('pk').only('pk')
+    last_pk = 0
+    while True:
+        batch = list(comments.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        for comment in batch:
+            comment.path = str(comment.pk).zfill(PATH_STEP)
+        Comment.objects.bulk_update(batch, ['path'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Уровень вложенности'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=80, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_thread_idx'),
+        ),
+        migrations.RunPython(
+            backfill_paths, migrations.RunPython.noop, elidable=True),
+    ]
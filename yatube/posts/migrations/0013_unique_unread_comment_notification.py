@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-19 11:32
+
+from django.db import migrations, models
+
+
+def merge_duplicates(apps, schema_editor):
+    """Склеивает повторные непрочитанные уведомления о комментариях,
+    иначе ограничение не создать."""
+    Notification = apps.get_model('posts', 'Notification')
+    unread = Notification.objects.filter(verb='comment', is_read=False)
+    duplicates = unread.order_by().values('recipient_id', 'post_id').annotate(
+        rows=models.Count('id'),
+        total=models.Sum('count'),
+        last_id=models.Max('id'),
+    ).filter(rows__gt=1)
+    for group in list(duplicates):
+        Notification.objects.filter(pk=group['last_id']).update(
+            count=group['total'])
+        unread.filter(
+            recipient_id=group['recipient_id'],
+            post_id=group['post_id'],
+            pk__lt=group['last_id'],
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_revisions'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicates, migrations.RunPython.noop, elidable=True),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_read', False), ('verb', 'comment')), fields=('recipient', 'post'), name='unique_unread_comment_notification'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-19 11:58
+
+from django.db import migrations
+
+TOP_AUTHORS = 3
+
+
+def store_author_ids(apps, schema_editor):
+    """top_authors хранил имена, теперь хранит id авторов."""
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    GroupAuthorStats = apps.get_model('posts', 'GroupAuthorStats')
+    for group_id in GroupStats.objects.values_list('group_id', flat=True):
+        top_authors = list(
+            GroupAuthorStats.objects.filter(
+                group_id=group_id, post_count__gt=0)
+            .order_by('-post_count', 'author_id')
+            .values_list('author_id', flat=True)[:TOP_AUTHORS]
+        )
+        GroupStats.objects.filter(group_id=group_id).update(
+            top_authors=top_authors)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_unique_unread_comment_notification'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            store_author_ids, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-19 11:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_group_top_author_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='postrevision',
+            name='post',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.post', verbose_name='Пост'),
+        ),
+    ]
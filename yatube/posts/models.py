@@ -1,13 +1,124 @@
 from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+
 User = get_user_model()
 
+# Отправляется после мягкого удаления: sender - модель, pks - строки.
+soft_deleted = Signal()
+
+LIVE = models.Q(deleted_at__isnull=True)
+
+
+class RenderedTextMixin:
+    """Заполняет text_html разобранным Markdown из text при сохранении.
+
+    markdown и bleach импортируются при первом сохранении, а не при
+    django.setup(): большинству команд manage.py они не нужны.
+    """
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            from .markup import render
+
+            self.text_html = render(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'text_html'}
+        super().save(*args, **kwargs)
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """delete() помечает строки удаленными, как SoftDeleteModel.delete():
+    действие админки «удалить выбранные» ведет себя как кнопка
+    «удалить». Строки из базы убирает hard_delete()."""
+
+    def delete(self):
+        count = self.soft_delete()
+        return count, {self.model._meta.label: count}
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def hard_delete(self):
+        return super().delete()
+
+    hard_delete.alters_data = True
+    hard_delete.queryset_only = True
+
+    def soft_delete(self):
+        """Помечает строки удаленными. Возвращает их число."""
+        pks = list(self.filter(LIVE).values_list('pk', flat=True))
+        if pks:
+            self.model._base_manager.filter(pk__in=pks).update(
+                deleted_at=timezone.now())
+            soft_deleted.send(sender=self.model, pks=pks)
+        return len(pks)
+
+
+class LiveManager(models.Manager):
+    """Менеджер по умолчанию: только неудаленные строки.
+
+    Условие совпадает с условием частичных индексов моделей, поэтому
+    запросы лент используют их.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(LIVE)
+
 
-class Post(models.Model):
+class SoftDeleteModel(models.Model):
+    """delete() только помечает строку, hard_delete() удаляет ее.
+
+    objects видит неудаленные строки, all_objects - все.
+    """
+    deleted_at = models.DateTimeField(
+        'Дата удаления',
+        blank=True,
+        null=True,
+        editable=False
+    )
+
+    objects = LiveManager.from_queryset(SoftDeleteQuerySet)()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def delete(self, using=None, keep_parents=False):
+        count = type(self).all_objects.filter(pk=self.pk).soft_delete()
+        self.deleted_at = timezone.now()
+        return count, {self._meta.label: count}
+
+    def hard_delete(self, using=None, keep_parents=False):
+        return super().delete(using, keep_parents)
+
+
+class PostQuerySet(SoftDeleteQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Заполняет пустой text_html, как RenderedTextMixin.save():
+        шаблоны выводят его без разбора Markdown."""
+        objs = list(objs)
+        missing = [obj for obj in objs if not obj.text_html]
+        if missing:
+            from .markup import render
+
+            for obj in missing:
+                obj.text_html = render(obj.text)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class Post(RenderedTextMixin, SoftDeleteModel):
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста')
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True
@@ -32,11 +143,40 @@ class Post(models.Model):
         blank=True
     )
 
+    objects = LiveManager.from_queryset(PostQuerySet)()
+    all_objects = PostQuerySet.as_manager()
+
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: по ней group_stats видит перенос.
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        # Текст на момент загрузки: по нему signals видят правку.
+        instance._loaded_text = instance.__dict__.get('text')
+        return instance
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=('-pub_date',),
+                name='post_live_pub_date_idx',
+                condition=LIVE
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_live_author_idx',
+                condition=LIVE
+            ),
+            models.Index(
+                fields=('group', '-pub_date'),
+                name='post_live_group_idx',
+                condition=LIVE
+            ),
+        ]
 
 
 class Group(models.Model):
@@ -48,7 +188,33 @@ class Group(models.Model):
         return self.title
 
 
-class Comment(models.Model):
+class CommentQuerySet(SoftDeleteQuerySet):
+    def thread(self, post_id, root=None, max_depth=None):
+        """Комментарии поста в порядке показа ветки одним запросом.
+
+        Порядок по path - обход дерева в глубину, ответы после своего
+        комментария по времени. root ограничивает выборку его веткой,
+        max_depth - глубиной от корня поста.
+        """
+        comments = self.filter(post_id=post_id)
+        if root is not None:
+            comments = comments.filter(path__startswith=root.path)
+        if max_depth is not None:
+            comments = comments.filter(depth__lte=max_depth)
+        return comments.order_by('path')
+
+
+class Comment(RenderedTextMixin, SoftDeleteModel):
+    """Комментарий с материализованным путем.
+
+    path - pk всех предков и самого комментария, каждый дополнен нулями
+    до PATH_STEP цифр. Сортировка по path дает порядок ветки, а ветка
+    комментария - выборка по префиксу его path. Ответы глубже
+    MAX_DEPTH становятся ответами на комментарий уровнем выше.
+    """
+    PATH_STEP = 10
+    MAX_DEPTH = 8
+
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -60,23 +226,75 @@ class Comment(models.Model):
         verbose_name='Автор комментария',
         related_name='comments'
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
     text = models.TextField(
         verbose_name='Текст комментария',
         help_text='Введите текст текст комментария'
     )
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        editable=False
+    )
     created = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=PATH_STEP * MAX_DEPTH,
+        blank=True,
+        editable=False
     )
+    depth = models.PositiveSmallIntegerField(
+        'Уровень вложенности',
+        default=0,
+        editable=False
+    )
+
+    objects = LiveManager.from_queryset(CommentQuerySet)()
+    all_objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ['created']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('post', 'path'),
+                name='comment_thread_idx',
+                condition=LIVE
+            ),
+        ]
 
     def __str__(self):
         return self.text[:50]
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        prefix = ''
+        if adding and self.parent is not None:
+            parent = self.parent
+            if parent.depth + 1 >= self.MAX_DEPTH:
+                self.parent_id = parent.parent_id
+                prefix = parent.path[:-self.PATH_STEP]
+            else:
+                prefix = parent.path
+        super().save(*args, **kwargs)
+        if adding and not self.path:
+            self.path = prefix + str(self.pk).zfill(self.PATH_STEP)
+            self.depth = len(self.path) // self.PATH_STEP - 1
+            Comment.objects.filter(pk=self.pk).update(
+                path=self.path, depth=self.depth)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -91,3 +309,256 @@ class Follow(models.Model):
         related_name='following',
         help_text='Автор, на кого подписываются'
     )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Подписчик на момент загрузки: при смене в админке signals
+        # сбрасывают кеш подписок и прежнего подписчика.
+        instance._loaded_user_id = instance.__dict__.get('user_id')
+        return instance
+
+
+class GroupStats(models.Model):
+    """Счетчики группы для каталога /groups/ (posts.group_stats)."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    post_count = models.PositiveIntegerField('Число постов', default=0)
+    last_activity = models.DateTimeField(
+        'Последняя активность',
+        null=True,
+        blank=True
+    )
+    top_authors = models.JSONField(
+        'Самые активные авторы',
+        default=list,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+
+class GroupAuthorStats(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_stats'
+    )
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('group', 'author'),
+                name='unique_group_author_stats'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('group', '-post_count'),
+                name='group_author_top_idx'
+            ),
+        ]
+
+
+class Notification(models.Model):
+    """Уведомление во входящих (posts.notifications).
+
+    Непрочитанные уведомления о комментариях к одному посту
+    склеиваются в одну строку: count - сколько событий она описывает.
+    Ограничение unique_unread_comment_notification не дает фоновым
+    потокам создать вторую такую строку.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    VERBS = (
+        (POST, 'Новый пост автора'),
+        (COMMENT, 'Новый комментарий'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='sent_notifications',
+        verbose_name='Автор события'
+    )
+    verb = models.CharField('Событие', max_length=16, choices=VERBS)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Пост'
+    )
+    count = models.PositiveIntegerField('Число событий', default=1)
+    created = models.DateTimeField('Дата', default=timezone.now)
+    is_read = models.BooleanField('Прочитано', default=False)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        indexes = [
+            models.Index(
+                fields=('recipient', '-id'),
+                name='notification_inbox_idx'
+            ),
+            models.Index(
+                fields=('recipient', 'is_read', 'verb'),
+                name='notification_unread_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipient', 'post'),
+                condition=models.Q(verb='comment', is_read=False),
+                name='unique_unread_comment_notification'
+            ),
+        ]
+
+
+class PostRevision(models.Model):
+    """Прежняя версия текста поста (posts.revisions).
+
+    data - сжатый обратный diff: как из следующей версии получить эту.
+    Каждая SNAPSHOT_EVERY-я ревизия хранит полный текст, поэтому для
+    восстановления любой версии хватает не больше SNAPSHOT_EVERY строк.
+
+    Ключ на пост без ограничения в БД: при архивации ревизии остаются
+    на месте и относятся к ArchivedPost с тем же pk. Удаление поста
+    или архивного поста удаляет и его ревизии.
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='revisions',
+        verbose_name='Пост'
+    )
+    number = models.PositiveIntegerField('Номер версии')
+    is_snapshot = models.BooleanField('Полный текст', default=False)
+    data = models.BinaryField('Сжатые данные')
+    editor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='post_revisions',
+        verbose_name='Кто изменил'
+    )
+    created = models.DateTimeField('Дата изменения', default=timezone.now)
+
+    class Meta:
+        ordering = ['-number']
+        verbose_name = 'Версия поста'
+        verbose_name_plural = 'Версии поста'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('post', 'number'),
+                name='unique_post_revision'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} v{self.number}'
+
+
+class ArchivedPost(SoftDeleteModel):
+    """Старый пост, перенесенный задачей archive_posts (posts.archive).
+
+    pk совпадает с pk исходного поста, поэтому ссылки на пост
+    продолжают работать: post_detail ищет его здесь, если в posts_post
+    его уже нет.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    text_html = models.TextField('HTML текста', blank=True)
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    archived_at = models.DateTimeField('Дата архивации', default=timezone.now)
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        indexes = [
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='archived_post_author_idx',
+                condition=LIVE
+            ),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(SoftDeleteModel):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments'
+    )
+    parent_id = models.IntegerField(blank=True, null=True)
+    text = models.TextField('Текст комментария')
+    text_html = models.TextField('HTML текста', blank=True)
+    created = models.DateTimeField('Дата публикации')
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=Comment.PATH_STEP * Comment.MAX_DEPTH,
+        blank=True
+    )
+    depth = models.PositiveSmallIntegerField('Уровень вложенности', default=0)
+
+    objects = LiveManager.from_queryset(CommentQuerySet)()
+    all_objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created']
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+        indexes = [
+            models.Index(
+                fields=('post', 'path'),
+                name='archived_comment_thread_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.text[:50]
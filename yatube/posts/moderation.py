@@ -0,0 +1,69 @@
+"""Массовая модерация множественными UPDATE/DELETE.
+
+Записи обрабатываются пачками через posts.bulk, каждая пачка в своей
+транзакции, поэтому долгая чистка не держит одну огромную транзакцию
+и не блокирует запись в SQLite надолго. Сигналы моделей не
+отправляются, поэтому статистика затронутых групп пересчитывается, а
+рейтинг "в тренде" сбрасывается в конце задачи.
+"""
+from . import group_stats, trends
+from .bulk import CHUNK_SIZE, delete_pks, run
+from .models import Comment, Post
+
+
+def _post_groups(pks):
+    return set(
+        Post.objects.filter(pk__in=pks, group__isnull=False)
+        .values_list('group_id', flat=True)
+    )
+
+
+def delete_queryset(queryset, chunk_size=CHUNK_SIZE, progress=None):
+    """Удаляет выборку пачками. Возвращает число удаленных строк."""
+    groups = set()
+
+    def delete(pks):
+        if queryset.model is Post:
+            groups.update(_post_groups(pks))
+        delete_pks(queryset.model, pks)
+
+    total = run(queryset, delete, chunk_size, progress)
+    if groups:
+        group_stats.recompute(groups)
+    if total and queryset.model is Post:
+        trends.invalidate()
+    return total
+
+
+def delete_user_content(user, chunk_size=CHUNK_SIZE, progress=None):
+    """Удаляет все посты и комментарии пользователя."""
+    return (
+        delete_queryset(Post.objects.filter(author=user),
+                        chunk_size, progress)
+        + delete_queryset(Comment.objects.filter(author=user),
+                          chunk_size, progress)
+    )
+
+
+def move_posts(queryset, group, chunk_size=CHUNK_SIZE, progress=None):
+    """Переносит посты выборки в group (None - убирает из групп)."""
+    groups = {group.pk} if group is not None else set()
+
+    def move(pks):
+        groups.update(_post_groups(pks))
+        Post.objects.filter(pk__in=pks).update(group=group)
+
+    total = run(queryset, move, chunk_size, progress)
+    if total:
+        group_stats.recompute(groups)
+    return total
+
+
+def purge_comments(pattern, queryset=None, chunk_size=CHUNK_SIZE,
+                   progress=None):
+    """Удаляет комментарии выборки queryset (по умолчанию - все), текст
+    которых подходит под регулярное выражение pattern."""
+    if queryset is None:
+        queryset = Comment.objects.all()
+    return delete_queryset(
+        queryset.filter(text__regex=pattern), chunk_size, progress)
@@ -0,0 +1,222 @@
+"""Входящие уведомления: фан-аут, счетчик непрочитанных и сжатие.
+
+Представления вызывают notify_post/notify_comment. Строки пишутся
+после коммита транзакции в фоновом потоке пачками по BATCH_SIZE
+получателей, поэтому автор с тысячами подписчиков не ждет, пока
+разойдутся уведомления. При NOTIFICATIONS['BACKGROUND'] = False
+фан-аут выполняется в том же потоке сразу после коммита.
+
+Непрочитанные уведомления о комментариях к посту склеиваются в одну
+строку со счетчиком. Старые уведомления о постах одного автора
+сжимает compact() (команда compact_notifications).
+
+Число непрочитанных хранится в кеше; запись для получателя сбрасывает
+его ключ. С кешем одного процесса (locmem) другие воркеры не видят
+сброса, поэтому там счетчик хранится LOCAL_UNREAD_TIMEOUT секунд. Входящие
+листаются по id (keyset), без OFFSET.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, models, transaction
+from django.utils import timezone
+
+from core.cache import is_shared
+
+from .models import Comment, Follow, Notification, Post
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+PAGE_SIZE = 20
+UNREAD_KEY = 'notifications:unread:{}'
+UNREAD_TIMEOUT = 24 * 60 * 60
+LOCAL_UNREAD_TIMEOUT = 60
+
+_executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix='notifications')
+
+
+def _run_in_background(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('notification fan-out failed')
+    finally:
+        close_old_connections()
+
+
+def _schedule(func, *args):
+    if settings.NOTIFICATIONS['BACKGROUND']:
+        transaction.on_commit(
+            lambda: _executor.submit(_run_in_background, func, *args))
+    else:
+        transaction.on_commit(lambda: func(*args))
+
+
+def _batches(queryset, field):
+    """Пачки id получателей по возрастанию, без загрузки всех сразу."""
+    user_ids = queryset.order_by(field).values_list(field, flat=True)
+    user_ids = user_ids.distinct()
+    last_id = 0
+    while True:
+        batch = list(
+            user_ids.filter(**{f'{field}__gt': last_id})[:BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+
+def _reset_unread(user_ids):
+    cache.delete_many([UNREAD_KEY.format(user_id) for user_id in user_ids])
+
+
+def notify_post(post):
+    """Уведомляет подписчиков автора о новом посте."""
+    _schedule(fan_out_post, post.pk, post.author_id)
+
+
+def notify_comment(comment):
+    """Уведомляет автора поста и участников обсуждения."""
+    _schedule(fan_out_comment, comment.post_id, comment.author_id)
+
+
+def fan_out_post(post_id, author_id):
+    followers = Follow.objects.filter(author_id=author_id)
+    for batch in _batches(followers, 'user_id'):
+        Notification.objects.bulk_create([
+            Notification(
+                recipient_id=user_id,
+                actor_id=author_id,
+                verb=Notification.POST,
+                post_id=post_id,
+            )
+            for user_id in batch
+        ])
+        _reset_unread(batch)
+
+
+def fan_out_comment(post_id, actor_id):
+    post_author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True).first()
+    if post_author_id is None:
+        return
+    participants = Comment.objects.filter(post_id=post_id).exclude(
+        author_id=actor_id)
+    batches = list(_batches(participants, 'author_id'))
+    if post_author_id != actor_id:
+        batches.insert(0, [post_author_id])
+    seen = set()
+    for batch in batches:
+        batch = [user_id for user_id in batch if user_id not in seen]
+        seen.update(batch)
+        if batch:
+            _notify_comment_batch(batch, post_id, actor_id)
+
+
+def _notify_comment_batch(user_ids, post_id, actor_id):
+    """Добавляет событие в непрочитанную строку получателя или создает
+    ее. Строки без счета вставляются с ignore_conflicts, и затем все
+    счетчики растут одним UPDATE: параллельный фан-аут упирается в
+    ограничение unique_unread_comment_notification, а не создает
+    вторую строку."""
+    with transaction.atomic():
+        Notification.objects.bulk_create([
+            Notification(
+                recipient_id=user_id,
+                actor_id=actor_id,
+                verb=Notification.COMMENT,
+                post_id=post_id,
+                count=0,
+            )
+            for user_id in user_ids
+        ], ignore_conflicts=True)
+        Notification.objects.filter(
+            recipient_id__in=user_ids,
+            verb=Notification.COMMENT,
+            post_id=post_id,
+            is_read=False,
+        ).update(
+            count=models.F('count') + 1,
+            actor_id=actor_id,
+            created=timezone.now(),
+        )
+    _reset_unread(user_ids)
+
+
+def _unread_timeout():
+    """Сброс ключа виден только процессу, в котором прошел фан-аут,
+    поэтому с кешем одного процесса счетчик живет недолго."""
+    return UNREAD_TIMEOUT if is_shared() else LOCAL_UNREAD_TIMEOUT
+
+
+def unread_count(user):
+    key = UNREAD_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            recipient=user, is_read=False).count()
+        cache.set(key, count, _unread_timeout())
+    return count
+
+
+def mark_all_read(user):
+    Notification.objects.filter(recipient=user, is_read=False).update(
+        is_read=True)
+    cache.set(UNREAD_KEY.format(user.pk), 0, _unread_timeout())
+
+
+def inbox(user, before=None):
+    """Страница входящих: (уведомления, id для ?before= или None)."""
+    notifications = Notification.objects.filter(
+        recipient=user, post__deleted_at__isnull=True
+    ).select_related('actor', 'post')
+    if before is not None:
+        notifications = notifications.filter(pk__lt=before)
+    page = list(notifications[:PAGE_SIZE + 1])
+    if len(page) > PAGE_SIZE:
+        return page[:PAGE_SIZE], page[PAGE_SIZE - 1].pk
+    return page, None
+
+
+def compact(now=None):
+    """Удаляет старые прочитанные и склеивает старые уведомления о постах.
+
+    Непрочитанные уведомления о постах одного автора старше
+    AGGREGATE_AFTER_DAYS сводятся к последнему из них со счетчиком.
+    Возвращает (удалено прочитанных, удалено при склейке).
+    """
+    now = now or timezone.now()
+    options = settings.NOTIFICATIONS
+    deleted, _ = Notification.objects.filter(
+        is_read=True,
+        created__lt=now - timedelta(days=options['KEEP_DAYS']),
+    ).delete()
+    old_posts = Notification.objects.filter(
+        verb=Notification.POST,
+        is_read=False,
+        created__lt=now - timedelta(days=options['AGGREGATE_AFTER_DAYS']),
+    )
+    groups = old_posts.order_by().values(
+        'recipient_id', 'actor_id'
+    ).annotate(
+        rows=models.Count('id'),
+        total=models.Sum('count'),
+        last_id=models.Max('id'),
+    ).filter(rows__gt=1)
+    merged = 0
+    for group in list(groups):
+        with transaction.atomic():
+            Notification.objects.filter(pk=group['last_id']).update(
+                count=group['total'])
+            merged += old_posts.filter(
+                recipient_id=group['recipient_id'],
+                actor_id=group['actor_id'],
+                pk__lt=group['last_id'],
+            ).delete()[0]
+        _reset_unread([group['recipient_id']])
+    return deleted, merged
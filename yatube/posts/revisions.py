@@ -0,0 +1,121 @@
+"""История правок постов в виде сжатых обратных diff.
+
+Текущий текст лежит в Post.text. Ревизия номер n хранит, как из версии
+n + 1 (или из текущего текста для последней ревизии) получить версию n:
+список операций по строкам - скопировать диапазон строк следующей
+версии или вставить строки как есть. Операции сериализуются в JSON и
+сжимаются zlib.
+
+Каждая ревизия с номером, кратным REVISIONS_SNAPSHOT_EVERY, хранит
+полный текст. Для восстановления версии n достаточно прочитать ревизии
+от n до ближайшего снимка - не больше REVISIONS_SNAPSHOT_EVERY строк
+одним запросом - и применить их от новой к старой.
+
+text_at() и texts() принимают и Post, и ArchivedPost: ревизии
+архивного поста остаются в той же таблице.
+"""
+import json
+import zlib
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Post, PostRevision
+
+COPY = 'c'
+INSERT = 'i'
+
+
+def _snapshot_every():
+    return settings.REVISIONS_SNAPSHOT_EVERY
+
+
+def _pack(payload):
+    return zlib.compress(json.dumps(payload, ensure_ascii=False).encode())
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(bytes(data)).decode())
+
+
+def diff(new_text, old_text):
+    """Операции, которые превращают new_text в old_text."""
+    new_lines = new_text.splitlines(keepends=True)
+    old_lines = old_text.splitlines(keepends=True)
+    matcher = SequenceMatcher(None, new_lines, old_lines, autojunk=False)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([COPY, i1, i2])
+        elif j2 > j1:
+            ops.append([INSERT, ''.join(old_lines[j1:j2])])
+    return ops
+
+
+def patch(new_text, ops):
+    new_lines = new_text.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if op[0] == COPY:
+            parts.extend(new_lines[op[1]:op[2]])
+        else:
+            parts.append(op[1])
+    return ''.join(parts)
+
+
+def record(post, old_text, new_text, editor=None):
+    """Сохраняет old_text как очередную ревизию поста.
+
+    Вызывается до сохранения new_text в Post.text. Если текст не
+    изменился, ревизия не создается и возвращается None.
+    """
+    if old_text == new_text:
+        return None
+    with transaction.atomic():
+        # Блокируем пост, чтобы параллельные правки не взяли один номер.
+        Post.all_objects.select_for_update().filter(pk=post.pk).exists()
+        last = post.revisions.aggregate(last=Max('number'))['last'] or 0
+        number = last + 1
+        is_snapshot = number % _snapshot_every() == 0
+        payload = old_text if is_snapshot else diff(new_text, old_text)
+        return PostRevision.objects.create(
+            post=post,
+            number=number,
+            is_snapshot=is_snapshot,
+            data=_pack(payload),
+            editor=editor,
+        )
+
+
+def text_at(post, number):
+    """Текст поста в версии number (одним запросом)."""
+    every = _snapshot_every()
+    snapshot = -(-number // every) * every
+    revisions = list(
+        PostRevision.objects.filter(
+            post_id=post.pk, number__gte=number, number__lte=snapshot)
+        .order_by('-number')
+    )
+    if not revisions or revisions[-1].number != number:
+        raise PostRevision.DoesNotExist(
+            f'У поста {post.pk} нет версии {number}')
+    text = post.text
+    for revision in revisions:
+        payload = _unpack(revision.data)
+        text = payload if revision.is_snapshot else patch(text, payload)
+    return text
+
+
+def texts(post):
+    """{номер: текст} всех версий поста: один запрос и один проход от
+    новой версии к старой."""
+    result = {}
+    text = post.text
+    for revision in PostRevision.objects.filter(
+            post_id=post.pk).order_by('-number'):
+        payload = _unpack(revision.data)
+        text = payload if revision.is_snapshot else patch(text, payload)
+        result[revision.number] = text
+    return result
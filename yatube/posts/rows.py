@@ -0,0 +1,91 @@
+"""Легкие строки постов для лент.
+
+Ленты (index, группа, профиль, подписки) выводят у поста только дату,
+HTML текста, картинку, имя и username автора и slug группы. Вместо
+экземпляров Post, User и Group со всеми столбцами (пароль, last_login,
+исходный текст) feed_rows() выбирает нужные столбцы одним запросом
+через values_list и собирает из них объекты со __slots__.
+
+PostRow равен посту с тем же pk, как и экземпляр модели.
+"""
+from django.db.models.query import ValuesListIterable
+
+from .models import Post
+
+FIELDS = (
+    'id', 'text_html', 'pub_date', 'image',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
+
+
+class AuthorRow:
+    __slots__ = ('username', 'first_name', 'last_name')
+
+    def __init__(self, username, first_name, last_name):
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def __str__(self):
+        return self.username
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+
+class GroupRow:
+    __slots__ = ('slug', 'title')
+
+    def __init__(self, slug, title):
+        self.slug = slug
+        self.title = title
+
+    def __str__(self):
+        return self.title
+
+
+class PostRow:
+    """Пост в ленте. image - имя файла в хранилище, как в Post.image."""
+    __slots__ = ('id', 'text_html', 'pub_date', 'image', 'author', 'group')
+
+    def __init__(self, id, text_html, pub_date, image, author, group):
+        self.id = id
+        self.text_html = text_html
+        self.pub_date = pub_date
+        self.image = image
+        self.author = author
+        self.group = group
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __eq__(self, other):
+        if isinstance(other, (PostRow, Post)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __repr__(self):
+        return f'<PostRow: {self.pk}>'
+
+
+class PostRowIterable(ValuesListIterable):
+    def __iter__(self):
+        for (pk, text_html, pub_date, image, username, first_name,
+             last_name, slug, title) in super().__iter__():
+            yield PostRow(
+                pk, text_html, pub_date, image,
+                AuthorRow(username, first_name, last_name),
+                GroupRow(slug, title) if slug is not None else None,
+            )
+
+
+def feed_rows(queryset):
+    """Выборка постов queryset в виде PostRow, одним запросом."""
+    rows = queryset.values_list(*FIELDS)
+    rows._iterable_class = PostRowIterable
+    return rows
@@ -0,0 +1,69 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import group_stats, syndication, trends
+from .follow_graph import FollowGraph
+from .models import ArchivedPost, Follow, Post, PostRevision, soft_deleted
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    old_group_id = getattr(instance, '_loaded_group_id', None)
+    if created:
+        group_stats.record(
+            instance.group_id, instance.author_id, 1, instance.pub_date)
+    elif old_group_id != instance.group_id:
+        group_stats.record(
+            old_group_id, instance.author_id, -1, instance.pub_date)
+        group_stats.record(
+            instance.group_id, instance.author_id, 1, instance.pub_date)
+    text = instance.__dict__.get('text')
+    # Сохранение без правки текста и переноса (например, с другими
+    # update_fields) ленты не меняет.
+    if (created or old_group_id != instance.group_id
+            or getattr(instance, '_loaded_text', None) != text):
+        syndication.touch_posts([instance.pk], [old_group_id])
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_text = text
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    # Мягко удаленный пост уже вычтен из счетчиков при soft_delete().
+    if instance.deleted_at is None:
+        group_stats.record(
+            instance.group_id, instance.author_id, -1, instance.pub_date)
+    syndication.touch_posts(
+        group_ids=[instance.group_id], author_ids=[instance.author_id])
+    trends.invalidate()
+
+
+@receiver(soft_deleted, sender=Post)
+def count_soft_deleted_posts(sender, pks, **kwargs):
+    rows = Post.all_objects.filter(
+        pk__in=pks, group__isnull=False
+    ).values_list('group_id', 'author_id', 'pub_date')
+    for group_id, author_id, pub_date in rows:
+        group_stats.record(group_id, author_id, -1, pub_date)
+    syndication.touch_posts(pks)
+    trends.invalidate()
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def delete_archived_revisions(sender, instance, **kwargs):
+    # У ключа ревизий нет каскада в БД: их пост теперь архивный.
+    PostRevision.objects.filter(post_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Follow)
+def invalidate_saved_follow(sender, instance, **kwargs):
+    old_user_id = getattr(instance, '_loaded_user_id', None)
+    FollowGraph.invalidate(instance.user_id)
+    if old_user_id not in (None, instance.user_id):
+        FollowGraph.invalidate(old_user_id)
+    instance._loaded_user_id = instance.user_id
+
+
+@receiver(post_delete, sender=Follow)
+def invalidate_deleted_follow(sender, instance, **kwargs):
+    FollowGraph.invalidate(instance.user_id)
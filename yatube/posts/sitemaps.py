@@ -0,0 +1,253 @@
+"""Карты сайта для постов, профилей и групп.
+
+Каждый раздел делится на части по диапазонам первичного ключа:
+в часть N попадают объекты с pk // CHUNK_SIZE == N, поэтому в ней не
+больше CHUNK_SIZE ссылок (лимит протокола - 50 000), а новый пост
+меняет только последнюю часть. Части и индекс sitemap.xml пишутся
+файлами в SITEMAPS['ROOT'] командой generate_sitemaps.
+
+Для каждой части одним GROUP BY на раздел считается отпечаток: число
+строк, сумма pk и самая поздняя дата. В manifest.json лежат отпечатки
+прошлого запуска, и перезаписываются только части, у которых он
+изменился: появился, удален или отредактирован пост. Переименование
+пользователя или группы отпечаток не меняет - для него есть --force.
+"""
+import datetime
+import json
+import os
+
+from django.conf import settings
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Max
+from django.db.models import Sum
+from django.urls import reverse
+from django.utils.feedgenerator import SimplerXMLGenerator
+
+from .models import ArchivedPost, Group, Post, PostRevision
+
+CHUNK_SIZE = 50000
+MAX_AGE = 60 * 60
+INDEX = 'sitemap.xml'
+MANIFEST = 'manifest.json'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def _plain(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def _by_chunk(queryset, field, **aggregates):
+    """{номер части: [значения aggregates]} одним запросом."""
+    chunk = ExpressionWrapper(
+        F(field) / CHUNK_SIZE, output_field=IntegerField())
+    return {
+        row['chunk']: [_plain(row[name]) for name in aggregates]
+        for row in queryset.order_by().values(chunk=chunk).annotate(
+            **aggregates)
+    }
+
+
+def _pk_range(chunk):
+    return {'gte': chunk * CHUNK_SIZE, 'lt': (chunk + 1) * CHUNK_SIZE}
+
+
+def _range_filter(field, chunk):
+    return {
+        f'{field}__{lookup}': value
+        for lookup, value in _pk_range(chunk).items()
+    }
+
+
+def _post_fingerprints():
+    live = _by_chunk(
+        Post.objects, 'pk',
+        count=Count('pk'), total=Sum('pk'), last=Max('pub_date'))
+    archived = _by_chunk(
+        ArchivedPost.objects, 'pk', count=Count('pk'), total=Sum('pk'))
+    edited = _by_chunk(PostRevision.objects, 'post_id', last=Max('created'))
+    return {
+        chunk: [
+            live.get(chunk), archived.get(chunk), edited.get(chunk)
+        ]
+        for chunk in live.keys() | archived.keys()
+    }
+
+
+def _post_urls(chunk):
+    """Посты части, включая архивные: post_detail отдает и их. Дата
+    изменения - последняя правка или публикация."""
+    live = (
+        Post.objects.filter(**_range_filter('pk', chunk))
+        .annotate(edited=Max('revisions__created'))
+        .order_by('pk').values_list('pk', 'pub_date', 'edited')
+    )
+    for pk, pub_date, edited in live.iterator():
+        yield reverse('posts:post_detail', args=[pk]), edited or pub_date
+    archived = (
+        ArchivedPost.objects.filter(**_range_filter('pk', chunk))
+        .order_by('pk').values_list('pk', 'pub_date')
+    )
+    for pk, pub_date in archived.iterator():
+        yield reverse('posts:post_detail', args=[pk]), pub_date
+
+
+def _profile_fingerprints():
+    return _by_chunk(
+        Post.objects, 'author_id',
+        count=Count('author_id', distinct=True),
+        total=Sum('author_id', distinct=True),
+        last=Max('pub_date'),
+    )
+
+
+def _profile_urls(chunk):
+    """Авторы части с хотя бы одним постом, дата - последний пост."""
+    authors = (
+        Post.objects.filter(**_range_filter('author_id', chunk))
+        .values_list('author_id', 'author__username')
+        .annotate(last=Max('pub_date')).order_by('author_id')
+    )
+    for _, username, last in authors.iterator():
+        yield reverse('posts:profile', args=[username]), last
+
+
+def _group_fingerprints():
+    return _by_chunk(
+        Group.objects, 'pk',
+        count=Count('pk'), total=Sum('pk'),
+        last=Max('stats__last_activity'),
+    )
+
+
+def _group_urls(chunk):
+    groups = (
+        Group.objects.filter(**_range_filter('pk', chunk))
+        .order_by('pk').values_list('slug', 'stats__last_activity')
+    )
+    for slug, last_activity in groups.iterator():
+        yield reverse('posts:group_list', args=[slug]), last_activity
+
+
+# Раздел: (отпечатки частей, ссылки части).
+SECTIONS = {
+    'posts': (_post_fingerprints, _post_urls),
+    'profiles': (_profile_fingerprints, _profile_urls),
+    'groups': (_group_fingerprints, _group_urls),
+}
+
+
+def chunk_name(section, chunk):
+    return f'{section}-{chunk}'
+
+
+def _absolute(path):
+    return settings.SITEMAPS['BASE_URL'].rstrip('/') + path
+
+
+def _lastmod(value):
+    if value is None:
+        return None
+    return value.replace(microsecond=0).isoformat()
+
+
+def _write(path, element, tag, entries):
+    """Пишет XML во временный файл и подменяет им path: читатели не
+    видят недописанную карту."""
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        handler = SimplerXMLGenerator(file, 'utf-8')
+        handler.startDocument()
+        handler.startElement(element, {'xmlns': XMLNS})
+        for loc, lastmod in entries:
+            handler.startElement(tag, {})
+            handler.addQuickElement('loc', loc)
+            if lastmod is not None:
+                handler.addQuickElement('lastmod', lastmod)
+            handler.endElement(tag)
+        handler.endElement(element)
+    os.replace(temporary, path)
+
+
+def _write_chunk(path, urls):
+    """Пишет часть, возвращает самую позднюю дату изменения в ней."""
+    latest = []
+
+    def entries():
+        for url, lastmod in urls:
+            if lastmod is not None and (not latest or lastmod > latest[0]):
+                latest[:] = [lastmod]
+            yield _absolute(url), _lastmod(lastmod)
+
+    _write(path, 'urlset', 'url', entries())
+    return _lastmod(latest[0]) if latest else None
+
+
+def _load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST), encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(root, manifest):
+    path = os.path.join(root, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(manifest, file)
+    os.replace(path + '.tmp', path)
+
+
+def filename(name=None):
+    """Имя файла части name или индекса."""
+    return f'sitemap-{name}.xml' if name else INDEX
+
+
+def sitemap_path(name=None):
+    return os.path.join(settings.SITEMAPS['ROOT'], filename(name))
+
+
+def generate(force=False):
+    """Обновляет карты сайта. Возвращает (перезаписанные, удаленные)
+    имена частей; при force перезаписывает все."""
+    root = settings.SITEMAPS['ROOT']
+    os.makedirs(root, exist_ok=True)
+    previous = _load_manifest(root)
+    manifest = {}
+    written, removed = [], []
+    for section, (fingerprints, urls) in SECTIONS.items():
+        old = previous.get(section, {})
+        current = manifest[section] = {}
+        for chunk, fingerprint in sorted(fingerprints().items()):
+            name = chunk_name(section, chunk)
+            target = sitemap_path(name)
+            entry = old.get(str(chunk))
+            if (force or entry is None
+                    or entry['fingerprint'] != fingerprint
+                    or not os.path.exists(target)):
+                entry = {
+                    'fingerprint': fingerprint,
+                    'lastmod': _write_chunk(target, urls(chunk)),
+                }
+                written.append(name)
+            current[str(chunk)] = entry
+        for chunk in sorted(old.keys() - current.keys(), key=int):
+            name = chunk_name(section, chunk)
+            if os.path.exists(sitemap_path(name)):
+                os.remove(sitemap_path(name))
+            removed.append(name)
+    if written or removed or not os.path.exists(sitemap_path()):
+        _write(sitemap_path(), 'sitemapindex', 'sitemap', (
+            (
+                _absolute(reverse(
+                    'posts:sitemap_chunk',
+                    args=[chunk_name(section, chunk)]
+                )),
+                entry['lastmod'],
+            )
+            for section, chunks in manifest.items()
+            for chunk, entry in sorted(
+                chunks.items(), key=lambda item: int(item[0]))
+        ))
+        _save_manifest(root, manifest)
+    return written, removed
@@ -0,0 +1,270 @@
+"""Atom и RSS для общей ленты, групп и авторов.
+
+Документ пишется потоком: заголовок, затем записи пачками по
+CHUNK_SIZE, выбранные keyset-запросом (pub_date, id) без OFFSET и
+собранные в posts.rows.PostRow. Проверка If-None-Match и
+If-Modified-Since выполняется до представления и стоит одного
+обращения к кешу: для каждой ленты там лежит время ее последнего
+изменения. Сигналы постов (posts.signals) обновляют его через touch(),
+массовая модерация сбрасывает все отметки через feed_version.
+
+Отметки должны видеть все воркеры, поэтому условные ответы работают
+только с общим кешем (core.cache.is_shared). С кешем процесса (locmem)
+отметка, обновленная одним воркером, осталась бы старой в остальных, и
+они отвечали бы 304 на измененную ленту: тогда ETag и Last-Modified не
+выдаются, а время изменения ленты берется из БД.
+"""
+import datetime
+import io
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.feedgenerator import (
+    Atom1Feed, Rss201rev2Feed, SimplerXMLGenerator
+)
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from core.cache import is_shared
+
+from .feed_cache import feed_version
+from .models import Group, Post, User
+from .rows import feed_rows
+
+FEED_SIZE = 50
+CHUNK_SIZE = 25
+MAX_AGE = 60
+STAMP_KEY = 'posts:syndication:{}:{}'
+
+
+class StreamingFeedMixin:
+    """Пишет ленту по частям вместо SyndicationFeed.write().
+
+    Класс формата задает item_element - тег записи - и методы
+    start(handler) и end(handler), которые открывают и закрывают
+    корневые элементы документа.
+    """
+    item_element = None
+
+    def latest_post_date(self):
+        return self.feed['updated']
+
+    def stream(self, items):
+        buffer = io.StringIO()
+        handler = SimplerXMLGenerator(buffer, 'utf-8')
+
+        def flush():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        handler.startDocument()
+        self.start(handler)
+        self.add_root_elements(handler)
+        yield flush()
+        for item in items:
+            self.add_item(**item)
+            item = self.items.pop()
+            handler.startElement(self.item_element, self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            yield flush()
+        self.end(handler)
+        yield flush()
+
+
+class AtomFeed(StreamingFeedMixin, Atom1Feed):
+    item_element = 'entry'
+
+    def start(self, handler):
+        handler.startElement('feed', self.root_attributes())
+
+    def end(self, handler):
+        handler.endElement('feed')
+
+
+class RssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    item_element = 'item'
+
+    def start(self, handler):
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+
+    def end(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+FORMATS = {
+    'atom': AtomFeed,
+    'rss': RssFeed,
+}
+
+
+class FormatConverter:
+    regex = '|'.join(FORMATS)
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+def touch(*feed_keys, when=None):
+    """Отмечает изменение лент feed_keys ('index', 'group:<slug>',
+    'author:<username>')."""
+    stamp = (when or timezone.now()).timestamp()
+    version = feed_version()
+    cache.set_many(
+        {STAMP_KEY.format(version, key): stamp for key in feed_keys}, None)
+
+
+def touch_posts(pks=(), group_ids=(), author_ids=()):
+    """touch() для лент с постами pks, групп group_ids и авторов
+    author_ids."""
+    keys = {'index'}
+    keys.update(
+        f'author:{username}' for username in User.objects.filter(
+            Q(pk__in=author_ids) | Q(posts__pk__in=pks)
+        ).values_list('username', flat=True).distinct()
+    )
+    keys.update(
+        f'group:{slug}' for slug in Group.objects.filter(
+            Q(pk__in=group_ids) | Q(posts__pk__in=pks)
+        ).values_list('slug', flat=True).distinct()
+    )
+    touch(*keys)
+
+
+def _latest(queryset):
+    latest = (
+        queryset.order_by('-pub_date')
+        .values_list('pub_date', flat=True).first()
+    )
+    return latest.timestamp() if latest is not None else 0
+
+
+def _stamp(feed_key, queryset):
+    """Время последнего изменения ленты (timestamp): из кеша, при
+    промахе - по самому свежему посту (поиск по индексу). Для пустой
+    ленты - 0, в кеше на обычный срок."""
+    if not is_shared():
+        return _latest(queryset)
+    key = STAMP_KEY.format(feed_version(), feed_key)
+    stamp = cache.get(key)
+    if stamp is None:
+        stamp = _latest(queryset)
+        if stamp:
+            cache.set(key, stamp, None)
+        else:
+            cache.set(key, stamp)
+    return stamp
+
+
+def last_modified(feed_key, queryset):
+    stamp = _stamp(feed_key, queryset)
+    if not stamp:
+        return None
+    return datetime.datetime.fromtimestamp(stamp, datetime.timezone.utc)
+
+
+def etag(feed_key, queryset):
+    stamp = _stamp(feed_key, queryset)
+    return f'{feed_key}-{feed_version()}-{stamp:.6f}'
+
+
+def source(slug=None, username=None, **kwargs):
+    """(ключ ленты, посты) по аргументам URL: группа, автор или все."""
+    if slug is not None:
+        return f'group:{slug}', Post.objects.filter(group__slug=slug)
+    if username is not None:
+        return (
+            f'author:{username}',
+            Post.objects.filter(author__username=username)
+        )
+    return 'index', Post.objects.all()
+
+
+def _etag(request, **kwargs):
+    if is_shared():
+        return etag(*source(**kwargs))
+    return None
+
+
+def _last_modified(request, **kwargs):
+    if is_shared():
+        return last_modified(*source(**kwargs))
+    return None
+
+
+# Декоратор представлений лент: 304 по ETag и Last-Modified из общего
+# кеша.
+conditional = condition(etag_func=_etag, last_modified_func=_last_modified)
+
+
+def entries(queryset, size=FEED_SIZE, chunk_size=CHUNK_SIZE):
+    """Последние size постов queryset пачками по chunk_size."""
+    queryset = queryset.order_by('-pub_date', '-pk')
+    last = None
+    while size > 0:
+        page = queryset
+        if last is not None:
+            page = page.filter(
+                Q(pub_date__lt=last.pub_date)
+                | Q(pub_date=last.pub_date, pk__lt=last.pk)
+            )
+        limit = min(chunk_size, size)
+        rows = list(feed_rows(page[:limit]))
+        yield from rows
+        if len(rows) < limit:
+            return
+        size -= limit
+        last = rows[-1]
+
+
+def _item(request, row):
+    text = strip_tags(row.text_html)
+    link = request.build_absolute_uri(
+        reverse('posts:post_detail', args=[row.pk]))
+    return {
+        'title': Truncator(text).chars(60) or f'Пост {row.pk}',
+        'link': link,
+        'description': row.text_html,
+        'unique_id': link,
+        'pubdate': row.pub_date,
+        'author_name': row.author.get_full_name() or row.author.username,
+        'author_link': request.build_absolute_uri(
+            reverse('posts:profile', args=[row.author.username])),
+        'categories': [row.group.title] if row.group else None,
+    }
+
+
+def response(request, fmt, queryset, feed_key, title, link):
+    """Потоковый ответ с лентой queryset в формате fmt."""
+    feed = FORMATS[fmt](
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=title,
+        feed_url=request.build_absolute_uri(),
+        language=settings.LANGUAGE_CODE,
+        updated=last_modified(feed_key, queryset) or timezone.now(),
+    )
+    rows = entries(queryset)
+    if settings.ASYNC_VIEWS:
+        # ASGI-обработчик перебирает ответ в цикле событий, где
+        # запросы к БД запрещены: записи выбираются заранее.
+        rows = list(rows)
+    result = StreamingHttpResponse(
+        feed.stream(_item(request, row) for row in rows),
+        content_type=feed.content_type,
+    )
+    patch_cache_control(result, public=True, max_age=MAX_AGE)
+    return result
@@ -0,0 +1,79 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.paginator import EstimatedCountPaginator
+from ..models import Comment, Follow, Group, Post, User
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls._create_rows(0, 2)
+
+    @classmethod
+    def _create_rows(cls, start, stop):
+        for i in range(start, stop):
+            author = User.objects.create_user(username=f'user_{i}')
+            group = Group.objects.create(
+                title=f'Группа {i}', slug=f'group_{i}', description='')
+            post = Post.objects.create(
+                text='Текст', author=author, group=group)
+            Comment.objects.create(post=post, author=author, text='Коммент')
+            Follow.objects.create(user=cls.admin, author=author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк."""
+        urls = [reverse(f'admin:posts_{model}_changelist')
+                for model in ('post', 'comment', 'follow')]
+        self.client.get(urls[0])
+        before = [self._count_queries(url) for url in urls]
+        self._create_rows(2, 8)
+        after = [self._count_queries(url) for url in urls]
+        self.assertEqual(before, after)
+
+    def test_changelist_has_no_group_select(self):
+        """Группы выводятся один раз (в форме действий), а не в
+        каждой строке списка постов."""
+        Post.objects.create(text='Текст', author=self.admin, group=self.group)
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertContains(
+            response, f'>{self.group.title}</option>', count=1)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=author) for i in range(5))
+
+    def test_exact_below_limit(self):
+        """Ниже предела число записей точное."""
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+        self.assertEqual(paginator.count, 5)
+
+    def test_capped_above_limit(self):
+        """Выше предела отфильтрованная выборка оценивается пределом."""
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(text__startswith='Пост'), 2)
+        paginator.exact_count_limit = 3
+        self.assertEqual(paginator.count, 4)
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+        paginator.exact_count_limit = 3
+        self.assertGreaterEqual(paginator.count, 5)
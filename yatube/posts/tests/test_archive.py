@@ -0,0 +1,168 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive, revisions
+from ..models import (
+    ArchivedComment, ArchivedPost, Comment, Group, GroupStats, Post,
+    PostRevision, User
+)
+
+
+class SoftDeleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def test_delete_hides_post(self):
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group)
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='Комментарий')
+        post.delete()
+        comment.delete()
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        self.assertTrue(Post.all_objects.filter(pk=post.pk).exists())
+        self.assertFalse(self.author.posts.exists())
+        self.assertFalse(Comment.objects.thread(post.pk).exists())
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.post_count, 0)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_queryset_soft_delete(self):
+        for _ in range(3):
+            Post.objects.create(text='Пост', author=self.author)
+        self.assertEqual(Post.objects.all().soft_delete(), 3)
+        self.assertEqual(Post.objects.count(), 0)
+        self.assertEqual(Post.all_objects.count(), 3)
+
+    def test_delete_returns_counts(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        Post.objects.create(text='Пост', author=self.author)
+        self.assertEqual(post.delete(), (1, {'posts.Post': 1}))
+        self.assertEqual(
+            Post.all_objects.all().delete(), (1, {'posts.Post': 1}))
+        self.assertEqual(Post.all_objects.count(), 2)
+        self.assertEqual(
+            Post.all_objects.all().hard_delete(), (2, {'posts.Post': 2}))
+
+    def test_hard_delete_after_soft_delete_keeps_stats(self):
+        posts = [
+            Post.objects.create(
+                text='Пост', author=self.author, group=self.group)
+            for _ in range(2)
+        ]
+        posts[0].delete()
+        posts[0].hard_delete()
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.post_count, 1)
+
+    def test_admin_delete_selected_soft_deletes(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'delete_selected',
+            '_selected_action': [post.pk],
+            'post': 'yes',
+        })
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        self.assertTrue(Post.all_objects.filter(pk=post.pk).exists())
+
+    def test_feed_indexes_are_partial(self):
+        conditions = {
+            index.name: index.condition for index in Post._meta.indexes
+        }
+        self.assertIn('post_live_pub_date_idx', conditions)
+        self.assertTrue(all(conditions.values()))
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.old = Post.objects.create(
+            text='Старый', author=cls.author, group=cls.group)
+        cls.new = Post.objects.create(
+            text='Новый', author=cls.author, group=cls.group)
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=400))
+        cls.question = Comment.objects.create(
+            post=cls.old, author=cls.author, text='Вопрос')
+        cls.answer = Comment.objects.create(
+            post=cls.old, author=cls.author, text='Ответ',
+            parent=cls.question)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_archive_moves_old_posts_with_comments(self):
+        call_command('archive_posts', months=12, stdout=StringIO())
+        self.assertFalse(Post.all_objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(Comment.all_objects.filter(post_id=self.old.pk))
+        self.assertTrue(Post.objects.filter(pk=self.new.pk).exists())
+        archived = ArchivedPost.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.text_html, self.old.text_html)
+        self.assertEqual(
+            [c.text for c in ArchivedComment.objects.thread(self.old.pk)],
+            ['Вопрос', 'Ответ']
+        )
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.post_count, 1)
+
+    def test_post_detail_reads_archive(self):
+        archive.archive_posts(timezone.now() - timedelta(days=30))
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'Ответ')
+        self.assertNotContains(response, 'Добавить комментарий')
+
+    def test_profile_reads_archive_on_demand(self):
+        archive.archive_posts(timezone.now() - timedelta(days=30))
+        url = reverse('posts:profile', args=[self.author.username])
+        response = self.client.get(url)
+        self.assertEqual(list(response.context['page_obj']), [self.new])
+        self.assertTrue(response.context['has_archive'])
+        response = self.client.get(url, {'archive': 1})
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.old.pk]
+        )
+
+    def test_archived_post_keeps_history(self):
+        """Ревизии переезжают в архив вместе с постом."""
+        post = Post.objects.get(pk=self.old.pk)
+        revisions.record(post, post.text, 'Старый, исправленный')
+        post.text = 'Старый, исправленный'
+        post.save()
+        archive.archive_posts(timezone.now() - timedelta(days=365))
+        archived = ArchivedPost.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.text, 'Старый, исправленный')
+        self.assertEqual(revisions.text_at(archived, 1), 'Старый')
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('posts:post_history', args=[self.old.pk]),
+            {'version': 1}
+        )
+        self.assertContains(response, 'Старый')
+        archived.hard_delete()
+        self.assertFalse(
+            PostRevision.objects.filter(post_id=self.old.pk).exists())
+
+    def test_months_ago(self):
+        now = timezone.now().replace(year=2024, month=3, day=31)
+        self.assertEqual(archive.months_ago(14, now).date().isoformat(),
+                         '2023-01-28')
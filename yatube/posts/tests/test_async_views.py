@@ -0,0 +1,111 @@
+import threading
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import Http404
+from django.test import (
+    RequestFactory, TestCase, TransactionTestCase, override_settings
+)
+
+from core.concurrency import gather_queries
+from .. import async_views
+from ..models import Comment, Follow, Group, Post, User
+
+
+@override_settings(ASYNC_CONCURRENT_QUERIES=False)
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='group',
+            description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Асинхронный пост',
+            author=cls.author,
+            group=cls.group
+        )
+        Post.objects.create(text='Второй пост', author=cls.author)
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.reader,
+            text='Комментарий к посту'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        cache.clear()
+
+    def _get(self, view, user=None, path='/', **kwargs):
+        request = self.factory.get(path)
+        request.user = user or AnonymousUser()
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_index(self):
+        """Асинхронная главная страница выводит посты."""
+        response = self._get(async_views.index)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.post.text)
+
+    def test_out_of_range_page_falls_back_to_last(self):
+        """Номер страницы за пределами ленты дает последнюю страницу."""
+        response = self._get(async_views.index, path='/?page=99')
+        self.assertContains(response, self.post.text)
+
+    def test_group_list(self):
+        """Страница группы выводит только посты группы."""
+        response = self._get(async_views.group_list, slug=self.group.slug)
+        self.assertContains(response, self.post.text)
+        self.assertNotContains(response, 'Второй пост')
+        with self.assertRaises(Http404):
+            self._get(async_views.group_list, slug='missing')
+
+    def test_profile_following(self):
+        """Профиль показывает кнопку отписки подписчику."""
+        response = self._get(
+            async_views.profile, user=self.reader, username='author')
+        self.assertContains(response, 'Отписаться')
+        response = self._get(async_views.profile, username='author')
+        self.assertContains(response, 'Подписаться')
+
+    def test_post_detail(self):
+        """Страница поста выводит счетчик постов и комментарии."""
+        response = self._get(async_views.post_detail, post_id=self.post.id)
+        self.assertContains(response, 'Комментарий к посту')
+        self.assertContains(response, '<span > 2</span>', html=False)
+        with self.assertRaises(Http404):
+            self._get(async_views.post_detail, post_id=0)
+
+
+@override_settings(ASYNC_CONCURRENT_QUERIES=True)
+class ConcurrentQueriesTests(TransactionTestCase):
+    """Запросы в пуле потоков: каждый поток со своим соединением видит
+    только закоммиченные данные, поэтому здесь TransactionTestCase."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий')
+
+    def test_queries_run_in_worker_threads(self):
+        def query():
+            return threading.get_ident(), Post.objects.count()
+
+        results = async_to_sync(gather_queries)(query, query)
+        self.assertEqual([count for _, count in results], [1, 1])
+        self.assertNotIn(
+            threading.get_ident(), [ident for ident, _ in results])
+
+    def test_post_detail(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        response = async_to_sync(async_views.post_detail)(
+            request, post_id=self.post.pk)
+        self.assertContains(response, 'Комментарий')
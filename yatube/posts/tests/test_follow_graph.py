@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..follow_graph import FollowGraph
+from ..models import Follow, User
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.other = User.objects.create_user(username='other')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.niche = User.objects.create_user(username='niche')
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.user, author=cls.other)
+        Follow.objects.create(user=cls.friend, author=cls.popular)
+        Follow.objects.create(user=cls.other, author=cls.popular)
+        Follow.objects.create(user=cls.other, author=cls.niche)
+        Follow.objects.create(user=cls.friend, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_is_following_many_is_one_query(self):
+        """Проверка подписок на много авторов - один запрос."""
+        graph = FollowGraph(self.user)
+        with self.assertNumQueries(1):
+            result = graph.is_following_many(
+                [self.friend.pk, self.popular.pk, self.other.pk])
+        self.assertEqual(result, {
+            self.friend.pk: True, self.popular.pk: False, self.other.pk: True
+        })
+        with self.assertNumQueries(0):
+            FollowGraph(self.user).is_following(self.friend.pk)
+
+    def test_suggestions(self):
+        """Рекомендуются друзья друзей по числу общих подписок."""
+        self.assertEqual(
+            FollowGraph(self.user).suggestions(),
+            [self.popular.pk, self.niche.pk]
+        )
+
+    def test_follow_invalidates_cache(self):
+        """Подписка и отписка сбрасывают закешированное множество."""
+        self.assertFalse(FollowGraph(self.user).is_following(self.niche.pk))
+        self.client.get(reverse('posts:profile_follow', args=['niche']))
+        self.assertTrue(FollowGraph(self.user).is_following(self.niche.pk))
+        self.assertEqual(
+            FollowGraph(self.user).suggestions(), [self.popular.pk])
+        self.client.get(reverse('posts:profile_unfollow', args=['niche']))
+        self.assertFalse(FollowGraph(self.user).is_following(self.niche.pk))
+
+    def test_admin_edits_invalidate_cache(self):
+        """Правка и удаление подписки мимо представлений тоже сбрасывают
+        кеш, в том числе у прежнего подписчика."""
+        self.assertTrue(FollowGraph(self.user).is_following(self.other.pk))
+        self.assertFalse(FollowGraph(self.niche).is_following(self.other.pk))
+        follow = Follow.objects.get(user=self.user, author=self.other)
+        follow.user = self.niche
+        follow.save()
+        self.assertFalse(FollowGraph(self.user).is_following(self.other.pk))
+        self.assertTrue(FollowGraph(self.niche).is_following(self.other.pk))
+        Follow.objects.filter(user=self.niche).delete()
+        self.assertFalse(FollowGraph(self.niche).is_following(self.other.pk))
+
+    def test_follow_index_keeps_suggestion_order(self):
+        with mock.patch.object(
+                FollowGraph, 'suggestions',
+                return_value=[self.niche.pk, self.popular.pk]):
+            response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            response.context['suggested_authors'], [self.niche, self.popular])
+
+    def test_precompute_command(self):
+        """Команда заранее кладет рекомендации в кеш."""
+        call_command('compute_follow_suggestions', verbosity=0)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                FollowGraph(self.user).suggestions(),
+                [self.popular.pk, self.niche.pk]
+            )
@@ -0,0 +1,106 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import moderation
+from ..models import Group, GroupStats, Post, User
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(username='alice')
+        cls.bob = User.objects.create_user(username='bob')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='')
+        cls.other = Group.objects.create(
+            title='Другая', slug='other', description='')
+
+    def _stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_create_edit_delete_update_stats(self):
+        """Создание, перенос и удаление поста меняют счетчики."""
+        posts = [Post.objects.create(text='т', author=self.alice,
+                                     group=self.group) for _ in range(2)]
+        bob_post = Post.objects.create(
+            text='т', author=self.bob, group=self.group)
+        stats = self._stats(self.group)
+        self.assertEqual(stats.post_count, 3)
+        self.assertEqual(stats.last_activity, bob_post.pub_date)
+        self.assertEqual(stats.top_authors, [self.alice.pk, self.bob.pk])
+
+        post = Post.objects.get(pk=posts[0].pk)
+        post.group = self.other
+        post.save()
+        self.assertEqual(self._stats(self.group).post_count, 2)
+        self.assertEqual(self._stats(self.other).post_count, 1)
+
+        Post.objects.get(pk=posts[1].pk).delete()
+        stats = self._stats(self.group)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(stats.top_authors, [self.bob.pk])
+
+    def test_last_activity_follows_newest_post(self):
+        """Перенос и удаление самого нового поста сдвигают последнюю
+        активность назад, к оставшимся постам."""
+        old, new = [
+            Post.objects.create(text='т', author=self.alice, group=self.group)
+            for _ in range(2)
+        ]
+        new.group = self.other
+        new.save()
+        self.assertEqual(self._stats(self.group).last_activity, old.pub_date)
+        self.assertEqual(self._stats(self.other).last_activity, new.pub_date)
+        old.hard_delete()
+        self.assertIsNone(self._stats(self.group).last_activity)
+
+    def test_soft_delete_updates_stats_per_post(self):
+        """Мягкое удаление вычитает посты из счетчиков без пересчета
+        всей группы."""
+        old = Post.objects.create(
+            text='т', author=self.alice, group=self.group)
+        new = Post.objects.create(text='т', author=self.bob, group=self.group)
+        with mock.patch('posts.group_stats.recompute') as recompute:
+            Post.objects.filter(pk=new.pk).delete()
+        recompute.assert_not_called()
+        stats = self._stats(self.group)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(stats.last_activity, old.pub_date)
+        self.assertEqual(stats.top_authors, [self.alice.pk])
+
+    def test_moderation_recomputes_stats(self):
+        for _ in range(3):
+            Post.objects.create(text='т', author=self.alice, group=self.group)
+        moderation.move_posts(Post.objects.all(), self.other)
+        self.assertEqual(self._stats(self.group).post_count, 0)
+        self.assertEqual(self._stats(self.other).post_count, 3)
+        moderation.delete_user_content(self.alice)
+        self.assertEqual(self._stats(self.other).post_count, 0)
+
+    def test_recompute_command(self):
+        Post.objects.create(text='т', author=self.bob, group=self.group)
+        GroupStats.objects.all().delete()
+        call_command('recompute_group_stats', stdout=StringIO())
+        self.assertEqual(self._stats(self.group).post_count, 1)
+        self.assertEqual(self._stats(self.other).post_count, 0)
+
+    def test_directory_page(self):
+        """Каталог выводит группы одним запросом к группам и одним к
+        авторам."""
+        Post.objects.create(text='т', author=self.bob, group=self.group)
+        with self.assertNumQueries(3):
+            response = Client().get(reverse('posts:group_directory'))
+        self.assertContains(response, 'Постов: 1')
+        self.assertContains(response, 'Постов: 0')
+        self.assertContains(response, '>bob</a>')
+
+    def test_directory_shows_current_usernames(self):
+        Post.objects.create(text='т', author=self.bob, group=self.group)
+        User.objects.filter(pk=self.bob.pk).update(username='robert')
+        response = Client().get(reverse('posts:group_directory'))
+        self.assertContains(response, '>robert</a>')
+        self.assertNotContains(response, '>bob</a>')
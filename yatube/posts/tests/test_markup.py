@@ -0,0 +1,90 @@
+from importlib import import_module
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ..markup import render
+from ..models import Comment, Post, User
+
+
+class MarkupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+
+    def test_markdown(self):
+        html = render('**жирный** и *курсив*\n\n- раз\n- два')
+        self.assertIn('<strong>жирный</strong>', html)
+        self.assertIn('<em>курсив</em>', html)
+        self.assertIn('<li>раз</li>', html)
+
+    def test_html_is_sanitized(self):
+        html = render('<script>alert(1)</script> [x](javascript:alert(1))')
+        self.assertNotIn('<script', html)
+        self.assertNotIn('javascript:', html)
+
+    def test_links_and_mentions(self):
+        html = render('см. https://example.com, @author и @nobody')
+        self.assertIn(
+            '<a href="https://example.com" rel="nofollow">', html)
+        profile = reverse('posts:profile', args=['author'])
+        self.assertIn(
+            f'<a href="{profile}" rel="nofollow">@author</a>', html)
+        self.assertIn('@nobody', html)
+        self.assertNotIn('/profile/nobody/', html)
+
+    def test_mentions_inside_urls_are_not_linked(self):
+        html = render(
+            'https://medium.com/@author и www.example.com/?u=@author')
+        self.assertIn(
+            '<a href="https://medium.com/@author" rel="nofollow">'
+            'https://medium.com/@author</a>', html)
+        self.assertNotIn('/profile/author/', html)
+        html = render('[статья](https://medium.com/@author), @author')
+        self.assertIn('href="https://medium.com/@author"', html)
+        self.assertEqual(html.count('/profile/author/'), 1)
+
+    def test_code_is_not_linked(self):
+        html = render('`https://example.com @author`')
+        self.assertNotIn('<a', html)
+
+    def test_html_is_stored_on_save(self):
+        post = Post.objects.create(text='*пост*', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='*комментарий*')
+        self.assertEqual(post.text_html, '<p><em>пост</em></p>')
+        self.assertEqual(comment.text_html, '<p><em>комментарий</em></p>')
+        post.text = '**новый**'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p><strong>новый</strong></p>')
+
+    def test_html_is_stored_on_bulk_create(self):
+        Post.objects.bulk_create([
+            Post(text='*пост*', author=self.author),
+            Post(text='*пост*', text_html='<p>готово</p>', author=self.author),
+        ])
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'text_html', flat=True)),
+            ['<p><em>пост</em></p>', '<p>готово</p>']
+        )
+
+    def test_migration_renderer_matches(self):
+        """Замороженная копия в миграции 0009 пока совпадает с render()."""
+        migration = import_module('posts.migrations.0009_text_html')
+        text = (
+            '*пост* @author https://example.com/@author\n```\n@author\n```')
+        self.assertEqual(
+            migration.render(text, lambda candidates: {'author'}),
+            render(text)
+        )
+
+    def test_templates_serve_stored_html(self):
+        post = Post.objects.create(text='*пост*', author=self.author)
+        Comment.objects.create(
+            post=post, author=self.author, text='**ответ**')
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertContains(response, '<em>пост</em>', html=True)
+        self.assertContains(response, '<strong>ответ</strong>', html=True)
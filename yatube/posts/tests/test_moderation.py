@@ -0,0 +1,115 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import moderation, trends
+from ..models import Comment, Group, Post, User
+
+
+class ModerationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='')
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other', description='')
+        cls.spam_posts = [
+            Post.objects.create(
+                text=f'Спам {i}', author=cls.spammer, group=cls.group)
+            for i in range(5)
+        ]
+        cls.post = Post.objects.create(
+            text='Нормальный пост', author=cls.reader, group=cls.group)
+        Comment.objects.create(
+            post=cls.spam_posts[0], author=cls.reader, text='Ответ на спам')
+        Comment.objects.create(
+            post=cls.post, author=cls.spammer, text='купи slot сейчас')
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Нормальный коммент')
+
+    def test_delete_user_content(self):
+        """Удаляются посты, комментарии к ним и комментарии автора."""
+        progress = []
+        total = moderation.delete_user_content(
+            self.spammer, chunk_size=2, progress=progress.append)
+        self.assertEqual(total, 6)
+        self.assertEqual(progress, [2, 4, 5, 1])
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)),
+            ['Нормальный коммент']
+        )
+
+    def test_move_posts(self):
+        """Посты переносятся в другую группу и убираются из групп."""
+        moved = moderation.move_posts(
+            Post.objects.filter(author=self.spammer), self.other_group,
+            chunk_size=2)
+        self.assertEqual(moved, 5)
+        self.assertEqual(self.other_group.posts.count(), 5)
+        moderation.move_posts(Post.objects.filter(group=self.group), None)
+        self.assertEqual(Post.objects.filter(group=None).count(), 1)
+
+    def test_purge_comments(self):
+        """Удаляются только комментарии, подходящие под выражение."""
+        self.assertEqual(moderation.purge_comments(r'slot|казино'), 1)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_command(self):
+        """Команда moderate выполняет действие и пишет прогресс."""
+        out = StringIO()
+        call_command(
+            'moderate', '--chunk-size', '3', 'move-posts', 'group', 'other',
+            stdout=out)
+        self.assertIn('обработано 3', out.getvalue())
+        self.assertEqual(self.other_group.posts.count(), 6)
+
+    def test_admin_move_action(self):
+        """Действие админки переносит выбранные посты."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        client = Client()
+        client.force_login(admin)
+        client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'move_to_group',
+            '_selected_action': [self.post.pk],
+            'group': self.other_group.pk,
+        })
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.group, self.other_group)
+
+    def test_delete_removes_posts_from_trending(self):
+        cache.clear()
+        for post in self.spam_posts + [self.post]:
+            trends.record_post(post)
+        self.assertEqual(len(trends.ranking()), 6)
+        moderation.delete_user_content(self.spammer)
+        self.assertEqual(trends.page_post_ids(0, 10), [self.post.pk])
+
+    def test_admin_purge_only_selected(self):
+        """Чистка затрагивает только выбранные комментарии."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        extra = Comment.objects.create(
+            post=self.post, author=self.reader, text='еще slot')
+        client = Client()
+        client.force_login(admin)
+        client.post(reverse('admin:posts_comment_changelist'), {
+            'action': 'purge_matching_comments',
+            '_selected_action': [extra.pk],
+            'pattern': 'slot',
+        })
+        self.assertFalse(Comment.objects.filter(pk=extra.pk).exists())
+        self.assertTrue(
+            Comment.objects.filter(text='купи slot сейчас').exists())
+        response = client.post(reverse('admin:posts_comment_changelist'), {
+            'action': 'purge_matching_comments',
+            '_selected_action': [extra.pk],
+            'pattern': '(',
+        }, follow=True)
+        self.assertContains(response, 'Неверное регулярное выражение')
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import notifications
+from ..models import Comment, Follow, Notification, Post, User
+
+INLINE = override_settings(NOTIFICATIONS={
+    'BACKGROUND': False,
+    'KEEP_DAYS': 30,
+    'AGGREGATE_AFTER_DAYS': 1,
+})
+
+
+@INLINE
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_post_create_notifies_followers_in_batches(self):
+        followers = [
+            User.objects.create_user(username=f'follower{index}')
+            for index in range(5)
+        ]
+        for follower in followers:
+            Follow.objects.create(user=follower, author=self.author)
+        with mock.patch.object(notifications, 'BATCH_SIZE', 2):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.author_client.post(
+                    reverse('posts:post_create'), {'text': 'Новый'})
+        recipients = set(Notification.objects.filter(
+            verb=Notification.POST).values_list('recipient_id', flat=True))
+        self.assertEqual(
+            recipients, {self.reader.pk} | {f.pk for f in followers})
+
+    def test_comments_are_aggregated(self):
+        """Непрочитанные комментарии к посту - одна строка со счетчиком."""
+        for client in (self.reader_client, self.reader_client):
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post(
+                    reverse('posts:add_comment', args=[self.post.pk]),
+                    {'text': 'Комментарий'}
+                )
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.count, 2)
+        self.assertEqual(notification.verb, Notification.COMMENT)
+
+    def test_one_unread_comment_row_per_post(self):
+        notifications.fan_out_comment(self.post.pk, self.reader.pk)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(
+                recipient=self.author, actor=self.other,
+                verb=Notification.COMMENT, post=self.post)
+        Notification.objects.update(is_read=True)
+        notifications.fan_out_comment(self.post.pk, self.other.pk)
+        self.assertEqual(
+            list(Notification.objects.order_by('id').values_list(
+                'is_read', 'count', 'actor_id')),
+            [(True, 1, self.reader.pk), (False, 1, self.other.pk)]
+        )
+
+    def test_participants_are_notified(self):
+        Comment.objects.create(post=self.post, author=self.other, text='Я')
+        notifications.fan_out_comment(self.post.pk, self.reader.pk)
+        self.assertEqual(
+            set(Notification.objects.values_list('recipient_id', flat=True)),
+            {self.author.pk, self.other.pk}
+        )
+
+    def test_unread_count_is_cached(self):
+        notifications.fan_out_post(self.post.pk, self.author.pk)
+        self.assertEqual(notifications.unread_count(self.reader), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.reader), 1)
+        notifications.fan_out_post(self.post.pk, self.author.pk)
+        self.assertEqual(notifications.unread_count(self.reader), 2)
+        self.reader_client.post(reverse('posts:notifications_read'))
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.reader), 0)
+
+    def test_unread_count_expires_soon_with_local_cache(self):
+        with mock.patch.object(cache, 'set') as cache_set:
+            notifications.unread_count(self.reader)
+        self.assertEqual(
+            cache_set.call_args[0][2], notifications.LOCAL_UNREAD_TIMEOUT)
+        with mock.patch.object(notifications, 'is_shared', return_value=True):
+            with mock.patch.object(cache, 'set') as cache_set:
+                notifications.mark_all_read(self.reader)
+        self.assertEqual(
+            cache_set.call_args[0][2], notifications.UNREAD_TIMEOUT)
+
+    def test_inbox_keyset_pages(self):
+        for _ in range(notifications.PAGE_SIZE + 3):
+            notifications.fan_out_post(self.post.pk, self.author.pk)
+        response = self.reader_client.get(reverse('posts:notifications'))
+        first = response.context['notifications']
+        self.assertEqual(len(first), notifications.PAGE_SIZE)
+        response = self.reader_client.get(
+            reverse('posts:notifications'),
+            {'before': response.context['next_before']}
+        )
+        rest = response.context['notifications']
+        self.assertEqual(len(rest), 3)
+        self.assertIsNone(response.context['next_before'])
+        self.assertLess(rest[0].pk, first[-1].pk)
+
+    def test_compact(self):
+        old = timezone.now() - timedelta(days=40)
+        for _ in range(3):
+            notifications.fan_out_post(self.post.pk, self.author.pk)
+        Notification.objects.update(created=old)
+        Notification.objects.create(
+            recipient=self.other, actor=self.author, post=self.post,
+            verb=Notification.POST, is_read=True, created=old
+        )
+        self.assertEqual(notifications.compact(), (1, 2))
+        notification = Notification.objects.get()
+        self.assertEqual(notification.count, 3)
+        self.assertEqual(notification.recipient, self.reader)
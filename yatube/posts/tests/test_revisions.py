@@ -0,0 +1,127 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import revisions
+from ..models import Post, PostRevision, User
+
+
+@override_settings(REVISIONS_SNAPSHOT_EVERY=3)
+class PostRevisionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Первая строка\nВторая строка\n', author=self.author)
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def edit(self, text):
+        revisions.record(self.post, self.post.text, text, self.author)
+        self.post.text = text
+        self.post.save()
+
+    def test_rebuild_every_version(self):
+        versions = [self.post.text]
+        for index in range(1, 8):
+            text = '\n'.join(
+                f'Строка {line} правка {index if line == index else 0}'
+                for line in range(8)
+            )
+            versions.append(text)
+            self.edit(text)
+        self.assertEqual(
+            list(self.post.revisions.filter(is_snapshot=True)
+                 .values_list('number', flat=True).order_by('number')),
+            [3, 6]
+        )
+        for number, text in enumerate(versions[:-1], start=1):
+            with self.subTest(number=number):
+                with self.assertNumQueries(1):
+                    self.assertEqual(
+                        revisions.text_at(self.post, number), text)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                revisions.texts(self.post),
+                dict(enumerate(versions[:-1], start=1))
+            )
+
+    def test_diff_round_trip(self):
+        old = 'a\nb\nc\n'
+        new = 'a\nx\nc\nd'
+        self.assertEqual(revisions.patch(new, revisions.diff(new, old)), old)
+
+    def test_same_text_is_not_recorded(self):
+        self.assertIsNone(
+            revisions.record(self.post, self.post.text, self.post.text))
+        self.assertFalse(self.post.revisions.exists())
+
+    def test_missing_version(self):
+        with self.assertRaises(PostRevision.DoesNotExist):
+            revisions.text_at(self.post, 1)
+
+    def test_post_edit_records_revision(self):
+        old_text = self.post.text
+        self.client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': 'Новый текст'}
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Новый текст')
+        revision = self.post.revisions.get()
+        self.assertEqual(revision.editor, self.author)
+        self.assertEqual(revisions.text_at(self.post, 1), old_text)
+
+    def test_history_view(self):
+        self.edit('Новый текст')
+        url = reverse('posts:post_history', args=[self.post.pk])
+        response = self.client.get(url, {'version': 1})
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertContains(response, 'Вторая строка')
+        self.assertEqual(
+            self.client.get(url, {'version': 5}).status_code, 404)
+        self.client.force_login(self.reader)
+        self.assertRedirects(
+            self.client.get(url),
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+
+    def test_admin_edit_and_inline(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        url = reverse('admin:posts_post_change', args=[self.post.pk])
+        self.client.post(url, {
+            'text': 'Правка модератора',
+            'author': self.author.pk,
+            'pub_date_0': '2024-01-01',
+            'pub_date_1': '12:00:00',
+            'revisions-TOTAL_FORMS': 0,
+            'revisions-INITIAL_FORMS': 0,
+        })
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Правка модератора')
+        self.assertEqual(self.post.revisions.get().editor, admin)
+        self.assertContains(self.client.get(url), 'Вторая строка')
+
+    def test_admin_inline_reads_revisions_once(self):
+        for index in range(5):
+            self.edit(f'Версия {index}')
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        url = reverse('admin:posts_post_change', args=[self.post.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, 'Версия 3')
+        self.assertEqual(
+            sum('posts_postrevision' in query['sql']
+                for query in queries.captured_queries),
+            2
+        )
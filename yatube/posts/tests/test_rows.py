@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from ..rows import PostRow, feed_rows
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class FeedRowsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Имя', last_name='Фамилия')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            text='С картинкой', author=cls.author, group=cls.group,
+            image=SimpleUploadedFile('small.gif', GIF, 'image/gif'))
+        cls.plain = Post.objects.create(text='Без группы', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rows(self):
+        with self.assertNumQueries(1):
+            rows = list(feed_rows(Post.objects.order_by('pk')))
+        self.assertEqual(rows, [self.post, self.plain])
+        self.assertIsInstance(rows[0], PostRow)
+        self.assertEqual(rows[0].image, self.post.image.name)
+        self.assertEqual(rows[0].author.get_full_name(), 'Имя Фамилия')
+        self.assertEqual(rows[0].group.slug, 'group')
+        self.assertIsNone(rows[1].group)
+        self.assertFalse(hasattr(rows[0], '__dict__'))
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_feed_queries_do_not_grow_with_authors(self):
+        url = reverse('posts:index')
+        self.count_queries(url)
+        before = self.count_queries(url)
+        for index in range(5):
+            author = User.objects.create_user(username=f'user_{index}')
+            Post.objects.create(text='Пост', author=author, group=self.group)
+        self.assertEqual(self.count_queries(url), before)
+
+    def test_feeds_render_rows(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['group']),
+            reverse('posts:profile', args=['author']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, '<img class="card-img')
+                self.assertContains(response, 'Имя Фамилия')
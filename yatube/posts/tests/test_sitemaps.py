@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as etree
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import revisions, sitemaps
+from ..models import Group, Post, User
+
+SITEMAP = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+BASE_URL = 'https://yatube.example'
+
+
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {index}', author=cls.author)
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings = override_settings(
+            SITEMAPS={'ROOT': root, 'BASE_URL': BASE_URL})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Части по два pk: посты попадают в несколько частей.
+        patcher = mock.patch.object(sitemaps, 'CHUNK_SIZE', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def locs(self, name=None):
+        tree = etree.parse(sitemaps.sitemap_path(name))
+        return [element.text for element in tree.iter(SITEMAP + 'loc')]
+
+    def post_chunk(self, post):
+        return sitemaps.chunk_name('posts', post.pk // 2)
+
+    def test_generate_writes_index_and_chunks(self):
+        written, removed = sitemaps.generate()
+        self.assertEqual(removed, [])
+        self.assertEqual(
+            self.locs(),
+            [
+                BASE_URL + reverse('posts:sitemap_chunk', args=[name])
+                for name in written
+            ]
+        )
+        post_urls = [
+            loc for name in written if name.startswith('posts-')
+            for loc in self.locs(name)
+        ]
+        self.assertEqual(post_urls, [
+            BASE_URL + reverse('posts:post_detail', args=[post.pk])
+            for post in self.posts
+        ])
+        self.assertEqual(
+            self.locs(sitemaps.chunk_name('groups', self.group.pk // 2)),
+            [BASE_URL + reverse('posts:group_list', args=['group'])]
+        )
+        self.assertIn(
+            BASE_URL + reverse('posts:profile', args=['author']),
+            self.locs(sitemaps.chunk_name('profiles', self.author.pk // 2))
+        )
+
+    def test_only_changed_chunks_are_rewritten(self):
+        sitemaps.generate()
+        self.assertEqual(sitemaps.generate(), ([], []))
+
+        post = self.posts[0]
+        revisions.record(post, post.text, 'Новый текст')
+        self.assertEqual(sitemaps.generate(), ([self.post_chunk(post)], []))
+
+        post.delete()
+        written, removed = sitemaps.generate()
+        self.assertIn(self.post_chunk(post), written + removed)
+        self.assertNotIn(
+            BASE_URL + reverse('posts:post_detail', args=[post.pk]),
+            self.locs()
+            + [loc for name in written for loc in self.locs(name)]
+        )
+
+    def test_empty_chunk_is_removed(self):
+        sitemaps.generate()
+        post = self.posts[-1]
+        chunk = post.pk // 2
+        Post.objects.filter(pk__gte=chunk * 2, pk__lt=chunk * 2 + 2).delete()
+        _, removed = sitemaps.generate()
+        self.assertEqual(removed, [self.post_chunk(post)])
+        self.assertFalse(
+            os.path.exists(sitemaps.sitemap_path(self.post_chunk(post))))
+
+    def test_command_force_rewrites_all(self):
+        sitemaps.generate()
+        out = StringIO()
+        call_command('generate_sitemaps', force=True, stdout=out)
+        self.assertIn('удалено 0', out.getvalue())
+        self.assertNotIn('записано 0', out.getvalue())
+
+    def test_views(self):
+        self.assertEqual(
+            self.client.get(reverse('posts:sitemap')).status_code, 404)
+        written, _ = sitemaps.generate()
+        response = self.client.get(reverse('posts:sitemap'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=3600', response['Cache-Control'])
+        response = self.client.get(
+            reverse('posts:sitemap_chunk', args=[written[0]]))
+        self.assertEqual(response.status_code, 200)
+        robots = self.client.get(reverse('posts:robots_txt'))
+        self.assertContains(
+            robots, 'Sitemap: http://testserver/sitemap.xml')
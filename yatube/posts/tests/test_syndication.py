@@ -0,0 +1,119 @@
+import xml.etree.ElementTree as etree
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import syndication
+from ..models import Group, Post, User
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class SyndicationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост **{index}**', author=cls.author, group=cls.group)
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(
+            syndication, 'is_shared', return_value=True)
+        self.shared = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, name, *args, **headers):
+        response = self.client.get(reverse(name, args=args), **headers)
+        if response.status_code == 200:
+            response.body = b''.join(response.streaming_content)
+        return response
+
+    def test_atom_feed(self):
+        response = self.get('posts:feed', 'atom')
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/atom+xml'))
+        root = etree.fromstring(response.body)
+        titles = [entry.find(f'{ATOM}title').text
+                  for entry in root.iter(f'{ATOM}entry')]
+        self.assertEqual(titles, ['Пост 2', 'Пост 1', 'Пост 0'])
+        self.assertIn('&lt;strong&gt;2&lt;/strong&gt;', response.body.decode())
+
+    def test_rss_feeds(self):
+        for args in (('posts:group_feed', 'group', 'rss'),
+                     ('posts:author_feed', 'author', 'rss')):
+            with self.subTest(args=args):
+                root = etree.fromstring(self.get(*args).body)
+                self.assertEqual(len(root.findall('channel/item')), 3)
+        self.assertEqual(
+            self.get('posts:group_feed', 'missing', 'rss').status_code, 404)
+
+    def test_keyset_entries(self):
+        for _ in range(4):
+            Post.objects.create(text='Еще', author=self.other)
+        Post.objects.update(pub_date=timezone.now())
+        with self.assertNumQueries(3):
+            pks = [row.pk for row in syndication.entries(
+                Post.objects.all(), size=6, chunk_size=2)]
+        expected = list(
+            Post.objects.order_by('-pk').values_list('pk', flat=True)[:6])
+        self.assertEqual(pks, expected)
+
+    def test_not_modified_without_queries(self):
+        response = self.get('posts:feed', 'atom')
+        self.assertIn('max-age', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            response = self.get(
+                'posts:feed', 'atom', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_only_its_feeds(self):
+        etags = {
+            args: self.get(*args)['ETag'] for args in (
+                ('posts:feed', 'atom'),
+                ('posts:group_feed', 'group', 'atom'),
+                ('posts:group_feed', 'other', 'atom'),
+                ('posts:author_feed', 'author', 'atom'),
+                ('posts:author_feed', 'other', 'atom'),
+            )
+        }
+        Post.objects.create(text='Новый', author=self.other,
+                            group=self.other_group)
+        changed = {
+            args for args, etag in etags.items()
+            if self.get(*args, HTTP_IF_NONE_MATCH=etag).status_code != 304
+        }
+        self.assertEqual(changed, {
+            ('posts:feed', 'atom'),
+            ('posts:group_feed', 'other', 'atom'),
+            ('posts:author_feed', 'other', 'atom'),
+        })
+
+    def test_local_cache_disables_conditional_responses(self):
+        self.shared.return_value = False
+        response = self.get('posts:feed', 'atom')
+        self.assertNotIn('ETag', response)
+        response = self.get(
+            'posts:feed', 'atom', HTTP_IF_MODIFIED_SINCE=(
+                'Fri, 01 Jan 2100 00:00:00 GMT'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_unrelated_save_does_not_touch_feeds(self):
+        post = Post.objects.get(pk=self.posts[0].pk)
+        with mock.patch.object(syndication, 'touch_posts') as touch_posts:
+            post.image = 'posts/other.png'
+            post.save(update_fields=['image'])
+            post.save()
+            touch_posts.assert_not_called()
+            post.text = 'Правка'
+            post.save()
+            touch_posts.assert_called_once()
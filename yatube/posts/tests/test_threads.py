@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        cls.other_post = Post.objects.create(text='Другой', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            post=self.post, author=self.user, text=text, parent=parent)
+
+    def test_thread_order(self):
+        """Ответы идут сразу после своего комментария."""
+        first = self.comment('1')
+        second = self.comment('2')
+        reply = self.comment('1.1', first)
+        self.comment('1.1.1', reply)
+        self.comment('2.1', second)
+        self.comment('1.2', first)
+        with self.assertNumQueries(1):
+            texts = [c.text for c in Comment.objects.thread(self.post.pk)]
+        self.assertEqual(texts, ['1', '1.1', '1.1.1', '1.2', '2', '2.1'])
+
+    def test_subtree_and_depth_limit(self):
+        first = self.comment('1')
+        reply = self.comment('1.1', first)
+        self.comment('1.1.1', reply)
+        self.comment('2')
+        self.assertEqual(
+            [c.text for c in Comment.objects.thread(self.post.pk, root=first)],
+            ['1', '1.1', '1.1.1']
+        )
+        self.assertEqual(
+            [c.text for c in Comment.objects.thread(
+                self.post.pk, max_depth=1)],
+            ['1', '1.1', '2']
+        )
+
+    def test_depth_is_limited(self):
+        comment = self.comment('0')
+        for level in range(1, Comment.MAX_DEPTH + 2):
+            comment = self.comment(str(level), comment)
+        self.assertEqual(comment.depth, Comment.MAX_DEPTH - 1)
+        self.assertLessEqual(
+            len(comment.path), Comment._meta.get_field('path').max_length)
+
+    def test_reply_through_add_comment(self):
+        parent = self.comment('Вопрос')
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Ответ', 'parent': parent.pk}
+        )
+        reply = Comment.objects.get(text='Ответ')
+        self.assertEqual(reply.parent, parent)
+        self.assertEqual(reply.depth, 1)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertEqual(list(response.context['comments']), [parent, reply])
+
+    def test_reply_to_other_post_is_rejected(self):
+        foreign = Comment.objects.create(
+            post=self.other_post, author=self.user, text='Чужой')
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Ответ', 'parent': foreign.pk}
+        )
+        self.assertFalse(Comment.objects.filter(text='Ответ').exists())
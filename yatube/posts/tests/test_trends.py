@@ -0,0 +1,88 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trends
+from ..models import Comment, Post, User
+
+
+class TrendsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(text='Старый', author=cls.author)
+        cls.new_post = Post.objects.create(text='Новый', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_comments_raise_post(self):
+        """Комментарий поднимает пост выше поста без обсуждения."""
+        now = timezone.now()
+        trends.add_score(self.new_post.pk, trends.POST_WEIGHT, now)
+        trends.add_score(self.old_post.pk, trends.POST_WEIGHT, now)
+        trends.add_score(self.old_post.pk, trends.COMMENT_WEIGHT, now)
+        self.assertEqual(
+            trends.page_post_ids(0, 2), [self.old_post.pk, self.new_post.pk])
+
+    def test_scores_decay(self):
+        """Старая активность весит меньше свежей."""
+        now = timezone.now()
+        trends.add_score(
+            self.old_post.pk, trends.COMMENT_WEIGHT, now - timedelta(days=1))
+        trends.add_score(self.new_post.pk, trends.POST_WEIGHT, now)
+        self.assertEqual(trends.page_post_ids(0, 1), [self.new_post.pk])
+
+    def test_size_is_bounded(self):
+        now = timezone.now()
+        Post.objects.bulk_create(
+            Post(text='Пост', author=self.author)
+            for _ in range(trends.TRENDING_SIZE + 5)
+        )
+        for post_id in Post.objects.values_list('pk', flat=True):
+            trends.add_score(post_id, 1, now)
+        self.assertEqual(len(trends.ranking()), trends.TRENDING_SIZE)
+
+    def test_views_update_ranking(self):
+        """Комментарий через add_comment попадает в рейтинг страницы."""
+        self.client.post(
+            reverse('posts:add_comment', args=[self.old_post.pk]),
+            {'text': 'Отличный пост'}
+        )
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.old_post])
+
+    def test_rebuild(self):
+        Comment.objects.create(
+            post=self.old_post, author=self.reader, text='Коммент')
+        call_command('rebuild_trending', stdout=StringIO())
+        self.assertEqual(
+            trends.page_post_ids(0, 2), [self.old_post.pk, self.new_post.pk])
+
+    def test_deleted_posts_leave_ranking(self):
+        now = timezone.now()
+        trends.add_score(self.old_post.pk, trends.COMMENT_WEIGHT, now)
+        trends.add_score(self.new_post.pk, trends.POST_WEIGHT, now)
+        self.old_post.delete()
+        self.assertEqual(trends.page_post_ids(0, 2), [self.new_post.pk])
+
+    def test_updates_are_not_lost(self):
+        """Каждое событие увеличивает счетчик, а не переписывает
+        общий список: конкурентные записи не затирают друг друга."""
+        now = timezone.now()
+        for _ in range(3):
+            trends.add_score(self.new_post.pk, trends.POST_WEIGHT, now)
+        trends.add_score(self.old_post.pk, trends.POST_WEIGHT, now)
+        bucket = trends._bucket(now)
+        self.assertEqual(
+            cache.get(trends.SCORE_KEY.format(bucket, self.new_post.pk)), 3)
+        self.assertEqual(cache.get(trends.SLOTS_KEY.format(bucket)), 2)
@@ -0,0 +1,63 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import trends, warmup
+from ..models import Group, Post, User
+
+
+class WarmupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_urls(self):
+        trends.record_post(self.post)
+        self.assertEqual(warmup.urls(pages=2), [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', args=['group']),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:profile', args=['author']),
+        ])
+
+    def test_warm_fills_index_cache(self):
+        warmed = warmup.warm(pages=1, concurrency=1)
+        self.assertEqual([status for _, status, _ in warmed], [200] * 4)
+        Post.objects.filter(pk=self.post.pk).update(
+            text_html='<p>Изменено</p>')
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Изменено')
+
+    @override_settings(ALLOWED_HOSTS=['.yatube.example'])
+    def test_warm_uses_allowed_host(self):
+        warmed = warmup.warm(pages=1, concurrency=1)
+        self.assertEqual([status for _, status, _ in warmed], [200] * 4)
+
+    def test_command_reports(self):
+        out = StringIO()
+        call_command('warm_caches', concurrency=1, stdout=out)
+        self.assertIn('Прогрето страниц: 6, с ошибкой: 0', out.getvalue())
+
+    def test_startup_hook_runs_once(self):
+        with mock.patch.object(warmup, 'warm', return_value=[]) as warm:
+            warmup.warm_on_startup().join()
+            self.assertIsNone(warmup.warm_on_startup())
+        warm.assert_called_once()
+
+    def test_preload_defers_warmup_to_forked_workers(self):
+        with mock.patch.object(warmup.os, 'register_at_fork') as register:
+            warmup.warm_after_fork()
+        register.assert_called_once_with(
+            after_in_child=warmup.warm_on_startup)
+        self.assertIsNone(cache.get(warmup.LOCK_KEY))
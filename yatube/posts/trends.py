@@ -0,0 +1,200 @@
+"""Рейтинг "в тренде" на атомарных операциях кеша.
+
+Вклад события весом w в момент t равен w * 2**((t - EPOCH) /
+HALF_LIFE): так отношение очков двух постов не меняется со временем,
+и затухание не требует пересчета накопленных очков. Очки считаются в
+log2, чтобы не переполнять float.
+
+События складываются в часовые корзины: у поста в корзине свой
+счетчик весов (cache.incr), а первый его счетчик в корзине занимает
+слот через cache.add и incr номера слота. Запись не читает и не
+переписывает общих значений, поэтому воркеры с общим кешем не теряют
+обновлений друг друга. Корзины живут WINDOW_DAYS дней.
+
+ranking() собирает рейтинг из корзин окна, отбрасывает удаленные
+посты и кеширует результат на RANKING_TIMEOUT секунд. С кешем одного
+процесса (locmem) у каждого воркера свой рейтинг.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Comment, Post
+
+TRENDING_KEY = 'posts:trending'
+SCORE_KEY = 'posts:trending:{}:{}'
+SLOTS_KEY = 'posts:trending:{}:slots'
+SLOT_KEY = 'posts:trending:{}:slot:{}'
+TRENDING_SIZE = 500
+RANKING_TIMEOUT = 60
+BUCKET_SECONDS = 60 * 60
+WINDOW_DAYS = 7
+HALF_LIFE = 6 * 60 * 60
+EPOCH = 1_600_000_000
+POST_WEIGHT = 1
+COMMENT_WEIGHT = 3
+FOLLOW_WEIGHT = 5
+
+
+def _log_weight(weight, timestamp):
+    return math.log2(weight) + (timestamp - EPOCH) / HALF_LIFE
+
+
+def _log_add(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def _bucket(when):
+    return int(when.timestamp()) // BUCKET_SECONDS
+
+
+def _timeout(bucket, now):
+    """Сколько секунд корзина еще остается в окне."""
+    expires = (bucket + 1) * BUCKET_SECONDS + WINDOW_DAYS * 24 * 60 * 60
+    return int(expires - now.timestamp())
+
+
+def _next_slot(bucket, timeout):
+    key = SLOTS_KEY.format(bucket)
+    cache.add(key, 0, timeout)
+    return cache.incr(key)
+
+
+def add_score(post_id, weight, when=None):
+    """Добавляет посту вклад события весом weight (целое число)."""
+    now = timezone.now()
+    bucket = _bucket(when or now)
+    timeout = _timeout(bucket, now)
+    if timeout <= 0:
+        return
+    key = SCORE_KEY.format(bucket, post_id)
+    if cache.add(key, 0, timeout):
+        cache.set(
+            SLOT_KEY.format(bucket, _next_slot(bucket, timeout)),
+            post_id, timeout
+        )
+    try:
+        cache.incr(key, weight)
+    except ValueError:
+        # Корзина истекла между add и incr.
+        pass
+
+
+def _window_scores(now):
+    """{post_id: log_score} по всем корзинам окна."""
+    last = _bucket(now)
+    buckets = range(last - WINDOW_DAYS * 24 * 60 * 60 // BUCKET_SECONDS,
+                    last + 1)
+    counts = cache.get_many([SLOTS_KEY.format(bucket) for bucket in buckets])
+    slot_buckets = {
+        SLOT_KEY.format(bucket, index): bucket
+        for bucket in buckets
+        for index in range(1, counts.get(SLOTS_KEY.format(bucket), 0) + 1)
+    }
+    pairs = {
+        SCORE_KEY.format(slot_buckets[key], post_id): (
+            slot_buckets[key], post_id)
+        for key, post_id in cache.get_many(list(slot_buckets)).items()
+    }
+    scores = {}
+    for key, weight in cache.get_many(list(pairs)).items():
+        if not weight:
+            continue
+        bucket, post_id = pairs[key]
+        score = _log_weight(weight, bucket * BUCKET_SECONDS)
+        if post_id in scores:
+            score = _log_add(scores[post_id], score)
+        scores[post_id] = score
+    return scores
+
+
+def _live(entries):
+    """Первые TRENDING_SIZE записей с неудаленными постами."""
+    result = []
+    for start in range(0, len(entries), TRENDING_SIZE):
+        chunk = entries[start:start + TRENDING_SIZE]
+        live = set(Post.objects.filter(
+            pk__in=[pk for _, pk in chunk]).values_list('pk', flat=True))
+        result.extend(entry for entry in chunk if entry[1] in live)
+        if len(result) >= TRENDING_SIZE:
+            break
+    return result[:TRENDING_SIZE]
+
+
+def ranking():
+    """[(log_score, post_id), ...] по убыванию очков."""
+    entries = cache.get(TRENDING_KEY)
+    if entries is None:
+        entries = _live(sorted(
+            ((score, pk) for pk, score in
+             _window_scores(timezone.now()).items()),
+            key=lambda entry: (-entry[0], entry[1])
+        ))
+        cache.set(TRENDING_KEY, entries, RANKING_TIMEOUT)
+    return entries
+
+
+def invalidate():
+    """Пересобрать рейтинг при следующем чтении: например, после
+    удаления постов из него."""
+    cache.delete(TRENDING_KEY)
+
+
+def record_post(post):
+    add_score(post.pk, POST_WEIGHT, post.pub_date)
+
+
+def record_comment(comment):
+    add_score(comment.post_id, COMMENT_WEIGHT, comment.created)
+
+
+def record_follow(author):
+    """Новый подписчик поднимает последний пост автора."""
+    post_id = (
+        Post.objects.filter(author=author)
+        .values_list('pk', flat=True).first()
+    )
+    if post_id is not None:
+        add_score(post_id, FOLLOW_WEIGHT)
+
+
+def page_post_ids(start, stop):
+    return [pk for _, pk in ranking()[start:stop]]
+
+
+def rebuild(days=WINDOW_DAYS):
+    """Заполняет корзины заново по постам и комментариям за days дней
+    (не больше окна) и возвращает число постов в рейтинге.
+
+    Время подписок не хранится, поэтому их вклад теряется до новых
+    событий.
+    """
+    now = timezone.now()
+    since = now - timedelta(days=min(days, WINDOW_DAYS))
+    weights = defaultdict(lambda: defaultdict(int))
+    events = [
+        (pk, POST_WEIGHT, pub_date) for pk, pub_date in
+        Post.objects.filter(pub_date__gte=since)
+        .values_list('pk', 'pub_date').iterator()
+    ] + [
+        (post_id, COMMENT_WEIGHT, created) for post_id, created in
+        Comment.objects.filter(created__gte=since)
+        .values_list('post_id', 'created').iterator()
+    ]
+    for post_id, weight, when in events:
+        weights[_bucket(when)][post_id] += weight
+    for bucket, posts in weights.items():
+        timeout = _timeout(bucket, now)
+        if timeout <= 0:
+            continue
+        values = {SLOTS_KEY.format(bucket): len(posts)}
+        for index, (post_id, weight) in enumerate(posts.items(), 1):
+            values[SLOT_KEY.format(bucket, index)] = post_id
+            values[SCORE_KEY.format(bucket, post_id)] = weight
+        cache.set_many(values, timeout)
+    invalidate()
+    return len(ranking())
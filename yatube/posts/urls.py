@@ -1,24 +1,60 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, register_converter
 
-from . import views
+from . import async_views, syndication, views
 
 
 app_name = 'posts'
 
+feed_views = async_views if settings.ASYNC_VIEWS else views
+
+register_converter(syndication.FormatConverter, 'feed_format')
+
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('group/<slug:slug>/', views.group_list, name='group_list'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('', feed_views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
+    path('groups/', views.group_directory, name='group_directory'),
+    path('group/<slug:slug>/', feed_views.group_list, name='group_list'),
+    path('profile/<str:username>/', feed_views.profile, name='profile'),
+    path('posts/<int:post_id>/', feed_views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/history/',
+        views.post_history,
+        name='post_history'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('feeds/<feed_format:fmt>/', views.feed, name='feed'),
+    path(
+        'feeds/group/<slug:slug>/<feed_format:fmt>/',
+        views.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'feeds/profile/<str:username>/<feed_format:fmt>/',
+        views.author_feed,
+        name='author_feed'
+    ),
+    path('sitemap.xml', views.sitemap, name='sitemap'),
+    path('sitemap-<str:name>.xml', views.sitemap, name='sitemap_chunk'),
+    path('robots.txt', views.robots_txt, name='robots_txt'),
+    path(
+        'notifications/',
+        views.notification_inbox,
+        name='notifications'
+    ),
+    path(
+        'notifications/read/',
+        views.notifications_read,
+        name='notifications_read'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,9 +1,29 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, render, redirect
+from django.urls import reverse
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
 
-from .models import Group, Post, User, Comment, Follow
-from .forms import PostForm, CommentForm
+from core.paginator import FeedPaginator
+from core.ratelimit import ratelimit
+
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post,
+    PostRevision, User
+)
+from .feed_cache import feed_version
+from .follow_graph import FollowGraph
+from . import (
+    events, feed_cache, group_stats, notifications, revisions, sitemaps,
+    syndication, trends
+)
+from .forms import PostForm, CommentForm, ReplyForm
+from .markup import render as render_markup
+from .rows import feed_rows
 
 
 SELECT_LIMIT = 10
@@ -13,20 +33,43 @@ NUMBER_OF_POSTS: int = 10
 
 
 def index(request):
-    posts = Post.objects.all().order_by('-pub_date')
-    paginator = Paginator(posts, NUMBER_OF_POSTS)
+    posts = Post.objects.order_by('-pub_date')
+    paginator = FeedPaginator(
+        posts, NUMBER_OF_POSTS, feed_cache.index_counting(), feed_rows)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
         'page_obj': page_obj,
+        'feed_version': feed_version(),
     }
     return render(request, 'posts/index.html', context)
 
 
+def trending(request):
+    paginator = Paginator(trends.ranking(), NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [post_id for _, post_id in page_obj.object_list])
+    page_obj.object_list = [
+        posts[post_id] for _, post_id in page_obj.object_list
+        if post_id in posts
+    ]
+    return render(request, 'posts/trending.html', {'page_obj': page_obj})
+
+
+def group_directory(request):
+    groups = Group.objects.select_related('stats').order_by('title')
+    paginator = Paginator(groups, NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = group_stats.attach_top_authors(page_obj)
+    return render(request, 'posts/groups.html', {'page_obj': page_obj})
+
+
 def group_list(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts = Post.objects.filter(group=group).order_by('-pub_date')
-    paginator = Paginator(posts, NUMBER_OF_POSTS)
+    paginator = FeedPaginator(
+        posts, NUMBER_OF_POSTS, feed_cache.group_counting(slug), feed_rows)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
@@ -38,26 +81,35 @@ def group_list(request, slug):
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts_author = author.posts.all()
-    paginator = Paginator(posts_author, SELECT_LIMIT)
+    archived = 'archive' in request.GET
+    if archived:
+        paginator = FeedPaginator(
+            author.archived_posts.select_related('group'), SELECT_LIMIT)
+    else:
+        paginator = FeedPaginator(
+            author.posts.all(), SELECT_LIMIT,
+            feed_cache.profile_counting(username), feed_rows
+        )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    following = False
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=author
-        ).exists()
+    following = FollowGraph.for_request(request).is_following(author.pk)
     return render(request, 'posts/profile.html', {
         'author': author,
         'page_obj': page_obj,
-        'following': following
+        'following': following,
+        'archived': archived,
+        # Архив проверяется только на последней странице ленты.
+        'has_archive': not archived and not page_obj.has_next()
+        and author.archived_posts.exists(),
+        'page_prefix': 'archive=1&' if archived else '',
     })
 
 
 def post_detail(request, post_id):
-    posts = get_object_or_404(Post, id=post_id)
-    comments = Comment.objects.select_related('post')
+    posts = Post.objects.filter(id=post_id).first()
+    if posts is None:
+        return archived_post_detail(request, post_id)
+    comments = Comment.objects.thread(post_id).select_related('author')
     form = CommentForm(request.POST or None)
     return render(request, 'posts/post_detail.html', {
         'post': posts,
@@ -67,7 +119,22 @@ def post_detail(request, post_id):
     })
 
 
+def archived_post_detail(request, post_id):
+    """Пост из архива: только чтение, без комментирования и правки."""
+    post = get_object_or_404(
+        ArchivedPost.objects.select_related('author', 'group'), pk=post_id)
+    comments = ArchivedComment.objects.thread(post_id).select_related(
+        'author')
+    return render(request, 'posts/post_detail.html', {
+        'post': post,
+        'post_count': Post.objects.filter(author_id=post.author_id).count(),
+        'comments': comments,
+        'archived': True,
+    })
+
+
 @login_required
+@ratelimit('post_create', '10/m')
 def post_create(request):
     form = PostForm(request.POST or None)
     context = {
@@ -77,6 +144,9 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        trends.record_post(post)
+        events.publish_post(post)
+        notifications.notify_post(post)
         return redirect('posts:profile', post.author.username)
     return render(request, 'posts/post_create.html', context)
 
@@ -86,9 +156,12 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post.pk)
+    old_text = post.text
     form = PostForm(request.POST or None, instance=post)
     if request.method == 'POST' and form.is_valid():
-        form.save()
+        with transaction.atomic():
+            revisions.record(post, old_text, post.text, request.user)
+            form.save()
         return redirect('posts:post_detail', post.pk)
     context = {
         'form': form,
@@ -97,38 +170,152 @@ def post_edit(request, post_id):
 
 
 @login_required
+def post_history(request, post_id):
+    post = (
+        Post.objects.filter(pk=post_id).first()
+        or get_object_or_404(ArchivedPost, pk=post_id)
+    )
+    if post.author != request.user and not request.user.is_staff:
+        return redirect('posts:post_detail', post.pk)
+    paginator = Paginator(
+        PostRevision.objects.filter(post_id=post.pk)
+        .select_related('editor').defer('data'),
+        NUMBER_OF_POSTS
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'post': post,
+        'page_obj': page_obj,
+    }
+    version = request.GET.get('version')
+    if version and version.isdigit():
+        try:
+            text = revisions.text_at(post, int(version))
+        except PostRevision.DoesNotExist:
+            raise Http404
+        context['version'] = int(version)
+        context['version_html'] = render_markup(text)
+    return render(request, 'posts/post_history.html', context)
+
+
+@login_required
+@ratelimit('add_comment', '30/m')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    form = CommentForm(request.POST or None)
+    form = ReplyForm(request.POST or None, post=post)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        trends.record_comment(comment)
+        events.publish_comment(comment)
+        notifications.notify_comment(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@syndication.conditional
+def feed(request, fmt):
+    feed_key, posts = syndication.source()
+    return syndication.response(
+        request, fmt, posts, feed_key,
+        'Последние обновления на сайте', reverse('posts:index')
+    )
+
+
+@syndication.conditional
+def group_feed(request, slug, fmt):
+    group = get_object_or_404(Group, slug=slug)
+    feed_key, posts = syndication.source(slug=slug)
+    return syndication.response(
+        request, fmt, posts, feed_key,
+        group.title, reverse('posts:group_list', args=[slug])
+    )
+
+
+@syndication.conditional
+def author_feed(request, username, fmt):
+    author = get_object_or_404(User, username=username)
+    feed_key, posts = syndication.source(username=username)
+    return syndication.response(
+        request, fmt, posts, feed_key,
+        f'Записи {author.get_full_name() or username}',
+        reverse('posts:profile', args=[username])
+    )
+
+
+def sitemap(request, name=None):
+    """Индекс или часть карты сайта из файлов generate_sitemaps."""
+    response = serve(
+        request, sitemaps.filename(name),
+        document_root=settings.SITEMAPS['ROOT']
+    )
+    patch_cache_control(response, public=True, max_age=sitemaps.MAX_AGE)
+    return response
+
+
+def robots_txt(request):
+    return render(request, 'robots.txt', {
+        'sitemap_url': request.build_absolute_uri(reverse('posts:sitemap')),
+    }, content_type='text/plain; charset=utf-8')
+
+
+@login_required
+def notification_inbox(request):
+    before = request.GET.get('before')
+    page, next_before = notifications.inbox(
+        request.user, int(before) if before and before.isdigit() else None)
+    return render(request, 'posts/notifications.html', {
+        'notifications': page,
+        'next_before': next_before,
+    })
+
+
+@login_required
+def notifications_read(request):
+    if request.method == 'POST':
+        notifications.mark_all_read(request.user)
+    return redirect('posts:notifications')
+
+
 @login_required
 def follow_index(request):
     posts_list = Post.objects.filter(
         author__following__user=request.user)
-    paginator = Paginator(posts_list, SELECT_LIMIT)
+    paginator = FeedPaginator(
+        posts_list, SELECT_LIMIT,
+        feed_cache.follow_counting(request.user.pk), feed_rows
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    context = {'page_obj': page_obj}
+    graph = FollowGraph.for_request(request)
+    suggestions = graph.suggestions()
+    authors = User.objects.in_bulk(suggestions)
+    context = {
+        'page_obj': page_obj,
+        # Порядок рекомендаций - по числу общих подписок.
+        'suggested_authors': [
+            authors[pk] for pk in suggestions if pk in authors
+        ],
+        'following_ids': ','.join(map(str, sorted(graph.following_ids))),
+    }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('follow', '30/m', methods=('GET', 'POST'))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     user = request.user
     if author != user:
-        Follow.objects.get_or_create(user=user, author=author)
+        _, created = Follow.objects.get_or_create(user=user, author=author)
+        if created:
+            trends.record_follow(author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@ratelimit('follow', '30/m', methods=('GET', 'POST'))
 def profile_unfollow(request, username):
     user_follower = get_object_or_404(
         Follow,
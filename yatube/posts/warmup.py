@@ -0,0 +1,147 @@
+"""Прогрев кешей после деплоя.
+
+warm() запрашивает через обычный стек Django (middleware, шаблоны,
+фрагментный кеш) первые страницы index, ленты самых больших групп,
+самые популярные посты из рейтинга "в тренде" и профили их авторов.
+Заодно заполняются хранилище sorl-thumbnail и кеш загрузчика шаблонов:
+миниатюры строятся при рендеринге тех же страниц.
+
+Запросы идут параллельно, но не больше concurrency одновременно.
+Они проходят через middleware без тестового клиента, с хостом из
+ALLOWED_HOSTS.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.base import BaseHandler
+from django.db import close_old_connections
+from django.test import RequestFactory
+from django.urls import reverse
+
+from . import trends
+from .models import GroupStats, Post
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = 'posts:warmup'
+
+
+def urls(pages=3, groups=10, posts=20):
+    """Адреса для прогрева, от самых важных к менее важным."""
+    result = [
+        reverse('posts:index') + (f'?page={page}' if page > 1 else '')
+        for page in range(1, pages + 1)
+    ]
+    result += [
+        reverse('posts:group_list', args=[slug])
+        for slug in GroupStats.objects.order_by('-post_count')
+        .values_list('group__slug', flat=True)[:groups]
+    ]
+    post_ids = [post_id for _, post_id in trends.ranking()[:posts]]
+    if not post_ids:
+        post_ids = list(
+            Post.objects.order_by('-pub_date')
+            .values_list('pk', flat=True)[:posts]
+        )
+    authors = dict(
+        Post.objects.filter(pk__in=post_ids)
+        .values_list('pk', 'author__username')
+    )
+    usernames = []
+    for post_id in post_ids:
+        if post_id not in authors:
+            continue
+        result.append(reverse('posts:post_detail', args=[post_id]))
+        if authors[post_id] not in usernames:
+            usernames.append(authors[post_id])
+    result += [
+        reverse('posts:profile', args=[username]) for username in usernames
+    ]
+    return result
+
+
+def _host():
+    """Первый хост из ALLOWED_HOSTS, который принимает CommonMiddleware."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def _handler():
+    handler = BaseHandler()
+    handler.load_middleware()
+    return handler
+
+
+def _fetch(url, handler=None):
+    started = time.monotonic()
+    request = RequestFactory(HTTP_HOST=_host()).get(url)
+    response = (handler or _handler()).get_response(request)
+    response.close()
+    return url, response.status_code, time.monotonic() - started
+
+
+def _fetch_in_thread(url, handler):
+    try:
+        return _fetch(url, handler)
+    finally:
+        close_old_connections()
+
+
+def warm(pages=3, groups=10, posts=20, concurrency=4):
+    """Прогревает страницы.
+
+    Возвращает [(url, status, seconds), ...] в порядке urls(). При
+    concurrency=1 запросы идут по очереди в текущем потоке.
+    """
+    targets = urls(pages, groups, posts)
+    handler = _handler()
+    if concurrency <= 1:
+        return [_fetch(url, handler) for url in targets]
+    with ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix='warmup') as executor:
+        return list(executor.map(
+            _fetch_in_thread, targets, [handler] * len(targets)))
+
+
+def warm_on_startup():
+    """Хук для WSGI: прогрев в фоне, один раз на WARMUP['LOCK_SECONDS'].
+
+    При нескольких воркерах прогревает только тот, кто первым занял
+    ключ в кеше.
+    """
+    options = settings.WARMUP
+    if not cache.add(LOCK_KEY, True, options['LOCK_SECONDS']):
+        return None
+
+    def run():
+        started = time.monotonic()
+        try:
+            warmed = warm(
+                options['PAGES'], options['GROUPS'], options['POSTS'],
+                options['CONCURRENCY']
+            )
+        except Exception:
+            logger.exception('Прогрев кешей не удался')
+            return
+        logger.info(
+            'Прогрето страниц: %s за %.1f с',
+            len(warmed), time.monotonic() - started)
+
+    thread = threading.Thread(target=run, name='warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_after_fork():
+    """Хук для preload: прогрев запускается в каждом процессе после
+    fork, а не в мастере. Поток мастера не переживает fork, а его кеш
+    и ключ блокировки в locmem достались бы воркерам без прогрева."""
+    os.register_at_fork(after_in_child=warm_on_startup)
@@ -0,0 +1,25 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Ленты posts под этой точкой входа обслуживаются асинхронными
+представлениями из posts/async_views.py, а потоки /events/ -
+core.sse.EventStreamApplication.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+os.environ.setdefault('YATUBE_ASYNC_VIEWS', '1')
+
+application = get_asgi_application()
+
+from core.sse import EventStreamApplication  # noqa: E402
+from posts.events import ROUTES  # noqa: E402
+
+application = EventStreamApplication(application, ROUTES)
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from core.cache import is_shared
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -40,7 +42,9 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
-    'django.contrib.admin',
+    # Админка регистрируется в yatube/urls.py (admin.autodiscover()),
+    # а не при django.setup(): командам manage.py она не нужна.
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -74,7 +78,9 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'core.context_processors.year.year'
+                'core.context_processors.year.year',
+                'core.context_processors.realtime.realtime',
+                'posts.context_processors.notifications',
             ]
         },
     }
@@ -82,6 +88,27 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+ASGI_APPLICATION = 'yatube.asgi.application'
+
+# Ленточные представления posts в асинхронном варианте.
+# Включается точкой входа yatube/asgi.py.
+ASYNC_VIEWS = os.environ.get('YATUBE_ASYNC_VIEWS') == '1'
+
+# Потоки событий /events/ (core.sse) есть только под ASGI.
+REALTIME_EVENTS = ASYNC_VIEWS
+
+# Брокер событий: InProcessBroker для одного процесса, SocketBroker
+# (manage.py pubsub_broker) для нескольких воркеров.
+PUBSUB = {
+    'BACKEND': os.environ.get(
+        'YATUBE_PUBSUB_BACKEND', 'core.pubsub.InProcessBroker'),
+    'OPTIONS': {},
+}
+
+# Независимые запросы асинхронных представлений выполняются
+# параллельно в пуле потоков, каждый на своем соединении с БД.
+ASYNC_CONCURRENT_QUERIES = True
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -93,6 +120,8 @@ DATABASES = {
     }
 }
 
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -113,6 +142,15 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Пользователь запроса берется из кеша (core.auth), если кеш по
+# умолчанию общий для воркеров; с locmem - из БД. ModelBackend оставлен
+# для сессий, созданных до его подключения.
+AUTHENTICATION_BACKENDS = [
+    'core.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
 
@@ -134,6 +172,12 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+# collectstatic добавляет хеш в имена файлов и сжатые копии .gz/.br;
+# yatube/wsgi.py отдает их с Cache-Control: immutable.
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -146,4 +190,126 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Хранилище загрузок: локальный диск или S3-совместимое хранилище
+# (YATUBE_FILE_STORAGE=core.storage.ObjectStorage). Для S3 нужен boto3;
+# CLIENT='memory' - хранилище внутри процесса для разработки и тестов.
+DEFAULT_FILE_STORAGE = os.environ.get(
+    'YATUBE_FILE_STORAGE', 'django.core.files.storage.FileSystemStorage')
+
+OBJECT_STORAGE = {
+    'CLIENT': os.environ.get('YATUBE_S3_CLIENT', 'boto3'),
+    'BUCKET': os.environ.get('YATUBE_S3_BUCKET', 'yatube-media'),
+    'ENDPOINT_URL': os.environ.get('YATUBE_S3_ENDPOINT_URL'),
+    'ACCESS_KEY': os.environ.get('YATUBE_S3_ACCESS_KEY'),
+    'SECRET_KEY': os.environ.get('YATUBE_S3_SECRET_KEY'),
+    'REGION': os.environ.get('YATUBE_S3_REGION'),
+    'CDN_URL': os.environ.get('YATUBE_MEDIA_CDN_URL'),
+    'SIGNED_URLS': os.environ.get('YATUBE_S3_SIGNED_URLS') == '1',
+    'SIGNED_URL_EXPIRES': 60 * 60,
+    'MULTIPART_THRESHOLD': 8 * 1024 * 1024,
+    'MULTIPART_CHUNK_SIZE': 8 * 1024 * 1024,
+    'MULTIPART_CONCURRENCY': 4,
+}
+
+# Отдача медиа (core.media.serve_media). Каталоги, доступные всем:
+MEDIA_PUBLIC_PREFIXES = ('posts/', 'cache/')
+
+MEDIA_MAX_AGE = 24 * 60 * 60
+
+# Передать отдачу файла фронтенд-серверу. Для nginx - префикс internal
+# location, например '/protected-media/' (alias на MEDIA_ROOT); для
+# Apache/lighttpd - имя заголовка, например 'X-Sendfile'.
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('YATUBE_MEDIA_ACCEL_REDIRECT')
+
+MEDIA_SENDFILE_HEADER = os.environ.get('YATUBE_MEDIA_SENDFILE_HEADER')
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # Рейтинг posts.trends держит по два ключа на пост в корзине:
+        # 300 ключей по умолчанию вытесняли бы его.
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    },
+}
+
+# Сессии читаются из кеша, в БД идет только запись (cached_db), но
+# только если кеш sessions общий для воркеров: с locmem выход и смена
+# пароля сбросили бы сессию лишь в кеше одного воркера, а остальные
+# отдавали бы свою копию до истечения. Поэтому с локальным кешем
+# остается backends.db. Переход с backends.db не разлогинивает
+# пользователей: при промахе кеша сессия читается из django_session.
+# Вариант без БД совсем -
+# YATUBE_SESSION_ENGINE=django.contrib.sessions.backends.signed_cookies
+# (старые сессии при переходе теряются). Просроченные строки удаляет
+# периодический manage.py clearsessions.
+SESSION_CACHE_ALIAS = 'sessions'
+
+SESSION_ENGINE = os.environ.get(
+    'YATUBE_SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db'
+    if is_shared(SESSION_CACHE_ALIAS, CACHES)
+    else 'django.contrib.sessions.backends.db'
+)
+
+# Ограничение частоты запросов (core.ratelimit): группа -> 'N/период'.
+# Счетчики хранятся в кеше RATELIMIT_CACHE, общем для всех воркеров
+# при memcached/redis.
+RATELIMIT_ENABLE = True
+
+RATELIMIT_CACHE = 'default'
+
+RATELIMITS = {
+    'post_create': '10/m',
+    'add_comment': '30/m',
+    'follow': '30/m',
+    'signup': '5/h',
+}
+
+# Уведомления (posts.notifications). BACKGROUND - фан-аут в фоновом
+# потоке после коммита; KEEP_DAYS - сколько хранить прочитанные;
+# AGGREGATE_AFTER_DAYS - после скольких дней compact_notifications
+# склеивает непрочитанные уведомления о постах одного автора.
+NOTIFICATIONS = {
+    'BACKGROUND': True,
+    'KEEP_DAYS': 30,
+    'AGGREGATE_AFTER_DAYS': 1,
+}
+
+# Посты старше ARCHIVE_AFTER_MONTHS месяцев команда archive_posts
+# переносит вместе с комментариями в архивные таблицы (posts.archive).
+ARCHIVE_AFTER_MONTHS = 12
+
+# Каждая REVISIONS_SNAPSHOT_EVERY-я версия поста хранит полный текст,
+# остальные - обратный diff (posts.revisions). Значение определяет,
+# какие номера ревизий считаются снимками, менять его на живой базе
+# нельзя.
+REVISIONS_SNAPSHOT_EVERY = 10
+
+# Прогрев кешей после деплоя (posts.warmup): команда warm_caches и,
+# при YATUBE_WARM_CACHES=1, фоновый прогрев при старте WSGI-воркера.
+WARMUP = {
+    'ON_STARTUP': os.environ.get('YATUBE_WARM_CACHES') == '1',
+    'PAGES': 3,
+    'GROUPS': 10,
+    'POSTS': 20,
+    'CONCURRENCY': 4,
+    'LOCK_SECONDS': 5 * 60,
+}
+
+# YATUBE_PRELOAD=1 для pre-fork серверов (gunicorn --preload): wsgi.py
+# загружает представления, шаблоны и тяжелые модули в мастере, и
+# воркеры получают их после fork без повторной загрузки (core.preload).
+PRELOAD = os.environ.get('YATUBE_PRELOAD') == '1'
+
+# Карты сайта (posts.sitemaps): команда generate_sitemaps пишет части и
+# индекс в ROOT, ссылки в них строятся от BASE_URL.
+SITEMAPS = {
+    'ROOT': os.path.join(BASE_DIR, 'sitemaps'),
+    'BASE_URL': os.environ.get('YATUBE_BASE_URL', 'http://localhost:8000'),
+}
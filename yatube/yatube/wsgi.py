@@ -2,9 +2,13 @@
 WSGI config for yatube project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Статика из STATIC_ROOT отдается core.staticfiles.StaticFilesApplication
+до Django. При YATUBE_WARM_CACHES=1 воркер после старта прогревает кеши
+в фоне (posts.warmup), а при YATUBE_PRELOAD=1 все, что нужно воркеру,
+загружается до fork (core.preload), и прогрев откладывается до fork.
 
 For more information on this file, see
-https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
+https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 """
 
 import os
@@ -14,3 +18,22 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from core.staticfiles import StaticFilesApplication  # noqa: E402
+
+application = StaticFilesApplication(application)
+
+from django.conf import settings  # noqa: E402
+
+if settings.PRELOAD:
+    from core.preload import preload
+
+    preload()
+
+if settings.WARMUP['ON_STARTUP']:
+    from posts import warmup
+
+    if settings.PRELOAD:
+        warmup.warm_after_fork()
+    else:
+        warmup.warm_on_startup()